@@ -1,29 +1,197 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from import_export.admin import ImportExportModelAdmin
 
 # from django.contrib import admin
-from api import models 
+from api import models
+from api import resources
+
+
+# Below this many rows an exact COUNT(*) is cheap enough and more useful
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for big tables: an unfiltered changelist takes its total from
+    PostgreSQL's planner statistics (pg_class.reltuples) instead of
+    COUNT(*), which has to scan the whole table. Filtered lists, small
+    tables and other databases still count exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables that grow with traffic: estimated totals,
+    no second COUNT(*) for the "show all" link, newest rows first by primary
+    key, and foreign keys edited by id instead of giant <select>s.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ["-id"]
+    list_per_page = 50
+
+
+@admin.register(models.CartOrder)
+class CartOrderAdmin(LargeTableAdmin):
+    list_display = ["oid", "student", "payment_status", "total", "date"]
+    list_select_related = ["student"]
+    list_filter = ["payment_status"]
+    search_fields = ["=oid", "=razorpay_order_id", "=razorpay_payment_id"]
+    raw_id_fields = ["student"]
+    filter_horizontal = ["teachers", "coupons"]
+
+
+@admin.register(models.CartOrderItem)
+class CartOrderItemAdmin(LargeTableAdmin):
+    list_display = ["oid", "order", "course_title", "teacher", "total", "date"]
+    list_select_related = ["order", "course", "teacher"]
+    search_fields = ["=oid", "=order__oid"]
+    raw_id_fields = ["order", "course", "teacher"]
+    filter_horizontal = ["coupons"]
+
+    @admin.display(description="Course", ordering="course__title")
+    def course_title(self, obj):
+        return obj.course.title
+
+
+@admin.register(models.EnrolledCourse)
+class EnrolledCourseAdmin(LargeTableAdmin):
+    list_display = ["enrollment_id", "course_title", "user", "teacher", "date"]
+    list_select_related = ["course", "user", "teacher"]
+    search_fields = ["=enrollment_id"]
+    raw_id_fields = ["course", "user", "teacher", "order_item", "last_variant_item"]
+
+    @admin.display(description="Course", ordering="course__title")
+    def course_title(self, obj):
+        return obj.course.title
+
+
+@admin.register(models.CompletedLesson)
+class CompletedLessonAdmin(LargeTableAdmin):
+    list_display = ["id", "course_title", "variant_item_title", "user", "date"]
+    list_select_related = ["course", "variant_item", "user"]
+    raw_id_fields = ["course", "variant_item", "user"]
+
+    @admin.display(description="Course", ordering="course__title")
+    def course_title(self, obj):
+        return obj.course.title
+
+    @admin.display(description="Lesson")
+    def variant_item_title(self, obj):
+        return obj.variant_item.title
+
+
+@admin.register(models.Notification)
+class NotificationAdmin(LargeTableAdmin):
+    list_display = ["id", "type", "user", "teacher", "seen", "date"]
+    list_select_related = ["user", "teacher"]
+    list_filter = ["type", "seen"]
+    raw_id_fields = ["user", "teacher", "order", "order_item", "review"]
+
+
+@admin.register(models.QuizAttempt)
+class QuizAttemptAdmin(LargeTableAdmin):
+    list_display = ["attempt_id", "quiz", "user", "attempt_number", "status", "score", "completed_at"]
+    list_select_related = ["quiz__course", "user"]
+    list_filter = ["status"]
+    search_fields = ["=attempt_id"]
+    raw_id_fields = ["quiz", "user"]
+
+
+@admin.register(models.QuizAnswer)
+class QuizAnswerAdmin(LargeTableAdmin):
+    list_display = ["quiz_answer_id", "attempt", "question", "is_correct"]
+    list_select_related = ["attempt__quiz", "attempt__user", "question__quiz"]
+    search_fields = ["=quiz_answer_id", "=attempt__attempt_id"]
+    raw_id_fields = ["attempt", "question", "selected_option"]
+
+
+@admin.register(models.Question_Answer_Message)
+class QuestionAnswerMessageAdmin(LargeTableAdmin):
+    list_display = ["qam_id", "question", "user", "date"]
+    list_select_related = ["question", "user"]
+    search_fields = ["=qam_id", "=question__qa_id"]
+    raw_id_fields = ["course", "question", "user"]
+
+
+@admin.register(models.PaymentConfirmation)
+class PaymentConfirmationAdmin(LargeTableAdmin):
+    list_display = ["payment_id", "order", "source", "date"]
+    list_select_related = ["order"]
+    list_filter = ["source"]
+    search_fields = ["=payment_id", "=provider_order_id", "=order__oid"]
+    raw_id_fields = ["order"]
+
+
+# Catalog models: bulk import (with a dry-run preview) and export from the changelist
+
+@admin.register(models.Category)
+class CategoryAdmin(ImportExportModelAdmin):
+    resource_classes = [resources.CategoryResource]
+
+
+@admin.register(models.Course)
+class CourseAdmin(ImportExportModelAdmin):
+    resource_classes = [resources.CourseResource]
+    list_display = ["course_id", "title", "category", "teacher", "platform_status", "date"]
+    list_select_related = ["category", "teacher"]
+    search_fields = ["=course_id", "title"]
+    raw_id_fields = ["teacher"]
+
+
+@admin.register(models.Variant)
+class VariantAdmin(ImportExportModelAdmin):
+    resource_classes = [resources.VariantResource]
+    raw_id_fields = ["course"]
+
+
+@admin.register(models.VariantItem)
+class VariantItemAdmin(ImportExportModelAdmin):
+    resource_classes = [resources.VariantItemResource]
+    list_display = ["variant_item_id", "title", "variant", "preview"]
+    list_select_related = ["variant"]
+    raw_id_fields = ["variant"]
+
+
+@admin.register(models.Coupon)
+class CouponAdmin(ImportExportModelAdmin):
+    resource_classes = [resources.CouponResource]
+
+
+@admin.register(models.Country)
+class CountryAdmin(ImportExportModelAdmin):
+    resource_classes = [resources.CountryResource]
 
 
 admin.site.register(models.Teacher)
-admin.site.register(models.Category)
-admin.site.register(models.Course)
-admin.site.register(models.Variant)
-admin.site.register(models.VariantItem)
 admin.site.register(models.Question_Answer)
-admin.site.register(models.Question_Answer_Message)
 admin.site.register(models.Cart)
-admin.site.register(models.CartOrder)
-admin.site.register(models.CartOrderItem)
-admin.site.register(models.CompletedLesson)
-admin.site.register(models.EnrolledCourse)
 admin.site.register(models.Note)
 admin.site.register(models.Review)
-admin.site.register(models.Notification)
-admin.site.register(models.Coupon)
+admin.site.register(models.NotificationCounter)
+admin.site.register(models.OutboundEmail)
 admin.site.register(models.Wishlist)
-admin.site.register(models.Country)
 
-# EXPERIMENTAL 
+# EXPERIMENTAL
 
 admin.site.register(models.Certificate)
 admin.site.register(models.NFT)
@@ -34,5 +202,5 @@ admin.site.register(models.CertificateNFT)
 admin.site.register(models.Quiz)
 admin.site.register(models.QuizQuestion)
 admin.site.register(models.QuizQuestionOption)
-admin.site.register(models.QuizAttempt)
-admin.site.register(models.QuizAnswer)
+admin.site.register(models.QuizResultSummary)
+admin.site.register(models.CourseLeaderboardEntry)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connect the signals that keep cached principals and the token
+        # blocklist in step with Teacher and User rows
+        from api import authentication, principals  # noqa: F401
@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from userauths.models import User
+
+
+def _blocked_key(user_id):
+    return f"auth:blocked:{user_id}"
+
+
+def is_blocked(user_id):
+    """
+    True if the user was deleted or deactivated. Served from the blocklist in
+    the shared cache, which the User signals keep current, so a request costs
+    no query. After a cache flush, refill it with rebuild_auth_blocklist.
+    """
+    return cache.get(_blocked_key(user_id), False)
+
+
+def block_user(user_id):
+    cache.set(_blocked_key(user_id), True, timeout=None)
+
+
+def unblock_user(user_id):
+    cache.delete(_blocked_key(user_id))
+
+
+def rebuild_blocklist():
+    """Block every inactive user; returns how many. Deleted users are gone
+    from the table, their tokens lapse when they expire."""
+    user_ids = list(User.objects.filter(is_active=False).values_list(api_settings.USER_ID_FIELD, flat=True))
+    cache.set_many({_blocked_key(user_id): True for user_id in user_ids}, timeout=None)
+    return len(user_ids)
+
+
+def _load_user(user_id):
+    user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+    if user is None:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return user
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    request.user for ClaimsJWTAuthentication. The id comes from the token
+    and the row is loaded on first use of any other attribute. It passes
+    as a User for isinstance() and ORM lookups, so filter(user=request.user)
+    and permission checks run without the query.
+    """
+
+    def __init__(self, user_id):
+        super().__init__(lambda: _load_user(user_id))
+        # LazyObject forwards attribute writes to the wrapped object
+        self.__dict__["_user_id"] = user_id
+
+    @property
+    def pk(self):
+        return self.__dict__["_user_id"]
+
+    id = pk
+
+    @property
+    def __class__(self):
+        return User
+
+    @property
+    def _meta(self):
+        return User._meta
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        return True
+
+    def __getattr__(self, name):
+        # The ORM probes lookup values for expression methods; refuse names
+        # no User has without loading the row
+        if self._wrapped is empty and name != "_state" and not hasattr(User, name):
+            raise AttributeError(name)
+        return super().__getattr__(name)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the signed claims instead of loading the
+    user on every request. Deactivated and deleted users are refused
+    through is_blocked(); the row is still loaded, and checked, as soon as
+    a view reads a user field.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if is_blocked(user_id):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return ClaimsUser(user_id)
+
+
+def user_saved(sender, instance, **kwargs):
+    # QuerySet.update() sends no signal; deactivate users with save()
+    if instance.is_active:
+        unblock_user(instance.pk)
+    else:
+        block_user(instance.pk)
+
+
+def user_deleted(sender, instance, **kwargs):
+    block_user(instance.pk)
+
+
+post_save.connect(user_saved, sender=User)
+post_delete.connect(user_deleted, sender=User)
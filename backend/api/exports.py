@@ -0,0 +1,147 @@
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Min
+from django.http import StreamingHttpResponse
+
+from api import models as api_models
+
+# Rows fetched per round trip of the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# Rows encoded into one chunk of the response body
+ROWS_PER_WRITE = 500
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _orders(teacher_id):
+    return (
+        api_models.CartOrderItem.objects
+        .filter(teacher_id=teacher_id)
+        .order_by("id")
+        .values(
+            "oid", "order__oid", "date", "course__title", "order__payment_status",
+            "price", "tax_fee", "total", "initial_total", "saved", "applied_coupon",
+            "order__full_name", "order__email", "order__country",
+        )
+    )
+
+
+def _students(teacher_id):
+    # One row per student, however many of the teacher's courses they took
+    return (
+        api_models.EnrolledCourse.objects
+        .filter(teacher_id=teacher_id, user__isnull=False)
+        .values("user_id", "user__full_name", "user__email", "user__profile__country")
+        .annotate(courses=Count("id"), first_enrolled=Min("date"))
+        .order_by("user_id")
+    )
+
+
+def _reviews(teacher_id):
+    return (
+        api_models.Review.objects
+        .filter(course__teacher_id=teacher_id)
+        .order_by("id")
+        .values("id", "date", "course__title", "user__full_name", "rating", "review", "reply", "active")
+    )
+
+
+# name: (queryset factory, [(column, header)])
+DATASETS = {
+    "orders": (_orders, [
+        ("oid", "item_id"), ("order__oid", "order_id"), ("date", "date"), ("course__title", "course"),
+        ("order__payment_status", "payment_status"), ("price", "price"), ("tax_fee", "tax_fee"),
+        ("total", "total"), ("initial_total", "initial_total"), ("saved", "saved"),
+        ("applied_coupon", "applied_coupon"), ("order__full_name", "full_name"),
+        ("order__email", "email"), ("order__country", "country"),
+    ]),
+    "students": (_students, [
+        ("user_id", "user_id"), ("user__full_name", "full_name"), ("user__email", "email"),
+        ("user__profile__country", "country"), ("courses", "courses"), ("first_enrolled", "first_enrolled"),
+    ]),
+    "reviews": (_reviews, [
+        ("id", "id"), ("date", "date"), ("course__title", "course"), ("user__full_name", "student"),
+        ("rating", "rating"), ("review", "review"), ("reply", "reply"), ("active", "active"),
+    ]),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the line, so csv.writer can encode one row at a time"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    # Spreadsheets run cells starting with these as formulas
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+def rows(dataset, teacher_id):
+    """Flat dicts of one export, streamed from a server-side cursor"""
+    factory, _ = DATASETS[dataset]
+    return factory(teacher_id).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def encode(dataset, teacher_id, export_format):
+    """
+    The export body as an iterator of text chunks. The header goes out
+    before the first query, then every ROWS_PER_WRITE rows become one chunk,
+    so memory stays flat whatever the size of the export.
+    """
+    _, columns = DATASETS[dataset]
+    keys = [column for column, _ in columns]
+    writer = csv.writer(_Echo())
+
+    def line(row):
+        if export_format == "csv":
+            return writer.writerow([_csv_cell(row[key]) for key in keys])
+        return json.dumps({header: row[column] for column, header in columns}, cls=DjangoJSONEncoder) + "\n"
+
+    if export_format == "csv":
+        yield writer.writerow([header for _, header in columns])
+
+    batch = []
+    for row in rows(dataset, teacher_id):
+        batch.append(line(row))
+        if len(batch) >= ROWS_PER_WRITE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+async def _async_chunks(chunks):
+    # Under ASGI a synchronous iterator would be read into memory in one go;
+    # pull it chunk by chunk on the sync thread, which also keeps the cursor's connection
+    advance = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await advance(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Client gone or done: release the cursor on the thread that opened it
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def response(request, dataset, teacher_id, export_format):
+    chunks = encode(dataset, teacher_id, export_format)
+    if isinstance(request, ASGIRequest):
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[export_format])
+    response["Content-Disposition"] = f'attachment; filename="{dataset}.{export_format}"'
+    response["X-Accel-Buffering"] = "no"
+    return response
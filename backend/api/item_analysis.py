@@ -0,0 +1,118 @@
+import numpy as np
+
+from api import models as api_models
+
+# Share of students in the upper and lower groups of the discrimination index
+DISCRIMINATION_GROUP = 0.27
+
+
+def question_stats(quiz, best):
+    """
+    Classical item analysis over students' best attempts (`best`, rows of
+    quizzes.best_attempts): difficulty (share answering correctly),
+    upper-lower discrimination index, point-biserial correlation between
+    getting the item right and the attempt's score, and how often each
+    option was chosen.
+
+    All answers come from a single values_list query and are reduced with
+    NumPy bincounts, so the cost grows with the number of answers, not with
+    questions times answers.
+    """
+    questions = list(
+        api_models.QuizQuestion.objects
+        .filter(quiz=quiz)
+        .order_by("order", "id")
+        .values_list("id", "quiz_question_id", "question_text", "points")
+    )
+    options = list(
+        api_models.QuizQuestionOption.objects
+        .filter(question__quiz=quiz)
+        .order_by("id")
+        .values_list("id", "question_id", "quiz_question_option_id", "option_text", "is_correct")
+    )
+    rows = list(
+        api_models.QuizAnswer.objects
+        .filter(attempt_id__in=[row["id"] for row in best])
+        .values_list("question_id", "selected_option_id", "is_correct", "attempt__score")
+    )
+
+    question_index = {pk: i for i, (pk, *_) in enumerate(questions)}
+    option_index = {pk: i for i, (pk, *_) in enumerate(options)}
+    n_questions = len(questions)
+
+    if rows:
+        question_ids, option_ids, correct, scores = zip(*rows)
+        q = np.fromiter((question_index.get(pk, -1) for pk in question_ids), dtype=np.int64, count=len(rows))
+        o = np.fromiter((option_index.get(pk, -1) if pk else -1 for pk in option_ids), dtype=np.int64, count=len(rows))
+        correct = np.asarray(correct, dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        # Answers to questions deleted since play no part
+        keep = q >= 0
+        q, o, correct, scores = q[keep], o[keep], correct[keep], scores[keep]
+    else:
+        q = o = np.empty(0, dtype=np.int64)
+        correct = scores = np.empty(0, dtype=np.float64)
+
+    # Upper and lower groups by best score, ties at the cut included
+    ranked = sorted((row["score"] for row in best), reverse=True)
+    group = max(1, round(len(ranked) * DISCRIMINATION_GROUP)) if ranked else 0
+    upper = (scores >= ranked[group - 1]) if group else np.zeros(0, dtype=bool)
+    lower = (scores <= ranked[-group]) if group else np.zeros(0, dtype=bool)
+
+    answered = np.bincount(q, minlength=n_questions).astype(np.float64)
+    right = np.bincount(q, weights=correct, minlength=n_questions)
+    upper_answered = np.bincount(q, weights=upper, minlength=n_questions)
+    upper_right = np.bincount(q, weights=upper * correct, minlength=n_questions)
+    lower_answered = np.bincount(q, weights=lower, minlength=n_questions)
+    lower_right = np.bincount(q, weights=lower * correct, minlength=n_questions)
+    score_sum = np.bincount(q, weights=scores, minlength=n_questions)
+    score_sq_sum = np.bincount(q, weights=scores * scores, minlength=n_questions)
+    right_score_sum = np.bincount(q, weights=scores * correct, minlength=n_questions)
+    picks = np.bincount(o[o >= 0], minlength=len(options))
+    option_question = np.fromiter((question_index.get(option[1], -1) for option in options), dtype=np.int64, count=len(options))
+    known = option_question >= 0
+    picked = np.bincount(option_question[known], weights=picks[known], minlength=n_questions)
+
+    options_by_question = {}
+    for j, option in enumerate(options):
+        options_by_question.setdefault(option[1], []).append((j, option))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = np.nan_to_num(right / answered)
+        discrimination = np.nan_to_num(upper_right / upper_answered) - np.nan_to_num(lower_right / lower_answered)
+        mean = score_sum / answered
+        std = np.sqrt(np.maximum(score_sq_sum / answered - mean * mean, 0))
+        mean_right = right_score_sum / right
+        mean_wrong = (score_sum - right_score_sum) / (answered - right)
+        point_biserial = (mean_right - mean_wrong) / std * np.sqrt(p * (1 - p))
+
+    stats = []
+    for i, (pk, public_id, text, points) in enumerate(questions):
+        n = int(answered[i])
+        stats.append({
+            "quiz_question_id": public_id,
+            "question_text": text,
+            "points": points,
+            "answered": n,
+            "difficulty": _number(p[i]),
+            "discrimination": _number(discrimination[i]) if n else 0,
+            # Undefined when everyone (or no one) got it right or all scores are equal
+            "point_biserial": _number(point_biserial[i]),
+            "omitted": n - int(picked[i]),
+            "options": [
+                {
+                    "quiz_question_option_id": option_public_id,
+                    "option_text": option_text,
+                    "is_correct": is_correct,
+                    "picked": int(picks[j]),
+                    "pick_rate": _number(picks[j] / n) if n else 0,
+                }
+                for j, (_, _, option_public_id, option_text, is_correct) in options_by_question.get(pk, [])
+            ],
+        })
+    return stats
+
+
+def _number(value):
+    value = float(value)
+    return None if np.isnan(value) or np.isinf(value) else round(value, 4)
@@ -0,0 +1,314 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api import models as api_models
+from userauths.models import User
+
+LEADERBOARD_PAGE_SIZE = 10
+LEADERBOARD_MAX_PAGE_SIZE = 100
+
+# Bumped by a full rebuild; invalidates every board held by every process
+EPOCH_KEY = "leaderboard-epoch"
+
+# Seconds a held board is trusted before it is rebuilt from the database.
+# Generations only reach other processes through a shared cache; with LocMem
+# this bounds how stale another worker's board can get.
+BOARD_MAX_AGE = 60
+
+# Boards held per process, least recently read dropped first
+MAX_HELD_BOARDS = 256
+
+
+class SortedBoard:
+    """
+    Ranking kept as a sorted array of keys, best first. Rank and position
+    lookups are binary searches; an update moves one key. Keys must be unique
+    and sort ascending from best to worst, so they end with the user id.
+    """
+
+    def __init__(self, entries=None):
+        """entries: {user_id: key}"""
+        self._by_user = dict(entries or {})
+        self._keys = sorted(self._by_user.values())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def upsert(self, user_id, key):
+        self.remove(user_id)
+        insort(self._keys, key)
+        self._by_user[user_id] = key
+
+    def remove(self, user_id):
+        key = self._by_user.pop(user_id, None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def rank(self, user_id):
+        """1-based position of the user, or None when not on the board"""
+        key = self._by_user.get(user_id)
+        return None if key is None else bisect_left(self._keys, key) + 1
+
+    def key(self, user_id):
+        return self._by_user.get(user_id)
+
+    def top(self, n):
+        return [(rank, key) for rank, key in enumerate(self._keys[:n], start=1)]
+
+
+class Leaderboard:
+    """
+    A kind of board (per quiz, per course). The database rows are the source
+    of truth; each process keeps SortedBoards built from them and tagged with
+    the board's generation in the shared cache. An update bumps the
+    generation: the process that made it applies the change in place, other
+    processes see a newer generation and rebuild on their next read. Held
+    boards are also rebuilt once older than BOARD_MAX_AGE, and at most
+    MAX_HELD_BOARDS are kept.
+    """
+
+    name = None
+
+    def __init__(self):
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, board_id):
+        """{user_id: key} for every entry of the board"""
+        raise NotImplementedError
+
+    def entry_key(self, board_id, user_id):
+        """Current key of one user, read from the database, or None"""
+        raise NotImplementedError
+
+    def describe(self, key):
+        """Public score fields of a key"""
+        raise NotImplementedError
+
+    def _generation_key(self, board_id):
+        return f"leaderboard-gen:{self.name}:{board_id}"
+
+    def _generation(self, board_id):
+        values = cache.get_many([EPOCH_KEY, self._generation_key(board_id)])
+        return values.get(EPOCH_KEY, 0), values.get(self._generation_key(board_id), 0)
+
+    def board(self, board_id):
+        generation = self._generation(board_id)
+        with self._lock:
+            held = self._boards.get(board_id)
+            if held and held[0] == generation and time.monotonic() - held[2] < BOARD_MAX_AGE:
+                self._boards.move_to_end(board_id)
+                return held[1]
+
+        built_at = time.monotonic()
+        board = SortedBoard(self.load(board_id))
+        with self._lock:
+            self._boards[board_id] = (generation, board, built_at)
+            self._boards.move_to_end(board_id)
+            while len(self._boards) > MAX_HELD_BOARDS:
+                self._boards.popitem(last=False)
+        return board
+
+    def changed(self, board_id, user_id):
+        """Fold one user's new standing into the board once the transaction commits"""
+        transaction.on_commit(lambda: self._apply(board_id, user_id))
+
+    def _apply(self, board_id, user_id):
+        generation_key = self._generation_key(board_id)
+        cache.add(generation_key, 0, timeout=None)
+        try:
+            new = cache.incr(generation_key)
+        except ValueError:
+            # Evicted between add and incr; the next read rebuilds
+            return
+        epoch = cache.get(EPOCH_KEY, 0)
+
+        with self._lock:
+            held = self._boards.get(board_id)
+            if not held or held[0] != (epoch, new - 1):
+                # Missed someone else's update: rebuild lazily
+                self._boards.pop(board_id, None)
+                return
+            # Keeps its build time: in-place updates don't cover other processes
+            board = held[1]
+            self._boards[board_id] = ((epoch, new), board, held[2])
+
+        key = self.entry_key(board_id, user_id)
+        with self._lock:
+            if key is None:
+                board.remove(user_id)
+            else:
+                board.upsert(user_id, key)
+
+    def standings(self, board_id, user_id=None, limit=LEADERBOARD_PAGE_SIZE):
+        try:
+            limit = max(1, min(int(limit), LEADERBOARD_MAX_PAGE_SIZE))
+        except (TypeError, ValueError):
+            limit = LEADERBOARD_PAGE_SIZE
+
+        board = self.board(board_id)
+        top = board.top(limit)
+        names = dict(
+            User.objects.filter(id__in=[key[-1] for _, key in top]).values_list("id", "full_name")
+        )
+        data = {
+            "total": len(board),
+            "top": [
+                {"rank": rank, "user_id": key[-1], "full_name": names.get(key[-1]), **self.describe(key)}
+                for rank, key in top
+            ],
+            "me": None,
+        }
+        key = board.key(user_id) if user_id is not None else None
+        if key is not None:
+            data["me"] = {"rank": board.rank(user_id), "user_id": user_id, **self.describe(key)}
+        return data
+
+
+class QuizLeaderboard(Leaderboard):
+    """Best score per student; ties go to whoever reached it first"""
+
+    name = "quiz"
+
+    def _rows(self, queryset):
+        return {
+            user_id: (-score, completed_at.timestamp() if completed_at else 0, user_id)
+            for user_id, score, completed_at in queryset.values_list("user_id", "best_score", "best_attempt__completed_at")
+        }
+
+    def load(self, quiz_id):
+        return self._rows(api_models.QuizResultSummary.objects.filter(quiz_id=quiz_id, best_attempt__isnull=False))
+
+    def entry_key(self, quiz_id, user_id):
+        return self._rows(
+            api_models.QuizResultSummary.objects.filter(quiz_id=quiz_id, user_id=user_id, best_attempt__isnull=False)
+        ).get(user_id)
+
+    def describe(self, key):
+        return {"score": -key[0]}
+
+
+class CourseLeaderboard(Leaderboard):
+    """Lessons completed, then quiz points; ties go to whoever got there first"""
+
+    name = "course"
+
+    def _rows(self, queryset):
+        return {
+            user_id: (-lessons, -points, updated_at.timestamp(), user_id)
+            for user_id, lessons, points, updated_at in queryset.values_list(
+                "user_id", "completed_lessons", "quiz_points", "updated_at"
+            )
+        }
+
+    def load(self, course_id):
+        return self._rows(api_models.CourseLeaderboardEntry.objects.filter(course_id=course_id))
+
+    def entry_key(self, course_id, user_id):
+        return self._rows(
+            api_models.CourseLeaderboardEntry.objects.filter(course_id=course_id, user_id=user_id)
+        ).get(user_id)
+
+    def describe(self, key):
+        return {"completed_lessons": -key[0], "quiz_points": -key[1]}
+
+
+quiz_leaderboard = QuizLeaderboard()
+course_leaderboard = CourseLeaderboard()
+
+
+def quiz_result_recorded(attempt):
+    """
+    A graded attempt became the user's best: move them on the quiz board and
+    refresh their course quiz points, the sum of their best scores.
+    """
+    quiz_leaderboard.changed(attempt.quiz_id, attempt.user_id)
+
+    course_id = attempt.quiz.course_id
+    Entries = api_models.CourseLeaderboardEntry
+    Entries.objects.bulk_create([Entries(course_id=course_id, user_id=attempt.user_id)], ignore_conflicts=True)
+    # update() skips auto_now, and updated_at is the tie-break
+    Entries.objects.filter(course_id=course_id, user_id=attempt.user_id).update(quiz_points=Coalesce(Subquery(
+        api_models.QuizResultSummary.objects
+        .filter(quiz__course_id=course_id, user_id=attempt.user_id, best_attempt__isnull=False)
+        .values("user_id")
+        .annotate(total=Sum("best_score"))
+        .values("total")[:1]
+    ), 0), updated_at=timezone.now())
+    course_leaderboard.changed(course_id, attempt.user_id)
+
+
+def lesson_progress_changed(course_id, user_id, delta):
+    """A lesson was marked (delta=1) or unmarked (delta=-1) as completed"""
+    Entries = api_models.CourseLeaderboardEntry
+    Entries.objects.bulk_create([Entries(course_id=course_id, user_id=user_id)], ignore_conflicts=True)
+    entries = Entries.objects.filter(course_id=course_id, user_id=user_id)
+    if delta < 0:
+        entries = entries.filter(completed_lessons__gte=-delta)
+    entries.update(completed_lessons=F("completed_lessons") + delta, updated_at=timezone.now())
+    course_leaderboard.changed(course_id, user_id)
+
+
+def rebuild_course_entries(course_ids=None):
+    """
+    Recompute course standings from completed lessons and quiz summaries,
+    fix the entries that drifted and invalidate every board. Returns the
+    number of entries changed, added or removed.
+    """
+    lessons = api_models.CompletedLesson.objects.filter(user__isnull=False)
+    summaries = api_models.QuizResultSummary.objects.filter(best_attempt__isnull=False)
+    if course_ids is not None:
+        lessons = lessons.filter(course_id__in=course_ids)
+        summaries = summaries.filter(quiz__course_id__in=course_ids)
+
+    standings = {}
+    for course_id, user_id, done in lessons.values("course_id", "user_id").annotate(done=Count("id")).values_list("course_id", "user_id", "done"):
+        standings[(course_id, user_id)] = [done, 0]
+    for course_id, user_id, points in summaries.values_list("quiz__course_id", "user_id", "best_score"):
+        standings.setdefault((course_id, user_id), [0, 0])[1] += points
+
+    Entries = api_models.CourseLeaderboardEntry
+    with transaction.atomic():
+        existing = Entries.objects.select_for_update()
+        if course_ids is not None:
+            existing = existing.filter(course_id__in=course_ids)
+
+        changed = []
+        gone = []
+        for entry in existing:
+            standing = standings.pop((entry.course_id, entry.user_id), None)
+            if standing is None:
+                gone.append(entry.pk)
+            elif [entry.completed_lessons, entry.quiz_points] != standing:
+                entry.completed_lessons, entry.quiz_points = standing
+                changed.append(entry)
+
+        # A rebuild cannot tell when a score was reached, so bulk_update
+        # leaves updated_at (the tie-break) as it was
+        Entries.objects.bulk_update(changed, ["completed_lessons", "quiz_points"], batch_size=1000)
+        Entries.objects.bulk_create(
+            [
+                Entries(course_id=course_id, user_id=user_id, completed_lessons=done, quiz_points=points)
+                for (course_id, user_id), (done, points) in standings.items()
+            ],
+            batch_size=1000,
+        )
+        Entries.objects.filter(pk__in=gone).delete()
+        transaction.on_commit(invalidate_all)
+    return len(changed) + len(standings) + len(gone)
+
+
+def invalidate_all():
+    cache.add(EPOCH_KEY, 0, timeout=None)
+    try:
+        cache.incr(EPOCH_KEY)
+    except ValueError:
+        cache.set(EPOCH_KEY, 1, timeout=None)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api import quiz_sessions
+
+
+class Command(BaseCommand):
+    help = "Grade and close timed quiz sessions whose deadline has passed, then write buffered drafts to the database (run every minute)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Sessions to lock and grade per batch")
+
+    def handle(self, *args, **options):
+        expired = quiz_sessions.expire_overdue(batch_size=options["batch_size"])
+        flushed = quiz_sessions.flush_drafts()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} quiz attempts, saved {flushed} drafts"))
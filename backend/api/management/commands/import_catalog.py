@@ -0,0 +1,58 @@
+import os
+
+import tablib
+from django.core.management.base import BaseCommand, CommandError
+
+from api import resources
+
+FORMATS = ("csv", "json", "xlsx")
+
+
+class Command(BaseCommand):
+    help = "Bulk import catalog rows (categories, courses, curriculum, coupons, countries) from a CSV, JSON or XLSX file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=list(resources.RESOURCES), help="What the file contains")
+        parser.add_argument("path", help="File to import")
+        parser.add_argument("--format", choices=FORMATS, help="File format; defaults to the file extension")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and report what would change without writing")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        if file_format not in FORMATS:
+            raise CommandError(f"Unknown format {file_format!r}, pass --format")
+
+        mode = "rb" if file_format == "xlsx" else "r"
+        try:
+            with open(path, mode, **({} if mode == "rb" else {"encoding": "utf-8-sig"})) as handle:
+                dataset = tablib.Dataset().load(handle.read(), format=file_format)
+        except OSError as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        resource = resources.RESOURCES[options["resource"]]()
+        result = resource.import_data(
+            dataset, dry_run=options["dry_run"], use_transactions=True, rollback_on_validation_errors=True, raise_errors=False,
+        )
+
+        for error in result.base_errors:
+            self.stderr.write(f"error: {error.error}")
+        for line, errors in result.row_errors():
+            for error in errors:
+                self.stderr.write(f"row {line}: {error.error}")
+        for row in result.invalid_rows:
+            self.stderr.write(f"row {row.number}: {row.error_dict}")
+
+        if options["dry_run"] and options["verbosity"] > 1:
+            for row in result.rows:
+                self.stdout.write(f"{row.import_type}\t{row.object_id or ''}\t{row.object_repr or ''}")
+
+        totals = result.totals
+        prefix = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            f"{prefix} {len(dataset)} {options['resource']} rows: "
+            f"{totals['new']} new, {totals['update']} updated, {totals['skip']} unchanged, "
+            f"{totals['delete']} deleted, {totals['error'] + totals['invalid']} with errors"
+        )
+        if result.has_errors() or result.has_validation_errors():
+            raise CommandError("Nothing was written: fix the rows above and run again")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from api import authentication
+
+
+class Command(BaseCommand):
+    help = "Refill the blocklist of inactive users in the cache, e.g. after a cache flush"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Blocked {authentication.rebuild_blocklist()} inactive users")
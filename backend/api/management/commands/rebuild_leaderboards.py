@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import leaderboards
+
+
+class Command(BaseCommand):
+    help = "Recompute course leaderboard entries from lessons and quiz results and invalidate cached boards"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", dest="courses", help="Only rebuild this course (by id); repeatable")
+
+    def handle(self, *args, **options):
+        fixed = leaderboards.rebuild_course_entries(options["courses"])
+        self.stdout.write(self.style.SUCCESS(f"Leaderboards rebuilt, {fixed} course entries corrected"))
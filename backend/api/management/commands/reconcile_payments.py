@@ -0,0 +1,101 @@
+import asyncio
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api import models as api_models
+from api import payments
+
+
+class Command(BaseCommand):
+    help = "Settle orders stuck in Processing against the payment provider and repair paid orders missing enrollments"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=15, help="Only look at orders older than this many minutes")
+        parser.add_argument("--fail-after", type=int, default=24, help="Mark orders without a captured payment as Failed after this many hours")
+        parser.add_argument("--limit", type=int, default=500, help="Maximum number of stuck orders to check per run")
+        parser.add_argument("--concurrency", type=int, default=5, help="Parallel requests to the payment provider")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        self.dry_run = options["dry_run"]
+        fail_before = now - timedelta(hours=options["fail_after"])
+
+        stuck = list(
+            api_models.CartOrder.objects
+            .filter(payment_status="Processing", date__lt=now - timedelta(minutes=options["older_than"]))
+            .order_by("date")
+            .values_list("pk", "oid", "razorpay_order_id", "date")[:options["limit"]]
+        )
+        provider_ids = [provider_id for _, _, provider_id, _ in stuck if provider_id]
+        found = asyncio.run(self.fetch_payments(provider_ids, options["concurrency"])) if provider_ids else {}
+
+        paid = failed = pending = errors = 0
+        for pk, oid, provider_id, date in stuck:
+            result = found.get(provider_id)
+            if isinstance(result, Exception):
+                self.stderr.write(f"{oid}: could not reach the payment provider ({result})")
+                pending += 1
+                continue
+
+            captured = [p for p in (result or []) if p.get("status") == "captured"]
+            try:
+                if captured:
+                    self.stdout.write(f"{oid}: captured payment {captured[0]['id']}, marking Paid")
+                    if not self.dry_run:
+                        payments.confirm_order_payment(pk, captured[0]["id"], provider_order_id=provider_id, source="Reconciliation")
+                    paid += 1
+                elif date < fail_before:
+                    self.stdout.write(f"{oid}: no captured payment, marking Failed")
+                    if not self.dry_run:
+                        payments.mark_order_failed(pk)
+                    failed += 1
+                else:
+                    pending += 1
+            except payments.PaymentStateError as e:
+                # Changed concurrently or conflicting; leave it for a person, keep going
+                self.stderr.write(f"{oid}: {e}")
+                errors += 1
+
+        repaired = self.repair_enrollments()
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {len(stuck)} orders: {paid} paid, {failed} failed, {pending} left pending, {errors} errors; repaired {repaired} paid orders"
+        ))
+
+    async def fetch_payments(self, provider_ids, concurrency):
+        """Provider payments per provider order id, or the exception raised fetching them"""
+        gateway = payments.get_gateway()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(provider_id):
+            async with semaphore:
+                try:
+                    response = await gateway.fetch_order_payments(provider_id)
+                except payments.PaymentProviderError as e:
+                    return provider_id, e
+                return provider_id, response.get("items", [])
+
+        try:
+            return dict(await asyncio.gather(*(fetch(provider_id) for provider_id in provider_ids)))
+        finally:
+            await gateway.aclose()
+
+    def repair_enrollments(self):
+        """Paid orders with at least one item that never got its enrollment"""
+        broken = list(
+            api_models.CartOrder.objects
+            .filter(payment_status="Paid", orderitem__isnull=False, orderitem__enrolledcourse__isnull=True)
+            .values_list("pk", flat=True)
+            .distinct()
+        )
+        if self.dry_run:
+            return len(broken)
+
+        for pk in broken:
+            with transaction.atomic():
+                order = api_models.CartOrder.objects.select_for_update().get(pk=pk)
+                payments.enroll(order, list(api_models.CartOrderItem.objects.filter(order=order)))
+        return len(broken)
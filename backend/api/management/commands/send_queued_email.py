@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import outbox
+
+
+class Command(BaseCommand):
+    help = "Send due mail from the outbox, retrying failed sends with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Mails to claim and send per batch")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when the outbox is drained")
+        parser.add_argument("--interval", type=float, default=10, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = failed = 0
+            while True:
+                batch_sent, batch_failed = outbox.send_pending(limit=options["limit"])
+                sent, failed = sent + batch_sent, failed + batch_failed
+                if batch_sent + batch_failed < options["limit"]:
+                    break
+            if sent or failed or not options["loop"]:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_unread_counters(apps, schema_editor):
+    Notification = apps.get_model('api', 'Notification')
+    NotificationCounter = apps.get_model('api', 'NotificationCounter')
+    unseen = Notification.objects.filter(seen=False)
+
+    counters = [
+        NotificationCounter(user_id=row['user'], unread=row['unread'])
+        for row in unseen.exclude(user=None).values('user').annotate(unread=models.Count('id'))
+    ] + [
+        NotificationCounter(teacher_id=row['teacher'], unread=row['unread'])
+        for row in unseen.exclude(teacher=None).values('teacher').annotate(unread=models.Count('id'))
+    ]
+    NotificationCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0005_alter_category_image_alter_certificate_pdf_file_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['teacher', 'seen', '-id'], name='noti_teacher_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'seen', '-id'], name='noti_user_inbox_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='teacher',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_counter', to='api.teacher'),
+        ),
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_counter', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_notificationcounter_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartorder',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='cartorder',
+            constraint=models.UniqueConstraint(fields=('student', 'idempotency_key'), name='cartorder_student_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_cartorder_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentConfirmation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_id', models.CharField(max_length=100, unique=True)),
+                ('provider_order_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('signature', models.CharField(blank=True, max_length=200, null=True)),
+                ('source', models.CharField(choices=[('Client', 'Client'), ('Reconciliation', 'Reconciliation')], default='Client', max_length=100)),
+                ('date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_confirmations', to='api.cartorder')),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+    ]
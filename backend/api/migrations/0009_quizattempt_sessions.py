@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:12
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_started_at(apps, schema_editor):
+    # Attempts recorded before sessions existed started and finished at once
+    QuizAttempt = apps.get_model('api', 'QuizAttempt')
+    QuizAttempt.objects.update(started_at=F('completed_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_paymentconfirmation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='draft_answers',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='status',
+            field=models.CharField(choices=[('In Progress', 'In Progress'), ('Submitted', 'Submitted'), ('Expired', 'Expired')], default='Submitted', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='quizattempt',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['status', 'deadline'], name='quizattempt_status_deadline'),
+        ),
+        migrations.AddConstraint(
+            model_name='quizattempt',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'In Progress')), fields=('quiz', 'user'), name='quizattempt_one_open_session'),
+        ),
+        migrations.RunPython(backfill_started_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_result_summaries(apps, schema_editor):
+    QuizAttempt = apps.get_model('api', 'QuizAttempt')
+    QuizResultSummary = apps.get_model('api', 'QuizResultSummary')
+
+    summaries = {}
+    attempts = (
+        QuizAttempt.objects
+        .order_by('quiz_id', 'user_id', '-score', 'completed_at')
+        .values_list('id', 'quiz_id', 'user_id', 'score', 'completed_at', 'quiz__min_pass_points')
+    )
+    for pk, quiz_id, user_id, score, completed_at, min_pass_points in attempts.iterator(chunk_size=2000):
+        summary = summaries.get((quiz_id, user_id))
+        if summary is None:
+            summary = summaries[(quiz_id, user_id)] = QuizResultSummary(quiz_id=quiz_id, user_id=user_id)
+        summary.attempts_used += 1
+        # Rows come best first, so the first graded one is the best attempt
+        if completed_at is not None and summary.best_attempt_id is None:
+            summary.best_attempt_id = pk
+            summary.best_score = score
+            summary.passed = score >= min_pass_points
+    QuizResultSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0009_quizattempt_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizResultSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts_used', models.PositiveIntegerField(default=0)),
+                ('best_score', models.PositiveIntegerField(default=0)),
+                ('passed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('best_attempt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.quizattempt')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_summaries', to='api.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_result_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('quiz', 'user')},
+            },
+        ),
+        migrations.RunPython(backfill_result_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_quizresultsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='result_breakdown',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
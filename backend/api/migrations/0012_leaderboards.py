@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_course_entries(apps, schema_editor):
+    CompletedLesson = apps.get_model('api', 'CompletedLesson')
+    QuizResultSummary = apps.get_model('api', 'QuizResultSummary')
+    CourseLeaderboardEntry = apps.get_model('api', 'CourseLeaderboardEntry')
+
+    standings = {}
+    lessons = (
+        CompletedLesson.objects.filter(user__isnull=False)
+        .values('course_id', 'user_id')
+        .annotate(done=models.Count('id'))
+        .values_list('course_id', 'user_id', 'done')
+    )
+    for course_id, user_id, done in lessons:
+        standings[(course_id, user_id)] = [done, 0]
+    summaries = (
+        QuizResultSummary.objects.filter(best_attempt__isnull=False)
+        .values_list('quiz__course_id', 'user_id', 'best_score')
+    )
+    for course_id, user_id, points in summaries.iterator(chunk_size=2000):
+        standings.setdefault((course_id, user_id), [0, 0])[1] += points
+    CourseLeaderboardEntry.objects.bulk_create(
+        [
+            CourseLeaderboardEntry(course_id=course_id, user_id=user_id, completed_lessons=done, quiz_points=points)
+            for (course_id, user_id), (done, points) in standings.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0011_quizattempt_result_breakdown'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_lessons', models.PositiveIntegerField(default=0)),
+                ('quiz_points', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='quizresultsummary',
+            index=models.Index(fields=['quiz', '-best_score'], name='quizsummary_board_idx'),
+        ),
+        migrations.AddField(
+            model_name='courseleaderboardentry',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='api.course'),
+        ),
+        migrations.AddField(
+            model_name='courseleaderboardentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_leaderboard_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='courseleaderboardentry',
+            index=models.Index(fields=['course', '-completed_lessons', '-quiz_points'], name='courseboard_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='courseleaderboardentry',
+            unique_together={('course', 'user')},
+        ),
+        migrations.RunPython(backfill_course_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrolledcourse',
+            name='last_position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enrolledcourse',
+            name='last_variant_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.variantitem'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['course', 'user', '-id'], name='note_course_user_idx'),
+        ),
+    ]
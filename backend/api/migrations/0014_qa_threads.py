@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_player'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question_answer',
+            index=models.Index(fields=['course', '-id'], name='qa_course_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question_answer_message',
+            index=models.Index(fields=['question', 'id'], name='qamessage_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question_answer_message',
+            index=models.Index(fields=['question', '-date'], name='qamessage_activity_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+SEARCH_CONFIG = 'english'
+
+# (model, index name, [(field, weight)]) matching the vectors in api/search.py
+SEARCH_INDEXES = [
+    ('Note', 'note_search_idx', [('title', 'A'), ('note', 'B')]),
+    ('Question_Answer', 'qa_search_idx', [('title', 'A')]),
+    ('Question_Answer_Message', 'qamessage_search_idx', [('message', 'B')]),
+]
+
+
+def _indexes(apps):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    for model_name, name, fields in SEARCH_INDEXES:
+        vectors = [SearchVector(field, weight=weight, config=SEARCH_CONFIG) for field, weight in fields]
+        vector = vectors[0]
+        for other in vectors[1:]:
+            vector = vector + other
+        yield apps.get_model('api', model_name), GinIndex(vector, name=name)
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN expression indexes only exist on PostgreSQL; other databases use the in-memory fallback
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model, index in _indexes(apps):
+        schema_editor.add_index(model, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model, index in _indexes(apps):
+        schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_qa_threads'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
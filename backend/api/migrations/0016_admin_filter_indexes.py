@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartorder',
+            index=models.Index(fields=['payment_status', '-id'], name='cartorder_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['type', '-id'], name='noti_type_idx'),
+        ),
+    ]
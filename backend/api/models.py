@@ -3,6 +3,7 @@ from django.utils.text import slugify
 from django.utils import timezone
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save, post_delete
 
 
 from userauths.models import User, Profile
@@ -36,6 +37,17 @@ PAYMENT_STATUS = (
     ("Failed", "Failed"),
 )
 
+QUIZ_ATTEMPT_STATUS = (
+    ("In Progress", "In Progress"),
+    ("Submitted", "Submitted"),
+    ("Expired", "Expired"),
+)
+
+PAYMENT_CONFIRMATION_SOURCE = (
+    ("Client", "Client"),
+    ("Reconciliation", "Reconciliation"),
+)
+
 
 PLATFORM_STATUS = (
     ("Review", "Review"),
@@ -529,16 +541,21 @@ class Question_Answer(models.Model):
     date = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return f"{self.user.username} - {self.course.title}"
+        return self.title or self.qa_id
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=["course", "-id"], name="qa_course_id_idx"),
+        ]
 
     def messages(self):
-        return Question_Answer_Message.objects.filter(question=self)
+        # Served from prefetch_related("question_answer_message_set") when the caller did one
+        return self.question_answer_message_set.all()
     
     def profile(self):
-        return Profile.objects.get(user=self.user)
+        # One query per call unless loaded with select_related("user__profile")
+        return self.user.profile if self.user_id else None
     
 class Question_Answer_Message(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -550,13 +567,18 @@ class Question_Answer_Message(models.Model):
     date = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return f"{self.user.username} - {self.course.title}"
+        return self.qam_id
     
     class Meta:
         ordering = ['date']
+        indexes = [
+            # Keyset paging, counting and last activity of one thread
+            models.Index(fields=["question", "id"], name="qamessage_thread_idx"),
+            models.Index(fields=["question", "-date"], name="qamessage_activity_idx"),
+        ]
 
     def profile(self):
-        return Profile.objects.get(user=self.user)
+        return self.user.profile if self.user_id else None
     
 class Cart(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -590,10 +612,19 @@ class CartOrder(models.Model):
     razorpay_order_id = models.CharField(max_length=100, null=True, blank=True)
     razorpay_payment_id = models.CharField(max_length=100, null=True, blank=True)
     razorpay_signature = models.CharField(max_length=200, null=True, blank=True)
+    # Client supplied key so a retried checkout returns the original order
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
 
 
     class Meta:
         ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=["student", "idempotency_key"], name="cartorder_student_idempotency_key"),
+        ]
+        indexes = [
+            # Admin changelist filtered by status, newest first
+            models.Index(fields=["payment_status", "-id"], name="cartorder_status_idx"),
+        ]
     
     def order_items(self):
         return CartOrderItem.objects.filter(order=self)
@@ -630,6 +661,22 @@ class CartOrderItem(models.Model):
 
         
 
+class PaymentConfirmation(models.Model):
+    """One row per provider payment id, so a payment can only ever confirm one order once"""
+    order = models.ForeignKey(CartOrder, on_delete=models.CASCADE, related_name="payment_confirmations")
+    payment_id = models.CharField(max_length=100, unique=True)
+    provider_order_id = models.CharField(max_length=100, null=True, blank=True)
+    signature = models.CharField(max_length=200, null=True, blank=True)
+    source = models.CharField(choices=PAYMENT_CONFIRMATION_SOURCE, default="Client", max_length=100)
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return self.payment_id
+
+
 class CompletedLesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
@@ -646,6 +693,9 @@ class EnrolledCourse(models.Model):
     order_item = models.ForeignKey(CartOrderItem, on_delete=models.CASCADE)
     enrollment_id = ShortUUIDField(unique=True, length=6, max_length=20, alphabet="1234567890")
     date = models.DateTimeField(default=timezone.now)
+    # Where the student left the player: lesson and seconds into it
+    last_variant_item = models.ForeignKey(VariantItem, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_position = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.course.title
@@ -676,6 +726,12 @@ class Note(models.Model):
     note_id = ShortUUIDField(unique=True, length=6, max_length=20, alphabet="1234567890")
     date = models.DateTimeField(default=timezone.now)   
 
+    class Meta:
+        indexes = [
+            # The player pages a student's notes for one course, newest first
+            models.Index(fields=["course", "user", "-id"], name="note_course_user_idx"),
+        ]
+
     def __str__(self):
         return self.title
     
@@ -702,11 +758,47 @@ class Notification(models.Model):
     review = models.ForeignKey(Review, on_delete=models.SET_NULL, null=True, blank=True)
     type = models.CharField(max_length=100, choices=NOTI_TYPE)
     seen = models.BooleanField(default=False)
-    date = models.DateTimeField(default=timezone.now)  
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["teacher", "seen", "-id"], name="noti_teacher_inbox_idx"),
+            models.Index(fields=["user", "seen", "-id"], name="noti_user_inbox_idx"),
+            models.Index(fields=["type", "-id"], name="noti_type_idx"),
+        ]
 
     def __str__(self):
         return self.type
 
+class NotificationCounter(models.Model):
+    # One row per recipient; kept in step by api.notifications so unread counts never need a COUNT(*)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True, related_name="notification_counter")
+    teacher = models.OneToOneField(Teacher, on_delete=models.CASCADE, null=True, blank=True, related_name="notification_counter")
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.teacher or self.user} - {self.unread} unread"
+
+class OutboundEmail(models.Model):
+    # Mail waiting to be sent by api.outbox, so requests never block on the mail provider
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["send_after"], condition=models.Q(sent_at__isnull=True), name="outbox_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to}"
+
 class Coupon(models.Model):
     teacher = models.ForeignKey(Teacher, on_delete=models.SET_NULL, null=True, blank=True)
     used_by = models.ManyToManyField(User, blank=True)
@@ -835,16 +927,73 @@ class QuizAttempt(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="quiz_attempts")
     attempt_number = models.PositiveIntegerField(default=1)
     score = models.PositiveIntegerField(default=0)
-    completed_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(choices=QUIZ_ATTEMPT_STATUS, default="Submitted", max_length=20)
+    started_at = models.DateTimeField(default=timezone.now)
+    # None when the quiz has no time limit
+    deadline = models.DateTimeField(null=True, blank=True)
+    # Last autosaved answers of an open session: {quiz_question_id: quiz_question_option_id}
+    draft_answers = models.JSONField(default=dict, blank=True)
+    # Set when the attempt is graded, on submit or expiry
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Per-answer result stored at grading; attempts never change afterwards
+    result_breakdown = models.JSONField(null=True, blank=True)
     attempt_id = ShortUUIDField(unique=True, length=6, max_length=20, alphabet="1234567890")
 
     class Meta:
         unique_together = ("quiz", "user", "attempt_number")
         ordering = ["-completed_at"]
+        indexes = [
+            # Lets the expiry sweeper find overdue open sessions without a scan
+            models.Index(fields=["status", "deadline"], name="quizattempt_status_deadline"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["quiz", "user"],
+                condition=models.Q(status="In Progress"),
+                name="quizattempt_one_open_session",
+            ),
+        ]
 
     def __str__(self):
         return f"Attempt {self.attempt_number} by {self.user} on {self.quiz.quiz_id}"
 
+class QuizResultSummary(models.Model):
+    """Running totals of one user's attempts at one quiz, kept current as attempts are recorded"""
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="result_summaries")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="quiz_result_summaries")
+    attempts_used = models.PositiveIntegerField(default=0)
+    best_score = models.PositiveIntegerField(default=0)
+    best_attempt = models.ForeignKey(QuizAttempt, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    passed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("quiz", "user")
+        indexes = [
+            # Quiz leaderboard order
+            models.Index(fields=["quiz", "-best_score"], name="quizsummary_board_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} on {self.quiz.quiz_id}: best {self.best_score}"
+
+class CourseLeaderboardEntry(models.Model):
+    """A student's standing in a course: lessons completed, then best quiz score"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="leaderboard_entries")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="course_leaderboard_entries")
+    completed_lessons = models.PositiveIntegerField(default=0)
+    quiz_points = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("course", "user")
+        indexes = [
+            models.Index(fields=["course", "-completed_lessons", "-quiz_points"], name="courseboard_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.course.title}"
+
 class QuizAnswer(models.Model):
     attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name="answers")
     question = models.ForeignKey(QuizQuestion, on_delete=models.CASCADE)
@@ -853,4 +1002,36 @@ class QuizAnswer(models.Model):
     quiz_answer_id = ShortUUIDField(unique=True, length=6, max_length=20, alphabet="1234567890")
 
     def __str__(self):
-        return f"Answer to {self.question.quiz_question_id} in Attempt {self.attempt.attempt_id}"
\ No newline at end of file
+        return f"Answer to {self.question.quiz_question_id} in Attempt {self.attempt.attempt_id}"
+
+
+def bump_quiz_version(quiz_id):
+    # Quiz.updated_at doubles as the version of cached quiz payloads
+    Quiz.objects.filter(pk=quiz_id).update(updated_at=timezone.now())
+
+def quiz_question_changed(sender, instance, **kwargs):
+    bump_quiz_version(instance.quiz_id)
+
+def quiz_question_option_changed(sender, instance, **kwargs):
+    bump_quiz_version(QuizQuestion.objects.filter(pk=instance.question_id).values("quiz_id")[:1])
+
+post_save.connect(quiz_question_changed, sender=QuizQuestion)
+post_delete.connect(quiz_question_changed, sender=QuizQuestion)
+post_save.connect(quiz_question_option_changed, sender=QuizQuestionOption)
+post_delete.connect(quiz_question_option_changed, sender=QuizQuestionOption)
+
+
+def bump_course_version(course_id):
+    # Course.updated_at doubles as the version of the cached curriculum snapshot
+    Course.objects.filter(pk=course_id).update(updated_at=timezone.now())
+
+def variant_changed(sender, instance, **kwargs):
+    bump_course_version(instance.course_id)
+
+def variant_item_changed(sender, instance, **kwargs):
+    bump_course_version(Variant.objects.filter(pk=instance.variant_id).values("course_id")[:1])
+
+post_save.connect(variant_changed, sender=Variant)
+post_delete.connect(variant_changed, sender=Variant)
+post_save.connect(variant_item_changed, sender=VariantItem)
+post_delete.connect(variant_item_changed, sender=VariantItem)
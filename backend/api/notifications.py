@@ -0,0 +1,140 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from api import models as api_models
+from api import realtime
+
+# Upper bound on rows returned by a single inbox request
+INBOX_PAGE_SIZE = 20
+INBOX_MAX_PAGE_SIZE = 50
+
+
+def notify(notifications):
+    """
+    Insert a batch of (unsaved) Notification instances with a single query
+    and bump the unread counter of every recipient in the batch.
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return []
+
+    with transaction.atomic():
+        created = api_models.Notification.objects.bulk_create(notifications)
+        unseen = [n for n in created if not n.seen]
+        _adjust_counters(
+            Counter(n.user_id for n in unseen if n.user_id),
+            Counter(n.teacher_id for n in unseen if n.teacher_id),
+        )
+        realtime.publish_notifications(created)
+    return created
+
+
+def mark_seen(queryset):
+    """
+    Mark every unseen notification in queryset as seen and settle the counters
+    of all recipients touched, including the other side of rows that carry
+    both a user and a teacher. Returns the number of rows updated.
+    """
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(seen=False)
+            .select_for_update()
+            .values_list("id", "user_id", "teacher_id")
+        )
+        if not rows:
+            return 0
+
+        api_models.Notification.objects.filter(id__in=[row[0] for row in rows]).update(seen=True)
+        _adjust_counters(
+            Counter(user_id for _, user_id, _ in rows if user_id),
+            Counter(teacher_id for _, _, teacher_id in rows if teacher_id),
+            sign=-1,
+        )
+    return len(rows)
+
+
+def mark_seen_up_to(up_to_id, user_id=None, teacher_id=None):
+    """Bulk "mark all read" for one recipient, bounded by the newest id the client has seen"""
+    queryset = api_models.Notification.objects.filter(id__lte=up_to_id, **_recipient(user_id, teacher_id))
+    return mark_seen(queryset)
+
+
+def notification_seen_changed(notification):
+    """Settle counters after a single notification had its seen flag flipped in place"""
+    delta = -1 if notification.seen else 1
+    _adjust_counters(
+        Counter({notification.user_id: delta}) if notification.user_id else Counter(),
+        Counter({notification.teacher_id: delta}) if notification.teacher_id else Counter(),
+    )
+
+
+def unread_count(user_id=None, teacher_id=None):
+    """Unread notifications for a recipient, read from the counter row instead of counting"""
+    return (
+        api_models.NotificationCounter.objects
+        .filter(**_recipient(user_id, teacher_id))
+        .values_list("unread", flat=True)
+        .first()
+    ) or 0
+
+
+def inbox(user_id=None, teacher_id=None, before=None, limit=INBOX_PAGE_SIZE, unseen_only=True):
+    """
+    Newest-first page of a recipient's notifications. Paging is keyset based:
+    pass the smallest id of the previous page as `before` to get the next one.
+    """
+    try:
+        limit = max(1, min(int(limit), INBOX_MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = INBOX_PAGE_SIZE
+
+    queryset = api_models.Notification.objects.filter(**_recipient(user_id, teacher_id))
+    if unseen_only:
+        queryset = queryset.filter(seen=False)
+    if before:
+        queryset = queryset.filter(id__lt=before)
+    return queryset.order_by("-id")[:limit]
+
+
+def recount_unread(user_id=None, teacher_id=None):
+    """Rebuild one recipient's counter from the notification table, e.g. after manual edits"""
+    unread = api_models.Notification.objects.filter(seen=False, **_recipient(user_id, teacher_id)).count()
+    api_models.NotificationCounter.objects.update_or_create(
+        defaults={"unread": unread}, **_recipient(user_id, teacher_id)
+    )
+    return unread
+
+
+def _recipient(user_id, teacher_id):
+    if teacher_id is not None:
+        return {"teacher_id": teacher_id}
+    if user_id is not None:
+        return {"user_id": user_id}
+    raise ValueError("A notification recipient needs a user_id or a teacher_id")
+
+
+def _adjust_counters(users, teachers, sign=1):
+    """Apply per-recipient deltas with one UPDATE per distinct delta value"""
+    Counters = api_models.NotificationCounter
+
+    for field, deltas in (("user_id", users), ("teacher_id", teachers)):
+        deltas = {pk: n for pk, n in deltas.items() if n}
+        if not deltas:
+            continue
+
+        Counters.objects.bulk_create(
+            [Counters(**{field: pk}) for pk in deltas],
+            ignore_conflicts=True,
+        )
+
+        by_delta = {}
+        for pk, n in deltas.items():
+            by_delta.setdefault(n * sign, []).append(pk)
+
+        for delta, pks in by_delta.items():
+            Counters.objects.filter(**{f"{field}__in": pks}).update(
+                unread=Greatest(F("unread") + delta, Value(0))
+            )
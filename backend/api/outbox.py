@@ -0,0 +1,120 @@
+import logging
+import queue as queue_module
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import close_old_connections, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from api import models as api_models
+
+logger = logging.getLogger(__name__)
+
+# Given up after this many failed sends; the row stays for inspection
+MAX_ATTEMPTS = 5
+
+# A claimed row is hidden from other senders this long, so a sender that
+# dies mid-send does not lose the mail
+CLAIM_LEASE = timedelta(minutes=5)
+
+RETRY_BASE_DELAY = timedelta(minutes=1)
+
+
+def queue(to, subject, template, context):
+    """
+    Render template (.txt and .html under templates/) and store the mail in
+    OutboundEmail. It is handed to the in-process sender once the
+    surrounding transaction commits; send_queued_email picks up the rest.
+    """
+    email = api_models.OutboundEmail.objects.create(
+        to=to,
+        subject=subject,
+        text_body=render_to_string(f"{template}.txt", context),
+        html_body=render_to_string(f"{template}.html", context),
+    )
+    if getattr(settings, "EMAIL_OUTBOX_WORKER", True):
+        transaction.on_commit(lambda: _worker.submit(email.pk))
+    return email
+
+
+def _claim(limit, ids):
+    now = timezone.now()
+    with transaction.atomic():
+        due = (
+            api_models.OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True, send_after__lte=now, attempts__lt=MAX_ATTEMPTS)
+            .order_by("send_after")
+        )
+        if ids is not None:
+            due = due.filter(pk__in=ids)
+        claimed = list(due[:limit])
+        for email in claimed:
+            email.attempts += 1
+            email.send_after = now + CLAIM_LEASE
+        api_models.OutboundEmail.objects.bulk_update(claimed, ["attempts", "send_after"])
+    return claimed
+
+
+def send_pending(limit=100, ids=None):
+    """Send up to limit due mails, or only those in ids. Returns (sent, failed)."""
+    sent = failed = 0
+    for email in _claim(limit, ids):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.text_body,
+            from_email=settings.FROM_EMAIL,
+            to=[email.to],
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, "text/html")
+        try:
+            message.send()
+        except Exception as exc:
+            logger.warning("Sending outbound email %s failed (attempt %s): %s", email.pk, email.attempts, exc)
+            api_models.OutboundEmail.objects.filter(pk=email.pk).update(
+                send_after=timezone.now() + RETRY_BASE_DELAY * 2 ** (email.attempts - 1),
+                last_error=str(exc)[:1000],
+            )
+            failed += 1
+        else:
+            api_models.OutboundEmail.objects.filter(pk=email.pk).update(sent_at=timezone.now(), last_error="")
+            sent += 1
+    return sent, failed
+
+
+class _Worker:
+    """
+    Daemon thread that sends freshly queued mail right after its request
+    commits. Mail it misses (process restart, failed send) is left pending
+    for the send_queued_email command.
+    """
+
+    def __init__(self):
+        self._queue = queue_module.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, email_id):
+        self._queue.put(email_id)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            email_id = self._queue.get()
+            close_old_connections()
+            try:
+                send_pending(ids=[email_id])
+            except Exception:
+                logger.exception("Email outbox worker failed on %s", email_id)
+            finally:
+                close_old_connections()
+
+
+_worker = _Worker()
@@ -0,0 +1,296 @@
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
+import weakref
+from decimal import Decimal
+
+import httpx
+from django.conf import settings
+from django.db import transaction
+
+from api import models as api_models
+from api import notifications
+from api import realtime
+
+
+class PaymentProviderError(Exception):
+    """The payment provider failed, timed out or answered with an error"""
+
+
+class CircuitOpenError(PaymentProviderError):
+    """Calls are short-circuited because the provider has been failing"""
+
+
+class PaymentStateError(Exception):
+    """The requested payment transition is not allowed for the order"""
+
+
+# Payment status state machine: Paid is terminal, a late capture can still settle a Failed order
+ALLOWED_TRANSITIONS = {
+    "Processing": {"Paid", "Failed"},
+    "Failed": {"Paid"},
+    "Paid": set(),
+}
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker. After `failure_threshold`
+    consecutive failures every call fails fast for `reset_timeout` seconds,
+    then a single trial call decides whether to close the circuit again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_in_flight):
+                raise CircuitOpenError("Payment provider is unavailable, please retry shortly")
+            if state == self.HALF_OPEN:
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class RazorpayGateway:
+    """
+    Async Razorpay REST client. Connections are pooled per event loop (an
+    httpx.AsyncClient cannot be shared between loops), every call has a hard
+    timeout, and a circuit breaker stops a slow provider from tying up requests.
+    """
+
+    base_url = "https://api.razorpay.com/v1"
+
+    def __init__(self, key_id, key_secret, base_url=None, transport=None, timeout=None, limits=None, breaker=None):
+        self.key_id = key_id
+        self.key_secret = key_secret
+        self.base_url = base_url or self.base_url
+        self.transport = transport
+        self.timeout = timeout or httpx.Timeout(10.0, connect=3.0)
+        self.limits = limits or httpx.Limits(max_connections=50, max_keepalive_connections=10)
+        self.breaker = breaker or CircuitBreaker()
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=(self.key_id, self.key_secret),
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self.transport,
+            )
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the running loop's client, for short-lived loops such as management commands"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def _request(self, method, path, **kwargs):
+        self.breaker.before_call()
+        try:
+            response = await self._client().request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.breaker.record_failure()
+            raise PaymentProviderError(f"Payment provider request failed: {e}") from e
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            raise PaymentProviderError(f"Payment provider error {response.status_code}")
+
+        # A 4xx is our request's fault, not a sign the provider is down
+        self.breaker.record_success()
+        if response.status_code >= 400:
+            try:
+                description = response.json().get("error", {}).get("description")
+            except ValueError:
+                description = None
+            raise PaymentProviderError(description or f"Payment provider rejected the request ({response.status_code})")
+        return response.json()
+
+    async def create_order(self, amount, currency, receipt, notes=None):
+        """Create a provider order for `amount` in major units (e.g. rupees)"""
+        payload = {
+            "amount": to_minor_units(amount),
+            "currency": currency,
+            "receipt": receipt,
+            "payment_capture": 1,
+        }
+        if notes:
+            payload["notes"] = notes
+        return await self._request("POST", "/orders", json=payload)
+
+    async def fetch_order_payments(self, provider_order_id):
+        return await self._request("GET", f"/orders/{provider_order_id}/payments")
+
+    def verify_payment_signature(self, provider_order_id, payment_id, signature):
+        """Checkout signatures are an HMAC of the ids; no network round trip involved"""
+        if not (provider_order_id and payment_id and signature):
+            return False
+        expected = hmac.new(
+            self.key_secret.encode(),
+            f"{provider_order_id}|{payment_id}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return hmac.compare_digest(expected, str(signature))
+
+
+def to_minor_units(amount):
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1")))
+
+
+_gateway = None
+
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        _gateway = RazorpayGateway(
+            settings.RAZORPAY_KEY_ID,
+            settings.RAZORPAY_KEY_SECRET,
+            base_url=getattr(settings, "RAZORPAY_API_BASE_URL", None),
+        )
+    return _gateway
+
+
+def transition(order, new_status):
+    if new_status not in ALLOWED_TRANSITIONS.get(order.payment_status, ()):
+        raise PaymentStateError(f"Order {order.oid} cannot move from {order.payment_status} to {new_status}")
+    order.payment_status = new_status
+
+
+def confirm_order_payment(order_pk, payment_id, signature=None, provider_order_id=None, source="Client"):
+    """
+    Settle a verified payment against an order. The order row is locked for
+    the whole confirmation and the provider payment id is recorded, so client
+    retries, callbacks and reconciliation racing each other enroll exactly
+    once. Returns False when the payment had already been applied.
+    """
+    with transaction.atomic():
+        order = api_models.CartOrder.objects.select_for_update().get(pk=order_pk)
+
+        confirmation = api_models.PaymentConfirmation.objects.filter(payment_id=payment_id).first()
+        if confirmation:
+            if confirmation.order_id != order.pk:
+                raise PaymentStateError("Payment already applied to another order")
+            return False
+        if order.payment_status == "Paid":
+            return False
+
+        transition(order, "Paid")
+        order.razorpay_payment_id = payment_id
+        order.razorpay_signature = signature
+        order.save(update_fields=["payment_status", "razorpay_payment_id", "razorpay_signature"])
+
+        api_models.PaymentConfirmation.objects.create(
+            order=order,
+            payment_id=payment_id,
+            provider_order_id=provider_order_id or order.razorpay_order_id,
+            signature=signature,
+            source=source,
+        )
+
+        order_items = list(api_models.CartOrderItem.objects.filter(order=order))
+        clear_cart(order, order_items)
+        enroll(order, order_items)
+
+    if order.student_id:
+        realtime.publish(realtime.user_channel(order.student_id), {
+            "type": "payment_confirmed",
+            "order_oid": order.oid,
+            "payment_status": order.payment_status,
+        })
+    return True
+
+
+def mark_order_failed(order_pk):
+    """Processing -> Failed, for orders whose payment never arrived. Returns False if it settled meanwhile."""
+    with transaction.atomic():
+        order = api_models.CartOrder.objects.select_for_update().get(pk=order_pk)
+        if order.payment_status != "Processing":
+            return False
+        transition(order, "Failed")
+        order.save(update_fields=["payment_status"])
+    return True
+
+
+def clear_cart(order, order_items):
+    """Drop the cart(s) the order was placed from"""
+    if not order_items:
+        return
+    cart_ids = api_models.Cart.objects.filter(
+        user=order.student, course_id__in=[item.course_id for item in order_items]
+    ).values("cart_id")
+    api_models.Cart.objects.filter(cart_id__in=cart_ids).delete()
+
+
+def enroll(order, order_items):
+    """
+    Bulk-create the enrollments an order is missing and notify everyone
+    involved. Items that already have an enrollment are skipped, so it is
+    also used to repair paid orders left half enrolled.
+    """
+    enrolled = set(
+        api_models.EnrolledCourse.objects.filter(order_item__order=order).values_list("order_item_id", flat=True)
+    )
+    pending = [item for item in order_items if item.pk not in enrolled]
+    if not pending:
+        return 0
+
+    api_models.EnrolledCourse.objects.bulk_create([
+        api_models.EnrolledCourse(
+            course_id=item.course_id,
+            user_id=order.student_id,
+            teacher_id=item.teacher_id,
+            order_item=item,
+        )
+        for item in pending
+    ])
+
+    order_notifications = [
+        api_models.Notification(user_id=order.student_id, order=order, type="Course Enrollment Completed")
+    ]
+    order_notifications += [
+        api_models.Notification(teacher_id=item.teacher_id, order=order, order_item=item, type="New Order")
+        for item in pending
+    ]
+    notifications.notify(order_notifications)
+    return len(pending)
@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.duration import duration_string
+
+from api import models as api_models
+
+CURRICULUM_TIMEOUT = 60 * 60 * 24
+
+# Upper bound on notes returned by a single page
+NOTES_PAGE_SIZE = 20
+NOTES_MAX_PAGE_SIZE = 50
+
+
+def enrollment(enrollment_id, user):
+    """The user's enrollment with its course and notes count, or None"""
+    notes_count = (
+        api_models.Note.objects
+        .filter(course=OuterRef("course"), user=OuterRef("user"))
+        .values("course")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return (
+        api_models.EnrolledCourse.objects
+        .select_related("course__teacher")
+        .annotate(notes_count=Coalesce(Subquery(notes_count, output_field=IntegerField()), 0))
+        .filter(enrollment_id=enrollment_id, user=user)
+        .first()
+    )
+
+
+def curriculum(course):
+    """
+    The course as the player shows it: sections and lessons in order, without
+    anything per student. Cached per course version (Course.updated_at,
+    bumped whenever a section or lesson changes), so every student of the
+    course shares one copy.
+    """
+    key = f"course-curriculum:{course.pk}:{course.updated_at.timestamp()}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = _build_curriculum(course)
+        cache.set(key, payload, CURRICULUM_TIMEOUT)
+    return payload
+
+
+def _build_curriculum(course):
+    items = {}
+    for item in (
+        api_models.VariantItem.objects
+        .filter(variant__course=course)
+        .order_by("id")
+        .only("id", "variant_id", "variant_item_id", "title", "description", "file", "duration", "content_duration", "preview")
+    ):
+        items.setdefault(item.variant_id, []).append({
+            "id": item.id,
+            "variant_item_id": item.variant_item_id,
+            "title": item.title,
+            "description": item.description,
+            "file": item.get_file_url_safe(),
+            "duration": duration_string(item.duration) if item.duration else None,
+            "content_duration": item.content_duration,
+            "preview": item.preview,
+        })
+
+    sections = [
+        {"variant_id": variant["variant_id"], "title": variant["title"], "items": items.get(variant["id"], [])}
+        for variant in api_models.Variant.objects.filter(course=course).order_by("id").values("id", "variant_id", "title")
+    ]
+    return {
+        "course_id": course.course_id,
+        "slug": course.slug,
+        "title": course.title,
+        "image": course.get_image_url_safe(),
+        "teacher": course.teacher.full_name if course.teacher else None,
+        "lectures": sum(len(section["items"]) for section in sections),
+        "curriculum": sections,
+    }
+
+
+def lesson_ids(payload):
+    """{variant_item_id: VariantItem pk} of a curriculum snapshot"""
+    return {item["variant_item_id"]: item["id"] for section in payload["curriculum"] for item in section["items"]}
+
+
+def progress(enrolled, payload):
+    """The per-student overlay on the shared curriculum snapshot"""
+    completed = (
+        api_models.CompletedLesson.objects
+        .filter(course_id=enrolled.course_id, user_id=enrolled.user_id)
+        .values_list("variant_item__variant_item_id", flat=True)
+    )
+    last_lesson = next(
+        (public_id for public_id, pk in lesson_ids(payload).items() if pk == enrolled.last_variant_item_id),
+        None,
+    )
+    return {
+        "completed": list(completed),
+        "last_lesson": last_lesson,
+        "last_position": enrolled.last_position if last_lesson else 0,
+        "notes_count": enrolled.notes_count,
+    }
+
+
+def record_position(enrolled, variant_item_id, position):
+    """Remember where the student left the player. Returns False for a lesson outside the course."""
+    lesson_pk = lesson_ids(curriculum(enrolled.course)).get(variant_item_id)
+    if lesson_pk is None:
+        return False
+    api_models.EnrolledCourse.objects.filter(pk=enrolled.pk).update(
+        last_variant_item_id=lesson_pk, last_position=max(0, int(position)),
+    )
+    return True
+
+
+def notes_page(enrolled, before=None, limit=NOTES_PAGE_SIZE):
+    """
+    Newest-first page of the student's notes on the course. Paging is keyset
+    based: pass the smallest id of the previous page as `before`.
+    """
+    try:
+        limit = max(1, min(int(limit), NOTES_MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = NOTES_PAGE_SIZE
+
+    queryset = api_models.Note.objects.filter(course_id=enrolled.course_id, user_id=enrolled.user_id)
+    if before:
+        queryset = queryset.filter(id__lt=before)
+    return queryset.order_by("-id")[:limit]
@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from rest_framework_simplejwt.settings import api_settings
+
+from api import models as api_models
+
+# How long the user -> teacher id mapping is trusted without a query
+PRINCIPAL_TIMEOUT = 60 * 5
+
+STUDENT = "student"
+TEACHER = "teacher"
+
+
+class Principal:
+    """Who is calling: enough to filter by *_id without loading User or Teacher rows"""
+
+    __slots__ = ("user_id", "teacher_id", "role")
+
+    def __init__(self, user_id, teacher_id, role):
+        self.user_id = user_id
+        self.teacher_id = teacher_id
+        self.role = role
+
+    def __repr__(self):
+        return f"<Principal user={self.user_id} teacher={self.teacher_id}>"
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def is_teacher(self):
+        return self.teacher_id is not None
+
+
+ANONYMOUS = Principal(None, None, None)
+
+
+def _teacher_key(user_id):
+    return f"principal:teacher:{user_id}"
+
+
+def teacher_id_for(user_id):
+    """The Teacher id of a user, or None for students, cached for PRINCIPAL_TIMEOUT"""
+    key = _teacher_key(user_id)
+    teacher_id = cache.get(key)
+    if teacher_id is None:
+        # 0 caches "not a teacher", which None cannot
+        teacher_id = api_models.Teacher.objects.filter(user_id=user_id).values_list("id", flat=True).first() or 0
+        cache.set(key, teacher_id, PRINCIPAL_TIMEOUT)
+    return teacher_id or None
+
+
+def claims(user):
+    """Claims added to every token pair, read back by for_request()"""
+    teacher_id = teacher_id_for(user.pk)
+    return {"teacher_id": teacher_id or 0, "role": TEACHER if teacher_id else STUDENT}
+
+
+def from_claims(payload):
+    user_id = payload.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return ANONYMOUS
+    # A teacher id in the token is trusted; 0 may predate the teacher
+    # profile (refreshed tokens keep the claims of the login), so check
+    teacher_id = payload.get("teacher_id") or teacher_id_for(user_id)
+    return Principal(user_id, teacher_id, TEACHER if teacher_id else STUDENT)
+
+
+def for_request(request):
+    """
+    The caller of a DRF request, resolved once and kept on the request.
+    JWT requests are answered from the validated token claims; session and
+    test-client logins fall back to the cached teacher lookup.
+    """
+    principal = getattr(request, "_principal", None)
+    if principal is not None:
+        return principal
+
+    payload = getattr(request.auth, "payload", None)
+    if payload is not None:
+        principal = from_claims(payload)
+    elif request.user and request.user.is_authenticated:
+        principal = from_claims({api_settings.USER_ID_CLAIM: request.user.pk})
+    else:
+        principal = ANONYMOUS
+    request._principal = principal
+    return principal
+
+
+def teacher_changed(sender, instance, **kwargs):
+    cache.delete(_teacher_key(instance.user_id))
+
+
+post_save.connect(teacher_changed, sender=api_models.Teacher)
+post_delete.connect(teacher_changed, sender=api_models.Teacher)
@@ -0,0 +1,75 @@
+from django.db.models import Count, IntegerField, Max, OuterRef, Prefetch, Subquery
+
+from api import models as api_models
+from userauths.models import Profile
+
+# Upper bounds on rows returned by a single page
+THREADS_PAGE_SIZE = 20
+THREADS_MAX_PAGE_SIZE = 50
+MESSAGES_PAGE_SIZE = 50
+MESSAGES_MAX_PAGE_SIZE = 100
+
+
+def _limit(limit, default, maximum):
+    try:
+        return max(1, min(int(limit), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+def threads(course_id=None, teacher_id=None, before=None, limit=THREADS_PAGE_SIZE):
+    """
+    Newest-first page of Q&A threads with their message count and last
+    activity, in one query. The counts are per-row subqueries, so only the
+    threads on the page are aggregated. Paging is keyset based: pass the
+    smallest id of the previous page as `before`.
+    """
+    messages = api_models.Question_Answer_Message.objects.filter(question=OuterRef("pk")).order_by().values("question")
+    queryset = api_models.Question_Answer.objects.annotate(
+        message_count=Subquery(messages.annotate(count=Count("id")).values("count"), output_field=IntegerField()),
+        last_activity=Subquery(messages.annotate(last=Max("date")).values("last")),
+    )
+    if course_id is not None:
+        queryset = queryset.filter(course_id=course_id)
+    if teacher_id is not None:
+        queryset = queryset.filter(course__teacher_id=teacher_id)
+    if before:
+        queryset = queryset.filter(id__lt=before)
+
+    page = list(queryset.order_by("-id")[:_limit(limit, THREADS_PAGE_SIZE, THREADS_MAX_PAGE_SIZE)])
+    for thread in page:
+        thread.message_count = thread.message_count or 0
+    attach_profiles(page)
+    return page
+
+
+def messages(thread_id, after=None, limit=MESSAGES_PAGE_SIZE):
+    """Oldest-first page of one thread's messages; pass the largest id seen as `after` for the next page"""
+    queryset = api_models.Question_Answer_Message.objects.filter(question_id=thread_id)
+    if after:
+        queryset = queryset.filter(id__gt=after)
+    page = list(queryset.order_by("id")[:_limit(limit, MESSAGES_PAGE_SIZE, MESSAGES_MAX_PAGE_SIZE)])
+    attach_profiles(page)
+    return page
+
+
+def attach_profiles(objects):
+    """Load the authors' profiles of a page with one query, as `author_profile`"""
+    user_ids = {obj.user_id for obj in objects if obj.user_id}
+    profiles = {profile.user_id: profile for profile in Profile.objects.filter(user_id__in=user_ids)} if user_ids else {}
+    for obj in objects:
+        obj.author_profile = profiles.get(obj.user_id)
+    return objects
+
+
+def with_messages(queryset):
+    """
+    Full threads for the nested Question_AnswerSerializer: authors and
+    messages are loaded in two extra queries instead of two per thread.
+    """
+    return queryset.select_related("user__profile").prefetch_related(
+        Prefetch(
+            "question_answer_message_set",
+            queryset=api_models.Question_Answer_Message.objects.select_related("user__profile"),
+        )
+    )
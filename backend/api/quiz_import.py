@@ -0,0 +1,193 @@
+import csv
+import io
+
+from django.db import transaction
+from django.db.models import Max
+from shortuuid import ShortUUID
+
+from api import models as api_models
+
+# Upper bound on questions accepted by one import
+MAX_IMPORT_QUESTIONS = 1000
+
+OPTION_TEXT_MAX_LENGTH = api_models.QuizQuestionOption._meta.get_field("option_text").max_length
+
+
+class QuizImportError(Exception):
+    """The question bank could not be read or has invalid rows"""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+def parse_json(questions):
+    """[{question_text, points, order, options: [{option_text, is_correct}]}] as sent in a JSON body"""
+    if not isinstance(questions, list):
+        raise QuizImportError("questions must be a list")
+    return [row if isinstance(row, dict) else {} for row in questions]
+
+
+def parse_csv(text):
+    """
+    One question per line with the columns question_text, points, order,
+    correct and option_1 ... option_n. `correct` holds the 1-based numbers
+    of the right options, separated by ";" when there are several.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or "question_text" not in reader.fieldnames:
+        raise QuizImportError("CSV needs a header row with at least question_text, correct and option_1")
+
+    option_columns = sorted(
+        (name for name in reader.fieldnames if name and name.startswith("option_") and name[7:].isdigit()),
+        key=lambda name: int(name[7:]),
+    )
+    rows = []
+    for line in reader:
+        correct = {part.strip() for part in (line.get("correct") or "").replace(",", ";").split(";") if part.strip()}
+        options = [
+            {"option_text": line[name], "is_correct": name[7:] in correct}
+            for name in option_columns
+            if (line.get(name) or "").strip()
+        ]
+        rows.append({
+            "question_text": line.get("question_text"),
+            "points": line.get("points") or None,
+            "order": line.get("order") or None,
+            "options": options,
+        })
+    return rows
+
+
+def validate(rows):
+    """Normalised questions, or QuizImportError listing every bad row (1-based)"""
+    if not rows:
+        raise QuizImportError("The question bank is empty")
+    if len(rows) > MAX_IMPORT_QUESTIONS:
+        raise QuizImportError(f"At most {MAX_IMPORT_QUESTIONS} questions can be imported at once")
+
+    questions = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        problems = []
+        text = (row.get("question_text") or "").strip()
+        if not text:
+            problems.append("question_text is required")
+
+        points = _integer(row.get("points"), default=1)
+        if points is None or points < 1:
+            problems.append("points must be a positive whole number")
+        order = _integer(row.get("order"), default=None)
+        if row.get("order") not in (None, "") and (order is None or order < 0):
+            problems.append("order must be a whole number of at least 0")
+
+        options = []
+        for option in row.get("options") or []:
+            option = option if isinstance(option, dict) else {}
+            option_text = (option.get("option_text") or "").strip()
+            if not option_text:
+                problems.append("options need option_text")
+            elif len(option_text) > OPTION_TEXT_MAX_LENGTH:
+                problems.append(f"option_text is longer than {OPTION_TEXT_MAX_LENGTH} characters")
+            options.append({"option_text": option_text, "is_correct": _boolean(option.get("is_correct"))})
+        if len(options) < 2:
+            problems.append("at least two options are required")
+        elif not any(option["is_correct"] for option in options):
+            problems.append("at least one option must be correct")
+
+        if problems:
+            errors.append({"row": number, "errors": problems})
+        else:
+            questions.append({"question_text": text, "points": points, "order": order, "options": options})
+
+    if errors:
+        raise QuizImportError("The question bank has invalid rows", errors)
+    return questions
+
+
+def import_questions(quiz, questions, dry_run=False):
+    """
+    Write validated questions and their options with two bulk inserts in one
+    transaction. Questions without an order go after the existing ones.
+    Returns the unsaved/saved QuizQuestion instances.
+    """
+    last_order = api_models.QuizQuestion.objects.filter(quiz=quiz).aggregate(last=Max("order"))["last"] or 0
+    new_questions = []
+    for offset, question in enumerate(questions, start=1):
+        new_questions.append(api_models.QuizQuestion(
+            quiz=quiz,
+            question_text=question["question_text"],
+            points=question["points"],
+            order=question["order"] if question["order"] is not None else last_order + offset,
+        ))
+    if dry_run:
+        return new_questions
+
+    new_options = [
+        api_models.QuizQuestionOption(question=new_question, **option)
+        for new_question, question in zip(new_questions, questions)
+        for option in question["options"]
+    ]
+    with transaction.atomic():
+        # bulk_create does not retry the short public ids on a clash, so draw them here
+        assign_public_ids(new_questions, "quiz_question_id")
+        assign_public_ids(new_options, "quiz_question_option_id")
+        api_models.QuizQuestion.objects.bulk_create(new_questions)
+        api_models.QuizQuestionOption.objects.bulk_create(new_options)
+        # bulk_create sends no signals, so version the cached quiz payload here
+        api_models.bump_quiz_version(quiz.pk)
+    return new_questions
+
+
+def draw_public_id(field):
+    return field.prefix + ShortUUID(alphabet=field.alphabet).random(length=field.length)
+
+
+def assign_public_ids(instances, field_name):
+    """
+    Give every instance a ShortUUIDField value unused by stored rows and by
+    the other instances. One query per round; a round is only repeated for
+    the ids that clashed.
+    """
+    if not instances:
+        return
+    model = type(instances[0])
+    field = model._meta.get_field(field_name)
+    for instance in instances:
+        setattr(instance, field_name, draw_public_id(field))
+
+    accepted = set()
+    pending = instances
+    while pending:
+        taken = set(
+            model.objects
+            .filter(**{f"{field_name}__in": [getattr(instance, field_name) for instance in pending]})
+            .values_list(field_name, flat=True)
+        )
+        clashed = []
+        for instance in pending:
+            value = getattr(instance, field_name)
+            if value in taken or value in accepted:
+                setattr(instance, field_name, draw_public_id(field))
+                clashed.append(instance)
+            else:
+                accepted.add(value)
+        pending = clashed
+
+
+def _integer(value, default):
+    if value in (None, ""):
+        return default
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def _boolean(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
@@ -0,0 +1,209 @@
+from datetime import timedelta
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+
+from api import models as api_models
+from api import quizzes
+
+# Allowance for network latency on submissions right at the deadline
+SUBMIT_GRACE_SECONDS = 30
+
+# Autosaved drafts wait in the shared cache and reach the database in
+# batches (flush_drafts, run by expire_quiz_attempts), not once per click
+DRAFT_TIMEOUT = 60 * 60 * 12
+DRAFT_FLUSH_BATCH_SIZE = 500
+
+
+class SessionClosed(quizzes.QuizSubmissionError):
+    """The attempt was already submitted or its time ran out"""
+
+
+def _draft_key(attempt_pk):
+    return f"quiz-draft:{attempt_pk}"
+
+
+def drafts_buffered():
+    """
+    Drafts may only wait in the cache when every process reads the same
+    one; with the per-process LocMem default they are written through.
+    """
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def is_overdue(attempt, now=None):
+    if attempt.deadline is None:
+        return False
+    now = now or timezone.now()
+    return now > attempt.deadline + timedelta(seconds=SUBMIT_GRACE_SECONDS)
+
+
+def open_attempt(quiz, user):
+    return api_models.QuizAttempt.objects.filter(quiz=quiz, user=user, status="In Progress").first()
+
+
+def start_attempt(quiz, user):
+    """
+    Open a timed session, or resume the one already open. Returns
+    (attempt, created). A session left open past its deadline is expired
+    first, so it still counts as an attempt.
+    """
+    attempt = open_attempt(quiz, user)
+    if attempt and not is_overdue(attempt):
+        return attempt, False
+    if attempt:
+        finish_attempt(attempt.pk)
+
+    now = timezone.now()
+    try:
+        attempt = quizzes.create_attempt(
+            quiz, user,
+            status="In Progress",
+            started_at=now,
+            deadline=now + timedelta(minutes=quiz.time_limit) if quiz.time_limit else None,
+        )
+    except quizzes.AttemptLimitReached:
+        raise
+    except quizzes.QuizSubmissionError:
+        # A concurrent start opened the session first
+        attempt = open_attempt(quiz, user)
+        if attempt is None:
+            raise
+        return attempt, False
+    return attempt, True
+
+
+def draft(attempt):
+    """Latest autosaved answers, {quiz_question_id: quiz_question_option_id or None}"""
+    answers = cache.get(_draft_key(attempt.pk))
+    return dict(attempt.draft_answers or {}) if answers is None else answers
+
+
+def autosave(attempt, answers):
+    """
+    Merge [{question_id, selected_option_id}] into the session's draft. The
+    answers are checked against the cached delivery payload and kept in the
+    shared cache, where grading reads them; flush_drafts() copies them to
+    the row in batches.
+    """
+    if attempt.status != "In Progress" or is_overdue(attempt):
+        raise SessionClosed("This attempt is closed")
+
+    valid = {
+        question["quiz_question_id"]: {option["quiz_question_option_id"] for option in question["options"]}
+        for question in quizzes.delivery_payload(attempt.quiz)["questions"]
+    }
+    errors = []
+    changes = {}
+    for index, answer in enumerate(answers):
+        answer = answer if isinstance(answer, dict) else {}
+        question_id = answer.get("question_id")
+        option_id = answer.get("selected_option_id") or None
+        if question_id not in valid:
+            errors.append({"index": index, "error": "Unknown question"})
+        elif option_id and option_id not in valid[question_id]:
+            errors.append({"index": index, "error": "Option does not belong to the question"})
+        else:
+            changes[question_id] = option_id
+    if errors:
+        raise quizzes.QuizSubmissionError("Invalid answers", errors)
+
+    answers = {**draft(attempt), **changes}
+    if drafts_buffered():
+        cache.set(_draft_key(attempt.pk), answers, DRAFT_TIMEOUT)
+    elif not api_models.QuizAttempt.objects.filter(pk=attempt.pk, status="In Progress").update(draft_answers=answers):
+        raise SessionClosed("This attempt is closed")
+    attempt.draft_answers = answers
+    return answers
+
+
+def flush_drafts(batch_size=DRAFT_FLUSH_BATCH_SIZE):
+    """
+    Copy the cached drafts of open sessions to their rows, one bulk UPDATE
+    per batch of sessions whose draft changed. Returns the number written.
+    """
+    written = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            # Locked so a submission closing one of these sessions waits for us
+            batch = list(
+                api_models.QuizAttempt.objects.select_for_update()
+                .filter(status="In Progress", pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "draft_answers")[:batch_size]
+            )
+            if not batch:
+                return written
+            last_pk = batch[-1].pk
+            cached = cache.get_many([_draft_key(attempt.pk) for attempt in batch])
+            changed = []
+            for attempt in batch:
+                answers = cached.get(_draft_key(attempt.pk))
+                if answers is not None and answers != attempt.draft_answers:
+                    attempt.draft_answers = answers
+                    changed.append(attempt)
+            api_models.QuizAttempt.objects.bulk_update(changed, ["draft_answers"])
+            written += len(changed)
+
+
+def finish_attempt(attempt_pk, answers=None, user=None):
+    """
+    Grade and close a session. Submitted answers are merged over the draft;
+    after the deadline (plus grace) only the draft counts and the attempt is
+    marked Expired. Returns the attempt.
+    """
+    with transaction.atomic():
+        queryset = api_models.QuizAttempt.objects.select_for_update().select_related("quiz")
+        if user is not None:
+            queryset = queryset.filter(user=user)
+        attempt = queryset.get(pk=attempt_pk)
+        if attempt.status != "In Progress":
+            raise SessionClosed("This attempt was already submitted")
+
+        now = timezone.now()
+        overdue = is_overdue(attempt, now)
+        key = quizzes.AnswerKey.load(attempt.quiz)
+        final = draft(attempt)
+        if answers is not None and not overdue:
+            # Fresh answers must be valid; the draft may predate an edit of the quiz
+            key.grade(answers)
+            final.update({answer["question_id"]: answer.get("selected_option_id") or None for answer in answers})
+
+        submission = [{"question_id": q, "selected_option_id": o} for q, o in final.items()]
+        score, graded = key.grade(submission, lenient=True)
+
+        attempt.score = score
+        attempt.status = "Expired" if overdue else "Submitted"
+        attempt.completed_at = attempt.deadline if overdue else now
+        attempt.draft_answers = {}
+        attempt.save(update_fields=["score", "status", "completed_at", "draft_answers"])
+        quizzes.store_answers(attempt, graded)
+        transaction.on_commit(lambda: cache.delete(_draft_key(attempt.pk)))
+    return attempt
+
+
+def expire_overdue(now=None, batch_size=100):
+    """Close every open session past its deadline, grading the latest draft. Returns the count."""
+    now = now or timezone.now()
+
+    expired = 0
+    overdue = (
+        api_models.QuizAttempt.objects
+        .filter(status="In Progress", deadline__lt=now - timedelta(seconds=SUBMIT_GRACE_SECONDS))
+        .order_by("deadline")
+        .values_list("pk", flat=True)
+    )
+    while True:
+        batch = list(overdue[:batch_size])
+        if not batch:
+            return expired
+        for pk in batch:
+            try:
+                finish_attempt(pk)
+            except SessionClosed:
+                # Submitted by the student meanwhile
+                continue
+            expired += 1
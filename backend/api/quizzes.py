@@ -0,0 +1,399 @@
+import random
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from api import item_analysis
+from api import leaderboards
+from api import models as api_models
+
+# Attempts to claim the next attempt number before giving up under contention
+ATTEMPT_NUMBER_RETRIES = 3
+
+# Cached payloads are keyed by quiz version, so this only bounds stale entries
+QUIZ_PAYLOAD_TIMEOUT = 60 * 60 * 24
+
+# Analytics are dropped whenever an attempt is recorded
+QUIZ_ANALYTICS_TIMEOUT = 60 * 60
+
+
+class QuizSubmissionError(Exception):
+    """The submitted answers do not fit the quiz"""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+class AttemptLimitReached(QuizSubmissionError):
+    """The user already used every attempt the quiz allows"""
+
+
+class AnswerKey:
+    """
+    A quiz's questions and options keyed by their public ids, loaded with two
+    queries so a whole submission can be graded in memory.
+    """
+
+    def __init__(self, questions, options):
+        # quiz_question_id -> (pk, points)
+        self.questions = questions
+        # quiz_question_option_id -> (pk, question pk, is_correct)
+        self.options = options
+
+    @classmethod
+    def load(cls, quiz):
+        questions = {
+            public_id: (pk, points)
+            for pk, public_id, points in api_models.QuizQuestion.objects
+            .filter(quiz=quiz)
+            .values_list("id", "quiz_question_id", "points")
+        }
+        options = {
+            public_id: (pk, question_id, is_correct)
+            for pk, public_id, question_id, is_correct in api_models.QuizQuestionOption.objects
+            .filter(question__quiz=quiz)
+            .values_list("id", "quiz_question_option_id", "question_id", "is_correct")
+        }
+        return cls(questions, options)
+
+    def total_points(self):
+        return sum(points for _, points in self.questions.values())
+
+    def grade(self, answers, lenient=False):
+        """
+        Grade a submission of [{question_id, selected_option_id}] and return
+        (score, graded rows). Every answer is validated before anything is
+        written; all problems are reported together. With lenient=True
+        invalid answers are dropped instead, for drafts saved before the quiz
+        was edited.
+        """
+        errors = []
+        graded = []
+        seen = set()
+        score = 0
+
+        for index, answer in enumerate(answers):
+            answer = answer if isinstance(answer, dict) else {}
+            question = self.questions.get(answer.get("question_id"))
+            if question is None:
+                errors.append({"index": index, "error": "Unknown question"})
+                continue
+            question_pk, points = question
+            if question_pk in seen:
+                errors.append({"index": index, "error": "Question answered more than once"})
+                continue
+            seen.add(question_pk)
+
+            option_id = answer.get("selected_option_id")
+            option = self.options.get(option_id) if option_id else None
+            if option_id and (option is None or option[1] != question_pk):
+                errors.append({"index": index, "error": "Option does not belong to the question"})
+                continue
+
+            is_correct = bool(option and option[2])
+            if is_correct:
+                score += points
+            graded.append({
+                "question_id": question_pk,
+                "selected_option_id": option[0] if option else None,
+                "is_correct": is_correct,
+            })
+
+        if errors and not lenient:
+            raise QuizSubmissionError("Invalid answers", errors)
+        return score, graded
+
+
+def submit_attempt(quiz, user, answers):
+    """Grade and store a complete attempt in one go, without a timed session"""
+    score, graded = AnswerKey.load(quiz).grade(answers)
+    return create_attempt(
+        quiz, user,
+        after_create=lambda attempt: store_answers(attempt, graded),
+        score=score,
+        completed_at=timezone.now(),
+    )
+
+
+def create_attempt(quiz, user, after_create=None, **fields):
+    """
+    Create the user's next attempt. The attempt number comes from the
+    (quiz, user, attempt_number) unique constraint: concurrent requests that
+    pick the same number retry with the next one, and none can go past
+    quiz.max_attempts.
+    """
+    for _ in range(ATTEMPT_NUMBER_RETRIES):
+        try:
+            with transaction.atomic():
+                attempt = _create_attempt(quiz, user, **fields)
+                if after_create:
+                    after_create(attempt)
+            return attempt
+        except IntegrityError:
+            continue
+    raise QuizSubmissionError("Could not record the attempt, please submit again")
+
+
+def _create_attempt(quiz, user, **fields):
+    attempt_number = next_attempt_number(quiz, user)
+    if attempt_number > quiz.max_attempts:
+        raise AttemptLimitReached("Maximum attempts reached")
+    attempt = api_models.QuizAttempt.objects.create(quiz=quiz, user=user, attempt_number=attempt_number, **fields)
+
+    Summaries = api_models.QuizResultSummary
+    Summaries.objects.bulk_create([Summaries(quiz=quiz, user=user)], ignore_conflicts=True)
+    Summaries.objects.filter(quiz=quiz, user=user).update(attempts_used=F("attempts_used") + 1)
+    return attempt
+
+
+def store_answers(attempt, graded):
+    """Persist a graded attempt's answers and fold its score into the user's summary"""
+    api_models.QuizAnswer.objects.bulk_create([
+        api_models.QuizAnswer(attempt=attempt, **row) for row in graded
+    ])
+    record_result(attempt)
+    attempt.result_breakdown = result_breakdown(attempt)
+    attempt.save(update_fields=["result_breakdown"])
+    transaction.on_commit(lambda: invalidate_analytics(attempt.quiz_id))
+
+
+def record_result(attempt):
+    """Make a graded attempt the user's best if it beats the current one (earlier attempts win ties)"""
+    improved = api_models.QuizResultSummary.objects.filter(
+        Q(best_attempt__isnull=True) | Q(best_score__lt=attempt.score),
+        quiz_id=attempt.quiz_id,
+        user_id=attempt.user_id,
+    ).update(
+        best_score=attempt.score,
+        best_attempt=attempt,
+        passed=attempt.score >= attempt.quiz.min_pass_points,
+    )
+    if improved:
+        leaderboards.quiz_result_recorded(attempt)
+
+
+def result_breakdown(attempt):
+    """Per-answer breakdown of an attempt from one joined query"""
+    answers = (
+        api_models.QuizAnswer.objects
+        .filter(attempt=attempt)
+        .select_related("question", "selected_option")
+        .order_by("question__order", "question_id")
+    )
+    breakdown = []
+    correct = unanswered = total_possible = 0
+    for answer in answers:
+        question, option = answer.question, answer.selected_option
+        breakdown.append({
+            "question_id": question.quiz_question_id,
+            "question_text": question.question_text,
+            "selected_option_id": option.quiz_question_option_id if option else None,
+            "selected_option_text": option.option_text if option else None,
+            "is_correct": answer.is_correct,
+            "points_earned": question.points if answer.is_correct else 0,
+            "points_possible": question.points,
+        })
+        total_possible += question.points
+        correct += answer.is_correct
+        unanswered += option is None
+
+    return {
+        "total_possible": total_possible,
+        "answers_breakdown": breakdown,
+        "summary": {
+            "total_questions": len(breakdown),
+            "correct_answers": correct,
+            "incorrect_answers": len(breakdown) - correct,
+            "unanswered": unanswered,
+        },
+    }
+
+
+def stored_breakdown(attempt):
+    """The breakdown saved at grading, computed and saved once for attempts graded before it was stored"""
+    if attempt.result_breakdown is None:
+        breakdown = result_breakdown(attempt)
+        if attempt.completed_at is None:
+            return breakdown
+        attempt.result_breakdown = breakdown
+        api_models.QuizAttempt.objects.filter(pk=attempt.pk).update(result_breakdown=breakdown)
+    return attempt.result_breakdown
+
+
+def result_summary(quiz_id, user):
+    """The user's summary for a quiz by its public id, with quiz and best attempt joined in"""
+    return (
+        api_models.QuizResultSummary.objects
+        .select_related("quiz", "best_attempt__quiz")
+        .filter(quiz__quiz_id=quiz_id, user=user)
+        .first()
+    )
+
+
+def delivery_payload(quiz):
+    """
+    The quiz as students receive it: same shape as QuizSerializer, without
+    the answers. Cached per quiz version (Quiz.updated_at, bumped whenever a
+    question or option changes), so it is built at most once per edit.
+    """
+    key = f"quiz-payload:{quiz.pk}:{quiz.updated_at.timestamp()}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = _build_delivery_payload(quiz)
+        cache.set(key, payload, QUIZ_PAYLOAD_TIMEOUT)
+    return payload
+
+
+def _build_delivery_payload(quiz):
+    options = {}
+    for question_id, option_id, option_text in (
+        api_models.QuizQuestionOption.objects
+        .filter(question__quiz=quiz)
+        .order_by("id")
+        .values_list("question_id", "quiz_question_option_id", "option_text")
+    ):
+        options.setdefault(question_id, []).append({
+            "quiz_question_option_id": option_id,
+            "option_text": option_text,
+        })
+
+    questions = [
+        {
+            "quiz_question_id": question["quiz_question_id"],
+            "question_text": question["question_text"],
+            "points": question["points"],
+            "order": question["order"],
+            "options": options.get(question["id"], []),
+        }
+        for question in api_models.QuizQuestion.objects
+        .filter(quiz=quiz)
+        .order_by("order", "id")
+        .values("id", "quiz_question_id", "question_text", "points", "order")
+    ]
+
+    return {
+        "quiz_id": quiz.quiz_id,
+        "course_id": quiz.course.course_id,
+        "teacher": quiz.teacher_id,
+        "title": quiz.title,
+        "description": quiz.description,
+        "time_limit": quiz.time_limit,
+        "shuffle_questions": quiz.shuffle_questions,
+        "min_pass_points": quiz.min_pass_points,
+        "max_attempts": quiz.max_attempts,
+        "questions": questions,
+        "created_at": quiz.created_at,
+        "updated_at": quiz.updated_at,
+    }
+
+
+def shuffle_payload(payload, seed):
+    """
+    Deterministic question order for one attempt. The same seed always gives
+    the same order, so reloading the page does not reshuffle the exam.
+    """
+    questions = list(payload["questions"])
+    random.Random(seed).shuffle(questions)
+    return {**payload, "questions": questions}
+
+
+def attempt_seed(quiz, user):
+    """
+    Shuffle seed: the id of the user's open attempt, or None before one is
+    started. Only the attempt id seeds the order, so it never changes when
+    the attempt starts.
+    """
+    return (
+        api_models.QuizAttempt.objects
+        .filter(quiz=quiz, user=user, status="In Progress")
+        .values_list("attempt_id", flat=True)
+        .first()
+    )
+
+
+def next_attempt_number(quiz, user):
+    last = (
+        api_models.QuizAttempt.objects
+        .filter(quiz=quiz, user=user)
+        .aggregate(last=Max("attempt_number"))["last"]
+    ) or 0
+    return last + 1
+
+
+def _analytics_key(quiz_id):
+    return f"quiz-analytics:{quiz_id}"
+
+
+def invalidate_analytics(quiz_id):
+    cache.delete(_analytics_key(quiz_id))
+
+
+def quiz_analytics(quiz):
+    """
+    Quiz-wide statistics, cached until the next attempt is recorded or the
+    quiz is edited. Student figures use each student's best attempt
+    (highest score, earliest on ties).
+    """
+    key = _analytics_key(quiz.pk)
+    version = quiz.updated_at.timestamp()
+    cached = cache.get(key)
+    if cached and cached["version"] == version:
+        return cached["data"]
+
+    data = _build_analytics(quiz)
+    cache.set(key, {"version": version, "data": data}, QUIZ_ANALYTICS_TIMEOUT)
+    return data
+
+
+def best_attempts(quiz):
+    """One row per student: their best attempt plus how many attempts they made"""
+    return list(
+        api_models.QuizAttempt.objects
+        .filter(quiz=quiz, completed_at__isnull=False)
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("user_id")],
+                order_by=[F("score").desc(), F("completed_at").asc()],
+            ),
+            user_attempts=Window(Count("id"), partition_by=[F("user_id")]),
+        )
+        .filter(rank=1)
+        .order_by("-score", "completed_at")
+        .values("id", "user_id", "score", "attempt_number", "completed_at", "user_attempts")
+    )
+
+
+def _build_analytics(quiz):
+    totals = api_models.QuizAttempt.objects.filter(quiz=quiz, completed_at__isnull=False).aggregate(
+        avg_score=Avg("score"), lowest_score=Min("score"),
+    )
+    best = best_attempts(quiz)
+
+    total_students = len(best)
+    pass_count = sum(1 for row in best if row["score"] >= quiz.min_pass_points)
+    students_best = [
+        {
+            "user_id": row["user_id"],
+            "score": row["score"],
+            "attempt_number": row["attempt_number"],
+            "completed_at": row["completed_at"],
+        }
+        for row in best
+    ]
+
+    return {
+        "total_students": total_students,
+        "avg_score": totals["avg_score"] or 0,
+        "pass_rate": (pass_count / total_students * 100) if total_students else 0,
+        "highest_score": best[0]["score"] if best else 0,
+        "lowest_score": totals["lowest_score"] or 0,
+        "attempts_distribution": [row["user_attempts"] for row in best],
+        "top_performers": students_best[:5],
+        "students_best_attempts": students_best,
+        "questions": item_analysis.question_stats(quiz, best),
+    }
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Events queued per open stream before the oldest ones are dropped
+SUBSCRIPTION_BUFFER = 100
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def teacher_channel(teacher_id):
+    return f"teacher:{teacher_id}"
+
+
+class Subscription:
+    """
+    One open stream's mailbox. Events can be put from any thread; they are
+    handed to the event loop that created the subscription.
+    """
+
+    def __init__(self, broker, channels, maxsize=SUBSCRIPTION_BUFFER):
+        self.broker = broker
+        self.channels = set(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop already closed, the stream went away
+            pass
+
+    def _put(self, event):
+        if self.queue.full():
+            # Slow consumer: drop the oldest event rather than grow without bound
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Next event, or None when timeout elapses first"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    In-process pub/sub. Publishing delivers straight to the subscribers of this
+    process, which is all a single ASGI worker (or the test suite) needs.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Cross-process broker built on PostgreSQL LISTEN/NOTIFY, so every worker
+    sees events published by any other worker without extra infrastructure.
+    Each process keeps one listening connection on a daemon thread and hands
+    what it hears to its local subscribers.
+    """
+
+    notify_channel = "lms_realtime"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, channel, event):
+        payload = json.dumps({"channel": channel, "event": event}, cls=DjangoJSONEncoder)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.notify_channel, payload])
+
+    def subscribe(self, channels):
+        self._ensure_listener()
+        return super().subscribe(channels)
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="realtime-listener", daemon=True)
+                self._listener.start()
+
+    def _connect(self):
+        import psycopg2
+
+        # The backend's own parameters, so OPTIONS such as sslmode apply too
+        conn = psycopg2.connect(**connection.get_connection_params())
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.notify_channel}")
+        return conn
+
+    def _listen(self):
+        conn = self._connect()
+        try:
+            while True:
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        message = json.loads(notify.payload)
+                        self.deliver(message["channel"], message["event"])
+                    except (ValueError, KeyError):
+                        logger.warning("Dropping malformed realtime payload: %s", notify.payload)
+        except Exception:
+            logger.exception("Realtime listener stopped; it restarts on the next subscription")
+        finally:
+            conn.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker configured by settings.REALTIME_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_path = getattr(settings, "REALTIME_BROKER", "api.realtime.LocalBroker")
+                _broker = import_string(broker_path)()
+    return _broker
+
+
+def publish(channel, event):
+    """Publish once the surrounding transaction commits, so clients never see rolled back rows"""
+    def send():
+        try:
+            get_broker().publish(channel, event)
+        except Exception:
+            # Push is best effort; clients still catch up through the inbox endpoints
+            logger.exception("Failed to publish realtime event on %s", channel)
+
+    transaction.on_commit(send)
+
+
+def publish_notifications(notifications):
+    for notification in notifications:
+        event = {
+            "type": "notification",
+            "id": notification.id,
+            "notification_type": notification.type,
+            "order": notification.order_id,
+            "order_item": notification.order_item_id,
+            "review": notification.review_id,
+            "date": notification.date,
+        }
+        if notification.user_id:
+            publish(user_channel(notification.user_id), event)
+        if notification.teacher_id:
+            publish(teacher_channel(notification.teacher_id), event)
+
+
+def format_sse(event, event_type="message"):
+    data = json.dumps(event, cls=DjangoJSONEncoder)
+    return f"event: {event_type}\ndata: {data}\n\n"
@@ -0,0 +1,201 @@
+from django.utils import timezone
+from django.utils.text import slugify
+from import_export import fields, resources, widgets
+from import_export.instance_loaders import CachedInstanceLoader
+
+from api import models as api_models
+
+# Rows per bulk_create / bulk_update statement
+IMPORT_BATCH_SIZE = 1000
+
+
+class CachedForeignKeyWidget(widgets.ForeignKeyWidget):
+    """
+    ForeignKeyWidget that resolves the whole column with one query before
+    the import starts (see CatalogResource.before_import) instead of one
+    query per row. Unknown keys still fall back to the regular lookup, so
+    they fail with the usual error.
+    """
+
+    def __init__(self, model, field="pk", **kwargs):
+        super().__init__(model, field=field, **kwargs)
+        self._cache = {}
+
+    def prime(self, values):
+        keys = {str(value) for value in values if value not in (None, "")}
+        self._cache = {
+            str(getattr(obj, self.field)): obj
+            for obj in self.get_queryset(None, None).filter(**{f"{self.field}__in": keys}).only("pk", self.field)
+        }
+
+    def clean(self, value, row=None, **kwargs):
+        if value in (None, ""):
+            return None
+        cached = self._cache.get(str(value))
+        return cached if cached is not None else super().clean(value, row, **kwargs)
+
+
+class PublicIdWidget(widgets.CharWidget):
+    """Blank cells clean to None, so the field keeps the id the model generated"""
+
+    def clean(self, value, row=None, **kwargs):
+        value = super().clean(value, row, **kwargs)
+        if value is None:
+            return None
+        return value.strip() or None
+
+
+def public_id(name):
+    """A public id column; left blank in a row, the model generates a new id"""
+    return fields.Field(attribute=name, column_name=name, widget=PublicIdWidget(), saves_null_values=False)
+
+
+class CatalogResource(resources.ModelResource):
+    """
+    Rows are matched on the model's public id with one query for the whole
+    file (CachedInstanceLoader), written with bulk_create / bulk_update in
+    batches, and unchanged rows are skipped. bulk_create bypasses save() and
+    signals, so subclasses fill in what those would have done.
+    """
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        for field in self.get_import_fields():
+            if isinstance(field.widget, CachedForeignKeyWidget) and field.column_name in dataset.headers:
+                field.widget.prime(dataset[field.column_name])
+
+
+def _bump_courses(course_ids):
+    # Same as the Variant / VariantItem signals: version the cached curriculum
+    api_models.Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+
+
+class CategoryResource(CatalogResource):
+    class Meta:
+        model = api_models.Category
+        fields = ("slug", "title", "active")
+        import_id_fields = ("slug",)
+        instance_loader_class = CachedInstanceLoader
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+
+    def before_save_instance(self, instance, row, **kwargs):
+        if not instance.slug:
+            instance.slug = slugify(instance.title)
+
+
+class CourseResource(CatalogResource):
+    course_id = public_id("course_id")
+    category = fields.Field(attribute="category", column_name="category", widget=CachedForeignKeyWidget(api_models.Category, "slug"))
+    teacher = fields.Field(attribute="teacher", column_name="teacher", widget=CachedForeignKeyWidget(api_models.Teacher, "id"))
+
+    class Meta:
+        model = api_models.Course
+        fields = (
+            "course_id", "slug", "title", "description", "category", "teacher", "price", "language",
+            "level", "platform_status", "teacher_course_status", "featured",
+        )
+        import_id_fields = ("course_id",)
+        instance_loader_class = CachedInstanceLoader
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+
+    def get_queryset(self):
+        # Exports render these relations on every row
+        return super().get_queryset().select_related("category", "teacher")
+
+    def before_save_instance(self, instance, row, **kwargs):
+        if not instance.slug:
+            instance.slug = slugify(instance.title) + "_" + str(instance.course_id)
+
+
+class VariantResource(CatalogResource):
+    variant_id = public_id("variant_id")
+    course = fields.Field(attribute="course", column_name="course", widget=CachedForeignKeyWidget(api_models.Course, "course_id"))
+
+    class Meta:
+        model = api_models.Variant
+        fields = ("variant_id", "course", "title")
+        import_id_fields = ("variant_id",)
+        instance_loader_class = CachedInstanceLoader
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+
+    def get_queryset(self):
+        # Exports render these relations on every row
+        return super().get_queryset().select_related("course")
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if not kwargs.get("dry_run") and "course" in dataset.headers:
+            _bump_courses(
+                api_models.Course.objects.filter(course_id__in={str(value) for value in dataset["course"]}).values("pk")
+            )
+
+
+class VariantItemResource(CatalogResource):
+    variant_item_id = public_id("variant_item_id")
+    variant = fields.Field(attribute="variant", column_name="variant", widget=CachedForeignKeyWidget(api_models.Variant, "variant_id"))
+
+    class Meta:
+        model = api_models.VariantItem
+        fields = ("variant_item_id", "variant", "title", "description", "duration", "content_duration", "preview")
+        import_id_fields = ("variant_item_id",)
+        instance_loader_class = CachedInstanceLoader
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+
+    def get_queryset(self):
+        # Exports render these relations on every row
+        return super().get_queryset().select_related("variant")
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if not kwargs.get("dry_run") and "variant" in dataset.headers:
+            _bump_courses(
+                api_models.Variant.objects.filter(variant_id__in={str(value) for value in dataset["variant"]}).values("course_id")
+            )
+
+
+class CouponResource(CatalogResource):
+    teacher = fields.Field(attribute="teacher", column_name="teacher", widget=CachedForeignKeyWidget(api_models.Teacher, "id"))
+
+    class Meta:
+        model = api_models.Coupon
+        fields = ("teacher", "code", "discount", "active")
+        # Codes are unique per teacher, not globally. CachedInstanceLoader
+        # only handles one id field; coupon files are small
+        import_id_fields = ("teacher", "code")
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+
+    def get_queryset(self):
+        # Exports render these relations on every row
+        return super().get_queryset().select_related("teacher")
+
+
+class CountryResource(CatalogResource):
+    class Meta:
+        model = api_models.Country
+        fields = ("name", "tax_rate", "active")
+        import_id_fields = ("name",)
+        instance_loader_class = CachedInstanceLoader
+        use_bulk = True
+        batch_size = IMPORT_BATCH_SIZE
+        skip_unchanged = True
+
+
+# Import order for a full catalog: parents before the rows that point at them
+RESOURCES = {
+    "category": CategoryResource,
+    "course": CourseResource,
+    "variant": VariantResource,
+    "variant_item": VariantItemResource,
+    "coupon": CouponResource,
+    "country": CountryResource,
+}
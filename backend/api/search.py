@@ -0,0 +1,234 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import TextField, Value
+from django.db.models.functions import Replace
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.utils.html import escape
+
+from api import models as api_models
+
+SEARCH_CONFIG = "english"
+
+# Upper bound on hits returned by one search
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+HIGHLIGHT_START = "<b>"
+HIGHLIGHT_STOP = "</b>"
+
+
+# The GIN indexes of migration 0015 are built on these exact expressions;
+# change both together or PostgreSQL stops using the indexes
+def note_vector():
+    return SearchVector("title", weight="A", config=SEARCH_CONFIG) + SearchVector("note", weight="B", config=SEARCH_CONFIG)
+
+
+def thread_vector():
+    return SearchVector("title", weight="A", config=SEARCH_CONFIG)
+
+
+def message_vector():
+    return SearchVector("message", weight="B", config=SEARCH_CONFIG)
+
+
+# Same entities as django.utils.html.escape; "&" has to go first
+HTML_ENTITIES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")]
+
+
+def escaped(field):
+    """`field` HTML-escaped in SQL, so ts_headline only adds our own <b> tags"""
+    expression = field
+    for char, entity in HTML_ENTITIES:
+        expression = Replace(expression, Value(char), Value(entity), output_field=TextField())
+    return expression
+
+
+def _limit(limit):
+    try:
+        return max(1, min(int(limit), SEARCH_MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return SEARCH_PAGE_SIZE
+
+
+def use_postgres():
+    return connection.vendor == "postgresql"
+
+
+def search_notes(user_id, query, course_id=None, limit=SEARCH_PAGE_SIZE):
+    """
+    A student's notes matching `query`, best first. Each Note carries `rank`
+    and `headline` (the matching part of the note, HTML-escaped, terms
+    wrapped in <b>).
+    """
+    limit = _limit(limit)
+    notes = api_models.Note.objects.filter(user_id=user_id)
+    if course_id is not None:
+        notes = notes.filter(course_id=course_id)
+    if not (query or "").strip():
+        return []
+
+    if use_postgres():
+        search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+        return list(
+            notes.annotate(document=note_vector())
+            .filter(document=search_query)
+            .annotate(
+                rank=SearchRank(note_vector(), search_query),
+                headline=SearchHeadline(escaped("note"), search_query, config=SEARCH_CONFIG, start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP),
+            )
+            .order_by("-rank", "-id")[:limit]
+        )
+
+    index = InvertedIndex()
+    rows = {}
+    for note in notes.only("id", "title", "note", "course_id", "user_id", "note_id", "date"):
+        rows[note.id] = note
+        index.add(note.id, (note.title, 2.0), (note.note, 1.0))
+    hits = []
+    for note_id, rank in index.search(query)[:limit]:
+        note = rows[note_id]
+        note.rank = rank
+        note.headline = index.headline(note.note, query)
+        hits.append(note)
+    return hits
+
+
+def search_questions(course_id, query, limit=SEARCH_PAGE_SIZE):
+    """
+    Q&A of a course matching `query`, best first, as dicts. Thread titles
+    and messages are searched separately and merged by rank; every hit
+    points at its thread (qa_id) so the client can open it. Headlines are
+    HTML-escaped like the note ones.
+    """
+    limit = _limit(limit)
+    if not (query or "").strip():
+        return []
+    threads = api_models.Question_Answer.objects.filter(course_id=course_id)
+    messages = api_models.Question_Answer_Message.objects.filter(course_id=course_id)
+
+    if use_postgres():
+        search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+        headline = dict(config=SEARCH_CONFIG, start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP)
+        thread_hits = (
+            threads.annotate(document=thread_vector())
+            .filter(document=search_query)
+            .annotate(rank=SearchRank(thread_vector(), search_query), headline=SearchHeadline(escaped("title"), search_query, **headline))
+            .order_by("-rank", "-id")
+            .values("id", "qa_id", "title", "rank", "headline")[:limit]
+        )
+        message_hits = (
+            messages.annotate(document=message_vector())
+            .filter(document=search_query)
+            .annotate(rank=SearchRank(message_vector(), search_query), headline=SearchHeadline(escaped("message"), search_query, **headline))
+            .order_by("-rank", "-id")
+            .values("id", "qam_id", "question__qa_id", "question__title", "rank", "headline")[:limit]
+        )
+        hits = [_thread_hit(row) for row in thread_hits] + [_message_hit(row) for row in message_hits]
+    else:
+        index = InvertedIndex()
+        rows = {}
+        for row in threads.values("id", "qa_id", "title"):
+            rows[("thread", row["id"])] = row
+            index.add(("thread", row["id"]), (row["title"], 2.0))
+        for row in messages.values("id", "qam_id", "question__qa_id", "question__title", "message"):
+            rows[("message", row["id"])] = row
+            index.add(("message", row["id"]), (row["message"], 1.0))
+
+        hits = []
+        for key, rank in index.search(query)[:limit]:
+            row = rows[key]
+            text = row["title"] if key[0] == "thread" else row["message"]
+            row.update(rank=rank, headline=index.headline(text, query))
+            hits.append(_thread_hit(row) if key[0] == "thread" else _message_hit(row))
+
+    hits.sort(key=lambda hit: -hit["rank"])
+    return hits[:limit]
+
+
+def _thread_hit(row):
+    return {"type": "thread", "qa_id": row["qa_id"], "title": row["title"], "qam_id": None, "headline": row["headline"], "rank": row["rank"]}
+
+
+def _message_hit(row):
+    return {
+        "type": "message",
+        "qa_id": row["question__qa_id"],
+        "title": row["question__title"],
+        "qam_id": row["qam_id"],
+        "headline": row["headline"],
+        "rank": row["rank"],
+    }
+
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN.findall(text or "")]
+
+
+class InvertedIndex:
+    """
+    Small in-memory full-text index used when the database is not
+    PostgreSQL (the SQLite test and development setups). Terms map to
+    postings {document: weighted term frequency}; a query matches the
+    documents that contain every term, ranked by tf-idf. There is no
+    stemming, so it is stricter than PostgreSQL's english configuration.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.documents = 0
+
+    def add(self, document, *fields):
+        """fields: (text, weight) pairs"""
+        self.documents += 1
+        frequencies = Counter()
+        for text, weight in fields:
+            for token in tokenize(text):
+                frequencies[token] += weight
+        for token, frequency in frequencies.items():
+            self.postings[token][document] = frequency
+
+    def search(self, query):
+        """[(document, rank)] of the documents holding every query term, best first"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        postings = sorted((self.postings.get(term, {}) for term in terms), key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting.keys()
+
+        ranks = {}
+        for document in matches:
+            ranks[document] = sum(
+                (1 + math.log(posting[document])) * math.log(1 + self.documents / len(posting))
+                for posting in postings
+            )
+        return sorted(ranks.items(), key=lambda item: -item[1])
+
+    def headline(self, text, query, words=35):
+        """
+        Fragment of `text` around the first match with the query terms
+        highlighted. The text is HTML-escaped, so the <b> tags are the only
+        markup in it.
+        """
+        terms = set(tokenize(query))
+        tokens = list(TOKEN.finditer(text or ""))
+        first = next((i for i, token in enumerate(tokens) if token.group().lower() in terms), 0)
+        window = tokens[max(0, first - words // 3):][:words]
+        if not window:
+            return escape(text or "")
+
+        parts = []
+        position = window[0].start()
+        for token in window:
+            parts.append(escape(text[position:token.start()]))
+            word = escape(token.group())
+            parts.append(f"{HIGHLIGHT_START}{word}{HIGHLIGHT_STOP}" if token.group().lower() in terms else word)
+            position = token.end()
+        return "".join(parts)
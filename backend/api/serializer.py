@@ -1,14 +1,19 @@
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 from api import models as api_models
+from api import principals
 
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 
 from userauths.models import Profile, User
+from userauths.tokens import CompactRefreshToken
 
 from api.models import Quiz, QuizQuestion, QuizQuestionOption, QuizAttempt, QuizAnswer
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = CompactRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -17,14 +22,15 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['email'] = user.email
         token['username'] = user.username
         token['wallet_address'] = user.wallet_address
-        try:
-            token['teacher_id'] = user.teacher.id
-        except:
-            token['teacher_id'] = 0
-
+        # teacher_id and role, from the cached lookup in api.principals
+        for claim, value in principals.claims(user).items():
+            token[claim] = value
 
         return token
 
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CompactRefreshToken
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
@@ -41,16 +47,18 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attr
     
     def create(self, validated_data):
-        user = User.objects.create(
+        # One INSERT for the user (username and password set up front) and
+        # one for its profile, committed together
+        email_username, _ = validated_data['email'].split("@")
+        user = User(
             full_name=validated_data['full_name'],
             email=validated_data['email'],
+            username=email_username,
             wallet_address=validated_data['wallet_address']
         )
-
-        email_username, _ = user.email.split("@")
-        user.username = email_username
         user.set_password(validated_data['password'])
-        user.save()
+        with transaction.atomic():
+            user.save()
 
         return user
     
@@ -145,6 +153,24 @@ class Question_AnswerSerializer(serializers.ModelSerializer):
         model = api_models.Question_Answer
 
 
+class QuestionAnswerThreadSerializer(serializers.ModelSerializer):
+    message_count = serializers.IntegerField(read_only=True)
+    last_activity = serializers.DateTimeField(read_only=True)
+    profile = ProfileSerializer(source="author_profile", read_only=True)
+
+    class Meta:
+        fields = ['id', 'qa_id', 'course', 'user', 'title', 'date', 'message_count', 'last_activity', 'profile']
+        model = api_models.Question_Answer
+
+
+class QuestionAnswerThreadMessageSerializer(serializers.ModelSerializer):
+    profile = ProfileSerializer(source="author_profile", read_only=True)
+
+    class Meta:
+        fields = '__all__'
+        model = api_models.Question_Answer_Message
+
+
 
 class CartSerializer(serializers.ModelSerializer):
 
@@ -222,6 +248,15 @@ class NoteSerializer(serializers.ModelSerializer):
         model = api_models.Note
 
 
+class NoteSearchResultSerializer(serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta:
+        fields = '__all__'
+        model = api_models.Note
+
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     profile = ProfileSerializer(many=False)
@@ -440,7 +475,8 @@ class CertificateNFTSerializer(serializers.ModelSerializer):
 # ===================== QUIZ SERIALIZERS =====================
 
 class QuizQuestionOptionSerializer(serializers.ModelSerializer):
-    quiz_question_option_id = serializers.CharField(read_only=True)
+    # Writable so nested question updates can tell existing options from new ones
+    quiz_question_option_id = serializers.CharField(required=False)
 
     class Meta:
         model = QuizQuestionOption
@@ -457,30 +493,36 @@ class QuizQuestionSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         options_data = validated_data.pop('options', [])
-        # Update the question fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        # Update options
-        existing_ids = [opt['quiz_question_option_id'] for opt in options_data if 'quiz_question_option_id' in opt]
-        # Delete options not in the payload
-        instance.options.exclude(quiz_question_option_id__in=existing_ids).delete()
-        for opt_data in options_data:
-            opt_id = opt_data.get('quiz_question_option_id', None)
-            if opt_id:
-                # Update existing option
-                option = instance.options.get(quiz_question_option_id=opt_id)
-                option.option_text = opt_data.get('option_text', option.option_text)
-                option.is_correct = opt_data.get('is_correct', option.is_correct)
-                option.save()
-            else:
-                # Create new option
-                QuizQuestionOption.objects.create(
-                    question=instance,
-                    option_text=opt_data['option_text'],
-                    is_correct=opt_data.get('is_correct', False)
-                )
+        with transaction.atomic():
+            # Update the question fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            # Update options against one lookup of the existing ones
+            existing = {option.quiz_question_option_id: option for option in instance.options.all()}
+            keep_ids = [opt['quiz_question_option_id'] for opt in options_data if opt.get('quiz_question_option_id') in existing]
+            # Delete options not in the payload
+            instance.options.exclude(quiz_question_option_id__in=keep_ids).delete()
+
+            changed = []
+            created = []
+            for opt_data in options_data:
+                option = existing.get(opt_data.get('quiz_question_option_id'))
+                if option:
+                    option.option_text = opt_data.get('option_text', option.option_text)
+                    option.is_correct = opt_data.get('is_correct', option.is_correct)
+                    changed.append(option)
+                else:
+                    created.append(QuizQuestionOption(
+                        question=instance,
+                        option_text=opt_data['option_text'],
+                        is_correct=opt_data.get('is_correct', False)
+                    ))
+            QuizQuestionOption.objects.bulk_update(changed, ['option_text', 'is_correct'])
+            QuizQuestionOption.objects.bulk_create(created)
+            # Bulk writes skip the signals that version cached quiz payloads
+            api_models.bump_quiz_version(instance.quiz_id)
         return instance
 
 class QuizSerializer(serializers.ModelSerializer):
@@ -516,5 +558,5 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = QuizAttempt
-        fields = ['attempt_id', 'quiz_id', 'user', 'attempt_number', 'score', 'completed_at', 'answers']
-        read_only_fields = ['attempt_id', 'completed_at', 'quiz_id']
\ No newline at end of file
+        fields = ['attempt_id', 'quiz_id', 'user', 'attempt_number', 'score', 'status', 'started_at', 'deadline', 'completed_at', 'answers']
+        read_only_fields = ['attempt_id', 'status', 'started_at', 'deadline', 'completed_at', 'quiz_id']
\ No newline at end of file
@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from api.models import Teacher, Category, Course, CartOrder, CartOrderItem, EnrolledCourse
+from api.admin import EstimatedCountPaginator
+
+User = get_user_model()
+
+
+class AdminChangelistTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='pass1234', wallet_address='wallet-admin')
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+        self.category = Category.objects.create(title="Blockchain")
+        self.client.force_login(self.admin)
+
+    def enroll(self, count):
+        for i in range(count):
+            student = User.objects.create_user(email=f's{i}-{count}@example.com', username=f's{i}-{count}', password='pass1234', wallet_address=f'wallet-{i}-{count}')
+            course = Course.objects.create(category=self.category, teacher=self.teacher, title=f"Course {i}")
+            order = CartOrder.objects.create(student=student)
+            item = CartOrderItem.objects.create(order=order, course=course, teacher=self.teacher)
+            EnrolledCourse.objects.create(course=course, user=student, teacher=self.teacher, order_item=item)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = ["/admin/api/cartorderitem/", "/admin/api/enrolledcourse/", "/admin/api/cartorder/"]
+        self.enroll(1)
+        few = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            few[url] = len(queries)
+        self.enroll(5)
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            self.assertEqual(len(queries), few[url], url)
+
+    def test_paginator_counts_exactly_off_postgres(self):
+        self.enroll(2)
+        paginator = EstimatedCountPaginator(CartOrder.objects.order_by("-id"), 50)
+        self.assertEqual(paginator.count, 2)
+
+    def test_paginator_uses_planner_estimate_on_big_postgres_tables(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.fetchone.return_value = (2500000,)
+        fake = mock.MagicMock(vendor="postgresql")
+        fake.cursor.return_value = cursor
+        with mock.patch("api.admin.connections") as connections:
+            connections.__getitem__.return_value = fake
+            self.assertEqual(EstimatedCountPaginator(CartOrder.objects.order_by("-id"), 50).count, 2500000)
+            # A filtered changelist still counts exactly
+            filtered = EstimatedCountPaginator(CartOrder.objects.filter(payment_status="Paid"), 50)
+            self.assertEqual(filtered.count, 0)
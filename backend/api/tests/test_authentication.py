@@ -0,0 +1,107 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import authentication
+from api.models import Category, Course, Quiz, QuizAttempt, Teacher
+
+User = get_user_model()
+
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # Blocklist entries don't expire; keep them from reaching the next test's users
+        self.addCleanup(cache.clear)
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+        course = Course.objects.create(category=Category.objects.create(title="Blockchain"), teacher=teacher, title="Cardano")
+        self.quiz = Quiz.objects.create(course=course, teacher=teacher, title="Basics", time_limit=10)
+        QuizAttempt.objects.create(quiz=self.quiz, user=self.student, attempt_number=1)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.student)}")
+
+    def test_get_does_not_load_the_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/v1/quiz/attempts/{self.quiz.quiz_id}/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse([query for query in queries if '"userauths_user"' in query['sql'].split("WHERE")[0]])
+
+    def test_user_is_loaded_when_a_field_is_read(self):
+        user = authentication.ClaimsUser(self.student.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual((user.pk, user.id), (self.student.pk, self.student.pk))
+            self.assertTrue(user.is_authenticated)
+            self.assertIsInstance(user, User)
+            self.assertIn(str(self.student.pk), str(QuizAttempt.objects.filter(user=user).query))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'student@example.com')
+
+    def test_deactivated_user_is_blocked(self):
+        self.student.is_active = False
+        self.student.save()
+
+        response = self.client.get(f"/api/v1/quiz/attempts/{self.quiz.quiz_id}/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.student.is_active = True
+        self.student.save()
+        response = self.client.get(f"/api/v1/quiz/attempts/{self.quiz.quiz_id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_blocklist_is_served_from_the_cache(self):
+        self.student.is_active = False
+        self.student.save()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(authentication.is_blocked(self.student.pk))
+            self.assertFalse(authentication.is_blocked(self.student.pk + 1))
+
+    def test_deleted_user_is_blocked(self):
+        user_id = self.student.pk
+        User.objects.filter(pk=user_id).delete()
+
+        self.assertTrue(authentication.is_blocked(user_id))
+
+    def test_rebuild_command_refills_the_blocklist(self):
+        User.objects.filter(pk=self.student.pk).update(is_active=False)
+        self.assertFalse(authentication.is_blocked(self.student.pk))
+
+        out = StringIO()
+        call_command("rebuild_auth_blocklist", stdout=out)
+
+        self.assertIn("Blocked 1 inactive users", out.getvalue())
+        response = self.client.get(f"/api/v1/quiz/attempts/{self.quiz.quiz_id}/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_realtime_stream_refuses_blocked_user(self):
+        token = AccessToken.for_user(self.student)
+        self.student.is_active = False
+        await self.student.asave()
+
+        response = await self.async_client.get(f"/api/v1/realtime/stream/?token={token}")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_missed_by_the_blocklist_fails_on_load(self):
+        User.objects.filter(pk=self.student.pk).update(is_active=False)
+
+        user = authentication.ClaimsUser(self.student.pk)
+        with self.assertRaises(authentication.AuthenticationFailed):
+            user.email
+
+    def test_session_authentication_is_not_a_default(self):
+        self.client.credentials()
+        self.client.login(email='student@example.com', password='pass1234')
+
+        response = self.client.get(f"/api/v1/quiz/attempts/{self.quiz.quiz_id}/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
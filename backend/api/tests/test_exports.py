@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from api.models import Teacher, Category, Course, CartOrder, CartOrderItem, EnrolledCourse, Review
+from api import exports
+
+User = get_user_model()
+
+
+class TeacherExportTests(APITestCase):
+    def setUp(self):
+        self.teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        teacher = Teacher.objects.create(user=self.teacher_user, full_name="Jane Doe")
+        course = Course.objects.create(category=Category.objects.create(title="Blockchain"), teacher=teacher, title="=HYPERLINK(1)")
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student', full_name="Sam")
+        order = CartOrder.objects.create(student=self.student, full_name="Sam", email="student@example.com", payment_status="Paid")
+        self.items = [CartOrderItem.objects.create(order=order, course=course, teacher=teacher, price=10, total=11) for _ in range(3)]
+        for item in self.items[:2]:
+            EnrolledCourse.objects.create(course=course, user=self.student, teacher=teacher, order_item=item)
+        Review.objects.create(user=self.student, course=course, review="Great", rating=5)
+
+    def body(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_orders_csv_streams_flat_rows(self):
+        self.client.force_authenticate(user=self.teacher_user)
+        response = self.client.get("/api/v1/teacher/export/orders/csv/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="orders.csv"')
+
+        rows = list(csv.DictReader(io.StringIO(self.body(response))))
+        self.assertEqual([row["item_id"] for row in rows], [item.oid for item in self.items])
+        self.assertEqual(rows[0]["payment_status"], "Paid")
+        # Formula-looking text is defused for spreadsheets
+        self.assertEqual(rows[0]["course"], "'=HYPERLINK(1)")
+
+    def test_students_and_reviews_ndjson(self):
+        self.client.force_authenticate(user=self.teacher_user)
+        students = [json.loads(line) for line in self.body(self.client.get("/api/v1/teacher/export/students/ndjson/")).splitlines()]
+        self.assertEqual(len(students), 1)
+        self.assertEqual((students[0]["email"], students[0]["courses"]), ("student@example.com", 2))
+
+        reviews = [json.loads(line) for line in self.body(self.client.get("/api/v1/teacher/export/reviews/ndjson/")).splitlines()]
+        self.assertEqual((reviews[0]["rating"], reviews[0]["review"]), (5, "Great"))
+
+    def test_rows_are_written_in_batches(self):
+        teacher_id = Teacher.objects.get(user=self.teacher_user).id
+        with mock.patch.object(exports, "ROWS_PER_WRITE", 2):
+            chunks = list(exports.encode("orders", teacher_id, "csv"))
+        # Header, then 2 + 1 rows
+        self.assertEqual(len(chunks), 3)
+
+    def test_only_teachers_export_known_datasets(self):
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(self.client.get("/api/v1/teacher/export/orders/csv/").status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.teacher_user)
+        self.assertEqual(self.client.get("/api/v1/teacher/export/payouts/csv/").status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get("/api/v1/teacher/export/orders/xlsx/").status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_asgi_response_streams_asynchronously(self):
+        token = str(AccessToken.for_user(self.teacher_user))
+        response = await self.async_client.get("/api/v1/teacher/export/orders/ndjson/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(body.splitlines()), 3)
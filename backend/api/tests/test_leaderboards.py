@@ -0,0 +1,126 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from api.models import Variant, VariantItem, CompletedLesson, CourseLeaderboardEntry
+from api import leaderboards
+from api import quizzes
+from api.tests.test_quizzes import QuizTestMixin
+
+User = get_user_model()
+
+
+class SortedBoardTests(APITestCase):
+    def test_rank_and_top_follow_key_order(self):
+        board = leaderboards.SortedBoard({1: (-5, 1), 2: (-9, 2), 3: (-5, 3)})
+        self.assertEqual(board.rank(2), 1)
+        self.assertEqual(board.rank(3), 3)
+        board.upsert(3, (-10, 3))
+        self.assertEqual([key[-1] for _, key in board.top(2)], [3, 2])
+        board.remove(2)
+        self.assertEqual(len(board), 2)
+        self.assertIsNone(board.rank(2))
+
+
+class LeaderboardTests(QuizTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.other = User.objects.create_user(email='other@example.com', username='other', password='pass1234', wallet_address='wallet-other')
+        self.course = self.quiz.course
+
+    def submit(self, user, correct):
+        with self.captureOnCommitCallbacks(execute=True):
+            return quizzes.submit_attempt(self.quiz, user, self.answers(correct=correct))
+
+    def test_quiz_board_tracks_best_scores(self):
+        self.submit(self.student, correct=(0,))
+        self.submit(self.other, correct=(0, 1))
+        standings = leaderboards.quiz_leaderboard.standings(self.quiz.pk, self.student.id)
+        self.assertEqual([row["user_id"] for row in standings["top"]], [self.other.id, self.student.id])
+        self.assertEqual(standings["me"], {"rank": 2, "user_id": self.student.id, "score": 1})
+
+        # An improvement moves the student up; a worse attempt changes nothing
+        self.submit(self.student, correct=(0, 1, 2))
+        self.assertEqual(leaderboards.quiz_leaderboard.standings(self.quiz.pk, self.student.id)["me"]["rank"], 1)
+        self.submit(self.other, correct=())
+        self.assertEqual(leaderboards.quiz_leaderboard.standings(self.quiz.pk, self.other.id)["me"]["score"], 3)
+
+    def test_other_process_rebuilds_after_a_change(self):
+        self.submit(self.student, correct=(0,))
+        leaderboards.quiz_leaderboard.standings(self.quiz.pk)
+        stale = leaderboards.QuizLeaderboard()
+        stale.standings(self.quiz.pk)
+        self.submit(self.other, correct=(0, 1, 2))
+        self.assertEqual(stale.standings(self.quiz.pk)["top"][0]["user_id"], self.other.id)
+
+    def test_held_board_is_rebuilt_after_max_age(self):
+        self.submit(self.student, correct=(0,))
+        board = leaderboards.QuizLeaderboard()
+        board.standings(self.quiz.pk)
+        # A change the generation never announced, as with a per-process cache
+        with self.captureOnCommitCallbacks(execute=False):
+            quizzes.submit_attempt(self.quiz, self.other, self.answers(correct=(0, 1, 2)))
+        self.assertEqual(board.standings(self.quiz.pk)["total"], 1)
+
+        later = leaderboards.time.monotonic() + leaderboards.BOARD_MAX_AGE
+        with mock.patch.object(leaderboards.time, "monotonic", return_value=later):
+            self.assertEqual(board.standings(self.quiz.pk)["top"][0]["user_id"], self.other.id)
+
+    def test_held_boards_are_bounded(self):
+        board = leaderboards.QuizLeaderboard()
+        with mock.patch.object(leaderboards, "MAX_HELD_BOARDS", 2):
+            for quiz_id in (1, 2, 1, 3):
+                board.board(quiz_id)
+        self.assertEqual(list(board._boards), [1, 3])
+
+    def test_course_board_and_endpoint(self):
+        variant = Variant.objects.create(course=self.course, title="Week 1")
+        item = VariantItem.objects.create(variant=variant, title="Intro")
+        self.client.force_authenticate(user=self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/v1/student/course-completed/", {
+                "user_id": self.other.id, "course_id": self.course.id, "variant_item_id": item.variant_item_id,
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.submit(self.student, correct=(0, 1, 2))
+
+        response = self.client.get(f"/api/v1/course/leaderboard/{self.course.course_id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["user_id"], row["completed_lessons"], row["quiz_points"]) for row in response.data["top"]],
+            [(self.other.id, 1, 0), (self.student.id, 0, 6)],
+        )
+        self.assertEqual(response.data["me"]["rank"], 1)
+        self.assertEqual(self.client.get("/api/v1/course/leaderboard/missing/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_course_tie_goes_to_who_reached_the_score_first(self):
+        now = timezone.now()
+        CourseLeaderboardEntry.objects.create(course=self.course, user=self.student)
+        CourseLeaderboardEntry.objects.create(course=self.course, user=self.other)
+        CourseLeaderboardEntry.objects.filter(user=self.student).update(updated_at=now - timedelta(hours=2))
+        CourseLeaderboardEntry.objects.filter(user=self.other).update(updated_at=now - timedelta(hours=1))
+
+        # The later-enrolled student completes the lesson first
+        leaderboards.lesson_progress_changed(self.course.id, self.other.id, 1)
+        leaderboards.lesson_progress_changed(self.course.id, self.student.id, 1)
+
+        standings = leaderboards.course_leaderboard.standings(self.course.id)
+        self.assertEqual([row["user_id"] for row in standings["top"]], [self.other.id, self.student.id])
+
+    def test_rebuild_command_repairs_drifted_entries(self):
+        variant = Variant.objects.create(course=self.course, title="Week 1")
+        item = VariantItem.objects.create(variant=variant, title="Intro")
+        CompletedLesson.objects.create(course=self.course, user=self.other, variant_item=item)
+        self.submit(self.student, correct=(0,))
+        CourseLeaderboardEntry.objects.filter(user=self.student).update(quiz_points=99)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_leaderboards", stdout=open("/dev/null", "w"))
+        entries = dict(CourseLeaderboardEntry.objects.values_list("user_id", "quiz_points"))
+        self.assertEqual(entries, {self.student.id: 1, self.other.id: 0})
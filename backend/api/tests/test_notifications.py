@@ -0,0 +1,178 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from api.models import Teacher, Notification, NotificationCounter
+from api import notifications, realtime
+
+User = get_user_model()
+
+
+class NotificationServiceTests(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+
+    def test_notify_bulk_inserts_and_counts_each_recipient(self):
+        notifications.notify([
+            Notification(user=self.student, teacher=self.teacher, type="Course Enrollment Completed"),
+            Notification(teacher=self.teacher, type="New Order"),
+            Notification(teacher=self.teacher, type="New Order", seen=True),
+        ])
+
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(notifications.unread_count(teacher_id=self.teacher.id), 2)
+        self.assertEqual(notifications.unread_count(user_id=self.student.id), 1)
+
+    def test_mark_seen_up_to_settles_both_recipients(self):
+        created = notifications.notify([
+            Notification(user=self.student, teacher=self.teacher, type="Course Enrollment Completed"),
+            Notification(teacher=self.teacher, type="New Order"),
+            Notification(teacher=self.teacher, type="New Order"),
+        ])
+
+        updated = notifications.mark_seen_up_to(created[1].id, teacher_id=self.teacher.id)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(notifications.unread_count(teacher_id=self.teacher.id), 1)
+        self.assertEqual(notifications.unread_count(user_id=self.student.id), 0)
+
+    def test_recount_unread_repairs_drifted_counter(self):
+        notifications.notify([Notification(teacher=self.teacher, type="New Order")])
+        NotificationCounter.objects.filter(teacher=self.teacher).update(unread=40)
+
+        self.assertEqual(notifications.recount_unread(teacher_id=self.teacher.id), 1)
+        self.assertEqual(notifications.unread_count(teacher_id=self.teacher.id), 1)
+
+
+class TeacherNotificationViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=self.teacher_user, full_name="Jane Doe")
+        notifications.notify([Notification(teacher=self.teacher, type="New Order") for _ in range(60)])
+
+    def test_inbox_is_capped_and_pages_backwards(self):
+        response = self.client.get(f"/api/v1/teacher/noti-list/{self.teacher.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), notifications.INBOX_PAGE_SIZE)
+
+        oldest = response.data[-1]['id']
+        response = self.client.get(f"/api/v1/teacher/noti-list/{self.teacher.id}/?before={oldest}&limit=500")
+        self.assertEqual(len(response.data), 60 - notifications.INBOX_PAGE_SIZE)
+        self.assertTrue(all(row['id'] < oldest for row in response.data))
+
+    def test_inbox_rejects_a_non_numeric_cursor(self):
+        response = self.client.get(f"/api/v1/teacher/noti-list/{self.teacher.id}/?before=abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unread_count_and_mark_seen_endpoints(self):
+        newest = Notification.objects.order_by('-id').first()
+        self.client.force_authenticate(self.teacher_user)
+        response = self.client.post(f"/api/v1/teacher/noti-mark-seen/{self.teacher.id}/", {"up_to_id": newest.id})
+        self.assertEqual(response.data['updated'], 60)
+
+        response = self.client.get(f"/api/v1/teacher/noti-unread-count/{self.teacher.id}/")
+        self.assertEqual(response.data, {"unread_count": 0})
+
+    def test_unread_count_and_mark_seen_are_private(self):
+        newest = Notification.objects.order_by('-id').first()
+        response = self.client.post(f"/api/v1/teacher/noti-mark-seen/{self.teacher.id}/", {"up_to_id": newest.id})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        self.client.force_authenticate(student)
+        response = self.client.post(f"/api/v1/teacher/noti-mark-seen/{self.teacher.id}/", {"up_to_id": newest.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(f"/api/v1/teacher/noti-unread-count/{self.teacher.id}/").status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(f"/api/v1/student/noti-unread-count/{self.teacher_user.id}/").status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(f"/api/v1/student/noti-unread-count/{student.id}/").data, {"unread_count": 0})
+        self.assertEqual(notifications.unread_count(teacher_id=self.teacher.id), 60)
+
+    def test_patching_single_notification_updates_counter(self):
+        noti = Notification.objects.first()
+        self.client.patch(f"/api/v1/teacher/noti-detail/{self.teacher.id}/{noti.id}", {"seen": True})
+        self.assertEqual(notifications.unread_count(teacher_id=self.teacher.id), 59)
+
+
+class RealtimeStreamTests(APITestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+        refresh = RefreshToken.for_user(teacher_user)
+        refresh['teacher_id'] = self.teacher.id
+        self.token = str(refresh.access_token)
+
+    def test_notify_publishes_after_commit(self):
+        broker = realtime.get_broker()
+        published = []
+        broker.publish, original = (lambda channel, event: published.append((channel, event))), broker.publish
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                notifications.notify([Notification(teacher=self.teacher, type="New Order")])
+        finally:
+            broker.publish = original
+
+        self.assertEqual(published[0][0], realtime.teacher_channel(self.teacher.id))
+        self.assertEqual(published[0][1]['notification_type'], "New Order")
+
+    async def test_stream_rejects_missing_token(self):
+        response = await self.async_client.get("/api/v1/realtime/stream/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get(f"/api/v1/realtime/stream/?token={self.token}")
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    async def test_stream_delivers_teacher_events(self):
+        response = await self.async_client.get(f"/api/v1/realtime/stream/?token={self.token}")
+        self.assertEqual(response['Content-Type'], "text/event-stream")
+        stream = response.streaming_content
+
+        self.assertTrue((await anext(stream)).startswith(b"retry:"))
+        self.assertIn(b"event: ready", await anext(stream))
+
+        realtime.get_broker().publish(realtime.teacher_channel(self.teacher.id), {"type": "notification", "id": 7})
+        chunk = (await anext(stream)).decode()
+        self.assertTrue(chunk.startswith("event: notification"))
+        self.assertEqual(json.loads(chunk.split("data: ", 1)[1]), {"type": "notification", "id": 7})
+        await stream.aclose()
+
+    async def test_stream_subscribes_only_once_started(self):
+        broker = realtime.get_broker()
+        channel = realtime.teacher_channel(self.teacher.id)
+        before = set(broker._subscribers.get(channel, ()))
+        response = await self.async_client.get(f"/api/v1/realtime/stream/?token={self.token}")
+        self.assertLessEqual(set(broker._subscribers.get(channel, ())), before)
+
+        stream = response.streaming_content
+        await anext(stream)
+        self.assertTrue(set(broker._subscribers.get(channel, ())) - before)
+        await stream.aclose()
+
+    async def test_stream_closes_when_the_token_expires(self):
+        token = AccessToken.for_user(self.teacher.user)
+        token.set_exp(lifetime=timedelta(seconds=1))
+        response = await self.async_client.get(f"/api/v1/realtime/stream/?token={token}")
+        chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertTrue(chunks[-1].startswith(b"event: expired"))
+
+
+class PostgresBrokerTests(APITestCase):
+    def test_listener_connects_with_the_database_options(self):
+        params = {"dbname": "lms", "host": "db", "sslmode": "require"}
+        with mock.patch.object(realtime.connection, "get_connection_params", return_value=params), \
+                mock.patch("psycopg2.connect") as connect:
+            realtime.PostgresBroker()._connect()
+
+        connect.assert_called_once_with(**params)
+        connect.return_value.cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+            f"LISTEN {realtime.PostgresBroker.notify_channel}"
+        )
@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from api.models import Teacher, Category, Course, Cart, CartOrder, CartOrderItem, Country
+from decimal import Decimal
+
+User = get_user_model()
+
+
+class CreateOrderViewTests(APITestCase):
+    url = "/api/v1/order/create-order/"
+
+    def setUp(self):
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        self.client.force_authenticate(self.student)
+        self.category = Category.objects.create(title="Blockchain")
+        Country.objects.create(name="India", tax_rate=18)
+        Country.objects.create(name="United States", tax_rate=5)
+        self.teachers = []
+        for i in range(3):
+            user = User.objects.create_user(email=f't{i}@example.com', username=f't{i}', password='pass1234', wallet_address=f'wallet-t{i}')
+            self.teachers.append(Teacher.objects.create(user=user, full_name=f"Teacher {i}"))
+
+    def fill_cart(self, cart_id, count):
+        for i in range(count):
+            course = Course.objects.create(category=self.category, teacher=self.teachers[i % 3], title=f"Course {cart_id}-{i}", price=100)
+            Cart.objects.create(course=course, user=self.student, price=100, cart_id=cart_id, country="India" if i % 2 else "United States")
+
+    def payload(self, cart_id, **extra):
+        return {"full_name": "Student", "email": self.student.email, "country": "India", "cart_id": cart_id, **extra}
+
+    def test_order_totals_and_items(self):
+        self.fill_cart("111111", 2)
+        response = self.client.post(self.url, self.payload("111111"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        order = CartOrder.objects.get(oid=response.data['order_oid'])
+        self.assertEqual(order.sub_total, Decimal('200.00'))
+        self.assertEqual(order.tax_fee, Decimal('23.00'))
+        self.assertEqual(order.total, Decimal('223.00'))
+        self.assertEqual(CartOrderItem.objects.filter(order=order).count(), 2)
+        self.assertEqual(order.teachers.count(), 2)
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        self.fill_cart("222222", 2)
+        self.fill_cart("333333", 12)
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, self.payload("222222"), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.url, self.payload("333333"), format='json')
+        self.assertEqual(len(small), len(large))
+
+    def test_retry_with_same_idempotency_key_returns_original_order(self):
+        self.fill_cart("444444", 2)
+        first = self.client.post(self.url, self.payload("444444"), format='json', HTTP_IDEMPOTENCY_KEY="checkout-1")
+        retry = self.client.post(self.url, self.payload("444444"), format='json', HTTP_IDEMPOTENCY_KEY="checkout-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['order_oid'], retry.data['order_oid'])
+        self.assertEqual(CartOrder.objects.count(), 1)
+
+        other = self.client.post(self.url, self.payload("444444", idempotency_key="checkout-2"), format='json')
+        self.assertEqual(other.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(CartOrder.objects.count(), 2)
@@ -0,0 +1,69 @@
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api import outbox
+from api.models import OutboundEmail
+
+
+@override_settings(EMAIL_OUTBOX_WORKER=False)
+class OutboxTests(TestCase):
+    def queue(self):
+        return outbox.queue("student@example.com", "Password Rest Email", "email/password_reset", {"link": "https://example.com/reset", "username": "student"})
+
+    def test_queue_renders_without_sending(self):
+        email = self.queue()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIn("https://example.com/reset", email.text_body)
+        self.assertIn("https://example.com/reset", email.html_body)
+
+    def test_send_pending_sends_once(self):
+        email = self.queue()
+
+        self.assertEqual(outbox.send_pending(), (1, 0))
+        self.assertEqual(outbox.send_pending(), (0, 0))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["student@example.com"])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        email.refresh_from_db()
+        self.assertIsNotNone(email.sent_at)
+
+    def test_failed_send_backs_off_and_gives_up(self):
+        email = self.queue()
+        with mock.patch("django.core.mail.EmailMultiAlternatives.send", side_effect=OSError("provider down")):
+            self.assertEqual(outbox.send_pending(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.attempts, email.last_error), (1, "provider down"))
+            self.assertGreater(email.send_after, timezone.now())
+            self.assertEqual(outbox.send_pending(), (0, 0))
+
+            for _ in range(outbox.MAX_ATTEMPTS - 1):
+                OutboundEmail.objects.update(send_after=timezone.now())
+                outbox.send_pending()
+
+        OutboundEmail.objects.update(send_after=timezone.now())
+        self.assertEqual(outbox.send_pending(), (0, 0))
+        self.assertEqual(OutboundEmail.objects.get().attempts, outbox.MAX_ATTEMPTS)
+
+    def test_worker_gets_the_mail_after_commit(self):
+        with override_settings(EMAIL_OUTBOX_WORKER=True), mock.patch.object(outbox._worker, "submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                email = self.queue()
+
+        submit.assert_called_once_with(email.pk)
+
+    def test_send_queued_email_command(self):
+        self.queue()
+        self.queue()
+
+        out = StringIO()
+        call_command("send_queued_email", "--limit", "1", stdout=out)
+
+        self.assertIn("Sent 2 emails, 0 failed", out.getvalue())
+        self.assertEqual(len(mail.outbox), 2)
@@ -0,0 +1,228 @@
+import hashlib
+import hmac
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import httpx
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth import get_user_model
+from api.models import Teacher, Category, Course, Cart, CartOrder, CartOrderItem, EnrolledCourse, PaymentConfirmation
+from api import payments
+
+User = get_user_model()
+
+
+class FakeRazorpay:
+    """Local stand-in for the Razorpay REST API, served through httpx.MockTransport"""
+
+    def __init__(self, fail_with=None, order_payments=None):
+        self.fail_with = fail_with
+        self.order_payments = order_payments or {}
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        if self.fail_with:
+            return httpx.Response(self.fail_with, json={"error": {"description": "provider down"}})
+        if request.method == "POST" and request.url.path.endswith("/orders"):
+            return httpx.Response(200, json={"id": f"order_fake{len(self.requests)}", "status": "created"})
+        if request.method == "GET" and request.url.path.endswith("/payments"):
+            provider_order_id = request.url.path.split("/")[-2]
+            items = self.order_payments.get(provider_order_id, [])
+            return httpx.Response(200, json={"entity": "collection", "count": len(items), "items": items})
+        return httpx.Response(404, json={"error": {"description": "not found"}})
+
+    def gateway(self, **kwargs):
+        return payments.RazorpayGateway("key_test", "secret_test", transport=httpx.MockTransport(self.handler), **kwargs)
+
+
+def sign(order_id, payment_id, secret="secret_test"):
+    return hmac.new(secret.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+
+class PaymentTestMixin:
+    def setUp(self):
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+        category = Category.objects.create(title="Blockchain")
+        self.course = Course.objects.create(category=category, teacher=self.teacher, title="Cardano 101", price=100)
+        self.order = CartOrder.objects.create(student=self.student, full_name="Student", email=self.student.email, total=118)
+        CartOrderItem.objects.create(order=self.order, course=self.course, teacher=self.teacher, price=100, total=118)
+        self.token = str(RefreshToken.for_user(self.student).access_token)
+
+
+class RazorpayCheckoutViewTests(PaymentTestMixin, APITestCase):
+    def test_checkout_creates_provider_order(self):
+        provider = FakeRazorpay()
+        with mock.patch.object(payments, "_gateway", provider.gateway()):
+            response = self.client.post(f"/api/v1/payment/razorpay-checkout/{self.order.oid}/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['order_id'], "order_fake1")
+        self.assertEqual(provider.requests[0].read(), b'{"amount":11800,"currency":"INR","receipt":"%s","payment_capture":1}' % self.order.oid.encode())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.razorpay_order_id, "order_fake1")
+
+    def test_failing_provider_opens_the_circuit(self):
+        provider = FakeRazorpay(fail_with=503)
+        gateway = provider.gateway(breaker=payments.CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        with mock.patch.object(payments, "_gateway", gateway):
+            codes = [self.client.post(f"/api/v1/payment/razorpay-checkout/{self.order.oid}/").status_code for _ in range(3)]
+
+        self.assertEqual(codes, [400, 400, 503])
+        self.assertEqual(len(provider.requests), 2)
+
+    def test_unknown_order_returns_404(self):
+        response = self.client.post("/api/v1/payment/razorpay-checkout/000000/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(RAZORPAY_KEY_SECRET="secret_test")
+class PaymentSuccessViewTests(PaymentTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.gateway_patch = mock.patch.object(payments, "_gateway", FakeRazorpay().gateway())
+        self.gateway_patch.start()
+        self.addCleanup(self.gateway_patch.stop)
+        self.order.razorpay_order_id = "order_fake1"
+        self.order.save()
+
+    def confirm(self, signature=None, token=None):
+        payload = {
+            "razorpay_order_id": "order_fake1",
+            "razorpay_payment_id": "pay_123",
+            "razorpay_signature": signature or sign("order_fake1", "pay_123"),
+            "order_oid": self.order.oid,
+        }
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token or self.token}"}
+        return self.client.post("/api/v1/payment/payment-success/", payload, format='json', **headers)
+
+    def test_valid_signature_marks_paid_and_enrolls(self):
+        Cart.objects.create(course=self.course, user=self.student, price=100, cart_id="555555")
+        response = self.confirm()
+        self.assertEqual(response.json()['message'], 'Payment successful')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "Paid")
+        self.assertEqual(EnrolledCourse.objects.filter(user=self.student, course=self.course).count(), 1)
+        self.assertTrue(PaymentConfirmation.objects.filter(payment_id="pay_123", order=self.order).exists())
+        self.assertFalse(Cart.objects.exists())
+
+        response = self.confirm()
+        self.assertEqual(response.json()['message'], 'Payment already processed')
+        self.assertEqual(EnrolledCourse.objects.count(), 1)
+
+    def test_payment_cannot_confirm_a_second_order(self):
+        self.confirm()
+        other = CartOrder.objects.create(student=self.student, total=118)
+        with self.assertRaises(payments.PaymentStateError):
+            payments.confirm_order_payment(other.pk, "pay_123")
+        other.refresh_from_db()
+        self.assertEqual(other.payment_status, "Processing")
+
+    def test_signature_for_another_provider_order_is_rejected(self):
+        self.order.razorpay_order_id = "order_other"
+        self.order.save()
+        response = self.confirm()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bad_signature_is_rejected(self):
+        response = self.confirm(signature="forged")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(EnrolledCourse.objects.exists())
+
+    def test_requires_authentication(self):
+        response = self.client.post("/api/v1/payment/payment-success/", {"order_oid": self.order.oid}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_blocked_user_is_refused(self):
+        self.addCleanup(cache.clear)
+        self.student.is_active = False
+        self.student.save()
+
+        response = self.confirm()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(EnrolledCourse.objects.exists())
+
+
+class ReconcilePaymentsCommandTests(PaymentTestMixin, APITestCase):
+    def run_command(self, provider, *args):
+        out = StringIO()
+        with mock.patch.object(payments, "_gateway", provider.gateway()):
+            call_command("reconcile_payments", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def age(self, order, **delta):
+        CartOrder.objects.filter(pk=order.pk).update(date=timezone.now() - timedelta(**delta))
+
+    def test_captured_payment_settles_stuck_order(self):
+        self.order.razorpay_order_id = "order_stuck"
+        self.order.save()
+        self.age(self.order, hours=1)
+        provider = FakeRazorpay(order_payments={"order_stuck": [
+            {"id": "pay_failed", "status": "failed"},
+            {"id": "pay_ok", "status": "captured"},
+        ]})
+
+        self.run_command(provider, "--dry-run")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "Processing")
+
+        self.run_command(provider)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "Paid")
+        self.assertEqual(PaymentConfirmation.objects.get().source, "Reconciliation")
+        self.assertEqual(EnrolledCourse.objects.count(), 1)
+
+    def test_abandoned_order_is_marked_failed(self):
+        self.order.razorpay_order_id = "order_abandoned"
+        self.order.save()
+        self.age(self.order, hours=30)
+        self.run_command(FakeRazorpay())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, "Failed")
+
+    def test_state_error_on_one_order_does_not_stop_the_run(self):
+        elsewhere = CartOrder.objects.create(student=self.student, total=118, payment_status="Paid")
+        PaymentConfirmation.objects.create(order=elsewhere, payment_id="pay_taken", source="Webhook")
+        self.order.razorpay_order_id = "order_conflict"
+        self.order.save()
+        self.age(self.order, hours=1)
+        later = CartOrder.objects.create(student=self.student, total=118, razorpay_order_id="order_abandoned")
+        self.age(later, hours=30)
+
+        out = self.run_command(FakeRazorpay(order_payments={"order_conflict": [{"id": "pay_taken", "status": "captured"}]}))
+
+        self.assertIn("0 paid, 1 failed, 0 left pending, 1 errors", out)
+        later.refresh_from_db()
+        self.assertEqual(later.payment_status, "Failed")
+
+    def test_paid_order_without_enrollments_is_repaired(self):
+        CartOrder.objects.filter(pk=self.order.pk).update(payment_status="Paid")
+        self.run_command(FakeRazorpay())
+        self.run_command(FakeRazorpay())
+        self.assertEqual(EnrolledCourse.objects.filter(order_item__order=self.order).count(), 1)
+
+
+class CircuitBreakerTests(APITestCase):
+    def test_half_open_allows_one_trial_then_closes(self):
+        now = [0]
+        breaker = payments.CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertEqual(breaker.state, breaker.OPEN)
+        with self.assertRaises(payments.CircuitOpenError):
+            breaker.before_call()
+
+        now[0] = 11
+        breaker.before_call()
+        with self.assertRaises(payments.CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, breaker.CLOSED)
@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from api.models import Teacher, Category, Course, CartOrder, CartOrderItem, EnrolledCourse, Variant, VariantItem, CompletedLesson, Note
+
+User = get_user_model()
+
+
+class CoursePlayerTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        self.course = Course.objects.create(category=Category.objects.create(title="Blockchain"), teacher=teacher, title="Cardano 101")
+        self.section = Variant.objects.create(course=self.course, title="Week 1")
+        self.lessons = [VariantItem.objects.create(variant=self.section, title=f"Lesson {i}") for i in range(3)]
+        order = CartOrder.objects.create(student=self.student)
+        item = CartOrderItem.objects.create(order=order, course=self.course, teacher=teacher)
+        self.enrolled = EnrolledCourse.objects.create(course=self.course, user=self.student, teacher=teacher, order_item=item)
+        CompletedLesson.objects.create(course=self.course, user=self.student, variant_item=self.lessons[0])
+        self.url = f"/api/v1/student/course-player/{self.enrolled.enrollment_id}/"
+        self.client.force_authenticate(user=self.student)
+
+    def test_player_returns_snapshot_and_overlay(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["course"]["lectures"], 3)
+        self.assertEqual(
+            [lesson["variant_item_id"] for lesson in response.data["course"]["curriculum"][0]["items"]],
+            [lesson.variant_item_id for lesson in self.lessons],
+        )
+        self.assertEqual(response.data["progress"], {
+            "completed": [self.lessons[0].variant_item_id], "last_lesson": None, "last_position": 0, "notes_count": 0,
+        })
+
+        # Warm snapshot: the enrollment and the completed lessons, nothing else
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries), 2)
+
+    def test_curriculum_edit_refreshes_snapshot(self):
+        self.client.get(self.url)
+        VariantItem.objects.create(variant=self.section, title="Bonus")
+        self.assertEqual(self.client.get(self.url).data["course"]["lectures"], 4)
+        self.lessons[1].delete()
+        self.assertEqual(self.client.get(self.url).data["course"]["lectures"], 3)
+
+    def test_position_is_saved(self):
+        response = self.client.post(self.url, {"variant_item_id": self.lessons[2].variant_item_id, "position": 95})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        progress = self.client.get(self.url).data["progress"]
+        self.assertEqual((progress["last_lesson"], progress["last_position"]), (self.lessons[2].variant_item_id, 95))
+
+        other = Variant.objects.create(course=Course.objects.create(title="Other"), title="Elsewhere")
+        stray = VariantItem.objects.create(variant=other, title="Stray")
+        response = self.client.post(self.url, {"variant_item_id": stray.variant_item_id, "position": 5})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_students_cannot_open_the_enrollment(self):
+        stranger = User.objects.create_user(email='x@example.com', username='x', password='pass1234', wallet_address='wallet-x')
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.url + "notes/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_notes_are_paged_newest_first(self):
+        notes = [Note.objects.create(user=self.student, course=self.course, title=f"N{i}", note="...") for i in range(5)]
+        Note.objects.create(user=None, course=self.course, title="Not mine", note="...")
+
+        first = self.client.get(self.url + "notes/", {"limit": 2}).data
+        self.assertEqual([note["id"] for note in first], [notes[4].id, notes[3].id])
+        rest = self.client.get(self.url + "notes/", {"limit": 10, "before": first[-1]["id"]}).data
+        self.assertEqual([note["id"] for note in rest], [notes[2].id, notes[1].id, notes[0].id])
+        self.assertEqual(self.client.get(self.url).data["progress"]["notes_count"], 5)
+        self.assertEqual(self.client.get(self.url + "notes/", {"before": "abc"}).status_code, status.HTTP_400_BAD_REQUEST)
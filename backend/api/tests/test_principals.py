@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import principals
+from api.models import Teacher
+
+User = get_user_model()
+
+
+class PrincipalTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        self.teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=self.teacher_user, full_name="Jane Doe")
+
+    def request(self, user, token=None):
+        return SimpleNamespace(user=user, auth=token)
+
+    def test_login_adds_teacher_and_role_claims(self):
+        response = self.client.post("/api/v1/user/token/", {"email": "teacher@example.com", "password": "pass1234"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data['access'])
+        self.assertEqual((token['teacher_id'], token['role']), (self.teacher.id, principals.TEACHER))
+
+        response = self.client.post("/api/v1/user/token/", {"email": "student@example.com", "password": "pass1234"}, format='json')
+        token = AccessToken(response.data['access'])
+        self.assertEqual((token['teacher_id'], token['role']), (0, principals.STUDENT))
+
+    def test_teacher_claim_needs_no_query(self):
+        token = AccessToken.for_user(self.teacher_user)
+        token['teacher_id'] = self.teacher.id
+        request = self.request(self.teacher_user, token)
+
+        with self.assertNumQueries(0):
+            principal = principals.for_request(request)
+            self.assertIs(principals.for_request(request), principal)
+
+        self.assertEqual((principal.user_id, principal.teacher_id, principal.role), (self.teacher_user.id, self.teacher.id, principals.TEACHER))
+
+    def test_student_lookup_is_cached(self):
+        token = AccessToken.for_user(self.student)
+        token['teacher_id'] = 0
+
+        with self.assertNumQueries(1):
+            principal = principals.for_request(self.request(self.student, token))
+        with self.assertNumQueries(0):
+            principals.for_request(self.request(self.student, token))
+
+        self.assertFalse(principal.is_teacher)
+        self.assertEqual(principal.role, principals.STUDENT)
+
+    def test_new_teacher_profile_is_seen_before_the_token_changes(self):
+        token = AccessToken.for_user(self.student)
+        token['teacher_id'] = 0
+        self.assertIsNone(principals.for_request(self.request(self.student, token)).teacher_id)
+
+        teacher = Teacher.objects.create(user=self.student, full_name="Sam")
+
+        self.assertEqual(principals.for_request(self.request(self.student, token)).teacher_id, teacher.id)
+
+    def test_session_login_and_anonymous(self):
+        self.assertEqual(principals.for_request(self.request(self.teacher_user)).teacher_id, self.teacher.id)
+        self.assertFalse(principals.for_request(self.request(AnonymousUser())).is_authenticated)
+
+    def test_teacher_endpoint_uses_the_principal(self):
+        token = AccessToken.for_user(self.student)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get("/api/v1/teacher/export/orders/csv/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        token = AccessToken.for_user(self.teacher_user)
+        token['teacher_id'] = self.teacher.id
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get("/api/v1/teacher/export/orders/csv/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from api.models import Teacher, Category, Course, Question_Answer, Question_Answer_Message
+
+User = get_user_model()
+
+
+class QuestionAnswerThreadTests(APITestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+        self.course = Course.objects.create(category=Category.objects.create(title="Blockchain"), teacher=self.teacher, title="Cardano 101")
+        self.students = [
+            User.objects.create_user(email=f's{i}@example.com', username=f's{i}', password='pass1234', wallet_address=f'wallet-{i}')
+            for i in range(3)
+        ]
+        self.threads = []
+        for i, student in enumerate(self.students):
+            thread = Question_Answer.objects.create(course=self.course, user=student, title=f"Thread {i}")
+            for author in self.students[:i + 1]:
+                Question_Answer_Message.objects.create(course=self.course, question=thread, user=author, message="hi")
+            self.threads.append(thread)
+
+    def test_thread_list_is_annotated_and_paged(self):
+        url = f"/api/v1/student/question-answer-threads/{self.course.id}/"
+        response = self.client.get(url, {"limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([thread["qa_id"] for thread in response.data], [self.threads[2].qa_id, self.threads[1].qa_id])
+        self.assertEqual([thread["message_count"] for thread in response.data], [3, 2])
+        self.assertEqual(response.data[0]["profile"]["user"], self.students[2].id)
+        self.assertIsNotNone(response.data[0]["last_activity"])
+
+        rest = self.client.get(url, {"before": response.data[-1]["id"]}).data
+        self.assertEqual([thread["qa_id"] for thread in rest], [self.threads[0].qa_id])
+
+    def test_page_queries_do_not_grow_with_threads(self):
+        url = f"/api/v1/student/question-answer-threads/{self.course.id}/"
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {"limit": 1})
+        few = len(queries)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), few)
+
+        # The legacy nested list is prefetched too
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/v1/student/question-answer-list-create/{self.course.id}/")
+        self.assertEqual(len(response.data[0]["messages"]), 3)
+        self.assertLessEqual(len(queries), 4)
+
+    def test_messages_are_keyset_paged(self):
+        url = f"/api/v1/student/question-answer-messages/{self.threads[2].qa_id}/"
+        first = self.client.get(url, {"limit": 2}).data
+        self.assertEqual([message["profile"]["user"] for message in first], [self.students[0].id, self.students[1].id])
+        rest = self.client.get(url, {"after": first[-1]["id"]}).data
+        self.assertEqual([message["user"] for message in rest], [self.students[2].id])
+        self.assertEqual(self.client.get("/api/v1/student/question-answer-messages/missing/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_teacher_threads(self):
+        response = self.client.get(f"/api/v1/teacher/question-answer-threads/{self.teacher.id}/")
+        self.assertEqual(len(response.data), 3)
+
+    def test_junk_cursors_are_rejected(self):
+        for url, params in [
+            (f"/api/v1/student/question-answer-threads/{self.course.id}/", {"before": "abc"}),
+            (f"/api/v1/teacher/question-answer-threads/{self.teacher.id}/", {"before": "1.5"}),
+            (f"/api/v1/student/question-answer-messages/{self.threads[2].qa_id}/", {"after": "x"}),
+        ]:
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,116 @@
+import itertools
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from api.models import QuizQuestion, QuizQuestionOption
+from api import quiz_import
+from api.tests.test_quizzes import QuizTestMixin
+
+
+class QuizQuestionImportTests(QuizTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.teacher.user)
+        self.url = f"/api/v1/quiz/{self.quiz.quiz_id}/questions/import/"
+        # Ids no stored row can have, so the query count does not depend on luck
+        ids = (f"imported-{n}" for n in itertools.count())
+        patcher = mock.patch.object(quiz_import, "draw_public_id", side_effect=lambda field: next(ids))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def bank(self, count):
+        return [
+            {
+                "question_text": f"Imported {i}",
+                "points": 2,
+                "options": [{"option_text": "yes", "is_correct": True}, {"option_text": "no"}],
+            }
+            for i in range(count)
+        ]
+
+    def test_json_import_uses_constant_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, {"questions": self.bank(2)}, format='json')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.url, {"questions": self.bank(50)}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(QuizQuestion.objects.filter(quiz=self.quiz).count(), 55)
+        self.assertEqual(QuizQuestionOption.objects.filter(question__quiz=self.quiz).count(), 110)
+        # Appended after the existing questions
+        self.assertEqual(QuizQuestion.objects.get(quiz_question_id=response.data['quiz_question_ids'][0]).order, 5)
+
+    def test_clashing_public_ids_are_drawn_again(self):
+        taken = self.questions[0][0].quiz_question_id
+        new = [QuizQuestion(quiz=self.quiz, question_text=f"Q{i}", points=1, order=10 + i) for i in range(2)]
+        # A stored id, then a duplicate within the batch
+        draws = iter([taken, "new-1", "new-1", "new-2"])
+        with mock.patch.object(quiz_import, "draw_public_id", side_effect=lambda field: next(draws)):
+            quiz_import.assign_public_ids(new, "quiz_question_id")
+
+        self.assertEqual([question.quiz_question_id for question in new], ["new-2", "new-1"])
+        QuizQuestion.objects.bulk_create(new)
+
+    def test_invalid_rows_are_all_reported_and_nothing_is_written(self):
+        bank = self.bank(3)
+        bank[0]["question_text"] = ""
+        bank[2]["options"][0]["is_correct"] = False
+        bank[2]["points"] = "many"
+        response = self.client.post(self.url, {"questions": bank}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e['row'] for e in response.data['errors']], [1, 3])
+        self.assertEqual(len(response.data['errors'][1]['errors']), 2)
+        self.assertEqual(QuizQuestion.objects.filter(quiz=self.quiz).count(), 3)
+
+    def test_csv_dry_run_then_import(self):
+        csv_text = "question_text,points,order,correct,option_1,option_2,option_3\nWhat is ADA?,3,,2,A bank,A coin,A car\nPick two,1,,1;3,a,b,c\n"
+
+        response = self.client.post(self.url + "?dry_run=1", {"csv": csv_text}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['questions'], response.data['options']), (2, 6))
+        self.assertEqual(QuizQuestion.objects.filter(quiz=self.quiz).count(), 3)
+
+        upload = SimpleUploadedFile("bank.csv", csv_text.encode(), content_type="text/csv")
+        response = self.client.post(self.url, {"file": upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        question = QuizQuestion.objects.get(quiz=self.quiz, question_text="What is ADA?")
+        self.assertEqual(question.points, 3)
+        self.assertEqual(list(question.options.filter(is_correct=True).values_list('option_text', flat=True)), ["A coin"])
+
+    def test_import_invalidates_cached_payload(self):
+        cache.clear()
+        self.client.force_authenticate(self.student)
+        take_url = f"/api/v1/quiz/{self.quiz.quiz_id}/take/"
+        self.assertEqual(len(self.client.get(take_url).data['questions']), 3)
+        self.client.force_authenticate(self.teacher.user)
+        self.client.post(self.url, {"questions": self.bank(1)}, format='json')
+        self.client.force_authenticate(self.student)
+        self.assertEqual(len(self.client.get(take_url).data['questions']), 4)
+
+
+class QuizQuestionUpdateTests(QuizTestMixin, APITestCase):
+    def test_update_keeps_existing_options(self):
+        self.client.force_authenticate(self.teacher.user)
+        question, right, wrong = self.questions[0]
+        payload = {
+            "question_text": "Renamed",
+            "points": 1,
+            "order": 0,
+            "options": [
+                {"quiz_question_option_id": right.quiz_question_option_id, "option_text": "still right", "is_correct": True},
+                {"option_text": "new wrong", "is_correct": False},
+            ],
+        }
+        response = self.client.put(f"/api/v1/quiz/question/{question.quiz_question_id}/update/", payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        options = {o.option_text: o for o in question.options.all()}
+        self.assertEqual(set(options), {"still right", "new wrong"})
+        self.assertEqual(options["still right"].pk, right.pk)
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from api.models import QuizAttempt, QuizAnswer
+from api import quiz_sessions
+from api.tests.test_quizzes import QuizTestMixin
+
+
+class QuizSessionTests(QuizTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        # The test cache is shared by everything in this process, like a Redis would be across workers
+        patcher = mock.patch.object(quiz_sessions, "drafts_buffered", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_authenticate(self.student)
+
+    def start(self):
+        return self.client.post(f"/api/v1/quiz/{self.quiz.quiz_id}/attempt/start/")
+
+    def autosave(self, attempt_id, answers):
+        return self.client.post(f"/api/v1/quiz/attempt/{attempt_id}/autosave/", {"answers": answers}, format='json')
+
+    def overdue(self, attempt_id):
+        QuizAttempt.objects.filter(attempt_id=attempt_id).update(deadline=timezone.now() - timedelta(minutes=5))
+
+    def test_start_resumes_open_session(self):
+        first = self.start()
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data['status'], "In Progress")
+        self.assertIsNotNone(first.data['deadline'])
+        self.assertNotIn('is_correct', first.data['quiz']['questions'][0]['options'][0])
+
+        again = self.start()
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data['attempt_id'], first.data['attempt_id'])
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_autosave_is_buffered_then_submit_grades_the_draft(self):
+        attempt_id = self.start().data['attempt_id']
+        answers = self.answers(correct=(0, 1))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.autosave(attempt_id, answers[:2])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE')])
+        self.autosave(attempt_id, answers[2:])
+
+        self.assertEqual(self.start().data['draft_answers'], {a['question_id']: a['selected_option_id'] for a in answers})
+
+        response = self.client.post(f"/api/v1/quiz/attempt/{attempt_id}/submit/", {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], "Submitted")
+        self.assertEqual(response.data['score'], 3)
+
+        response = self.client.post(f"/api/v1/quiz/attempt/{attempt_id}/submit/", {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_buffered_drafts_are_flushed_in_one_batch(self):
+        attempt_id = self.start().data['attempt_id']
+        self.autosave(attempt_id, self.answers()[:1])
+        self.client.force_authenticate(self.teacher.user)
+        other_id = self.start().data['attempt_id']
+        self.autosave(other_id, self.answers()[1:2])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(quiz_sessions.flush_drafts(), 2)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(QuizAttempt.objects.get(attempt_id=attempt_id).draft_answers, {a['question_id']: a['selected_option_id'] for a in self.answers()[:1]})
+        self.assertEqual(quiz_sessions.flush_drafts(), 0)
+
+    def test_drafts_are_written_through_without_a_shared_cache(self):
+        attempt_id = self.start().data['attempt_id']
+        with mock.patch.object(quiz_sessions, "drafts_buffered", return_value=False):
+            self.autosave(attempt_id, self.answers()[:1])
+
+        self.assertEqual(QuizAttempt.objects.get(attempt_id=attempt_id).draft_answers, {a['question_id']: a['selected_option_id'] for a in self.answers()[:1]})
+
+    def test_late_submission_only_counts_the_draft(self):
+        attempt_id = self.start().data['attempt_id']
+        self.autosave(attempt_id, self.answers(correct=(0,))[:1])
+        self.overdue(attempt_id)
+
+        self.assertEqual(self.autosave(attempt_id, self.answers()).status_code, status.HTTP_409_CONFLICT)
+        response = self.client.post(f"/api/v1/quiz/attempt/{attempt_id}/submit/", {"answers": self.answers()}, format='json')
+        self.assertEqual(response.data['status'], "Expired")
+        self.assertEqual(response.data['score'], 1)
+
+    def test_sweeper_expires_overdue_sessions(self):
+        attempt_id = self.start().data['attempt_id']
+        self.autosave(attempt_id, self.answers()[1:2])
+        self.overdue(attempt_id)
+
+        out = StringIO()
+        call_command("expire_quiz_attempts", stdout=out)
+        self.assertIn("Expired 1", out.getvalue())
+        attempt = QuizAttempt.objects.get(attempt_id=attempt_id)
+        self.assertEqual(attempt.status, "Expired")
+        self.assertEqual(attempt.score, 2)
+        self.assertEqual(QuizAnswer.objects.filter(attempt=attempt).count(), 1)
+
+    def test_attempt_create_endpoint_submits_open_session(self):
+        attempt_id = self.start().data['attempt_id']
+        response = self.client.post("/api/v1/quiz/attempt/create/", {"quiz_id": self.quiz.quiz_id, "answers": self.answers()}, format='json')
+        self.assertEqual(response.data['attempt_id'], attempt_id)
+        self.assertEqual(response.data['score'], 6)
+        self.assertEqual(QuizAttempt.objects.count(), 1)
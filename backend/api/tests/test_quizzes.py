@@ -0,0 +1,302 @@
+from unittest import mock
+
+import numpy as np
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from api.models import Teacher, Category, Course, Quiz, QuizQuestion, QuizQuestionOption, QuizAttempt, QuizAnswer, QuizResultSummary
+from api import quizzes
+
+User = get_user_model()
+
+
+class QuizTestMixin:
+    def setUp(self):
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        category = Category.objects.create(title="Blockchain")
+        course = Course.objects.create(category=category, teacher=self.teacher, title="Cardano 101")
+        self.quiz = Quiz.objects.create(course=course, teacher=self.teacher, title="Final", time_limit=30, max_attempts=2, min_pass_points=2)
+        self.questions = []
+        for i in range(3):
+            question = QuizQuestion.objects.create(quiz=self.quiz, question_text=f"Q{i}", points=i + 1, order=i)
+            right = QuizQuestionOption.objects.create(question=question, option_text="right", is_correct=True)
+            wrong = QuizQuestionOption.objects.create(question=question, option_text="wrong")
+            self.questions.append((question, right, wrong))
+
+    def answers(self, correct=(0, 1, 2)):
+        return [
+            {
+                "question_id": question.quiz_question_id,
+                "selected_option_id": (right if i in correct else wrong).quiz_question_option_id,
+            }
+            for i, (question, right, wrong) in enumerate(self.questions)
+        ]
+
+
+class QuizGradingTests(QuizTestMixin, APITestCase):
+    def test_grades_submission_in_memory(self):
+        attempt = quizzes.submit_attempt(self.quiz, self.student, self.answers(correct=(0, 2)))
+        self.assertEqual(attempt.attempt_number, 1)
+        self.assertEqual(attempt.score, 4)
+        self.assertEqual(QuizAnswer.objects.filter(attempt=attempt, is_correct=True).count(), 2)
+
+    def test_query_count_does_not_grow_with_answers(self):
+        with CaptureQueriesContext(connection) as queries:
+            quizzes.submit_attempt(self.quiz, self.student, self.answers()[:1])
+        few = len(queries)
+        with CaptureQueriesContext(connection) as queries:
+            quizzes.submit_attempt(self.quiz, self.student, self.answers())
+        self.assertEqual(len(queries), few)
+
+    def test_option_from_another_question_is_rejected(self):
+        answers = self.answers()
+        answers[0]["selected_option_id"] = self.questions[1][1].quiz_question_option_id
+        answers.append({"question_id": "nope"})
+        with self.assertRaises(quizzes.QuizSubmissionError) as ctx:
+            quizzes.submit_attempt(self.quiz, self.student, answers)
+        self.assertEqual([e["index"] for e in ctx.exception.errors], [0, 3])
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_attempt_limit(self):
+        quizzes.submit_attempt(self.quiz, self.student, self.answers())
+        quizzes.submit_attempt(self.quiz, self.student, self.answers())
+        with self.assertRaises(quizzes.AttemptLimitReached):
+            quizzes.submit_attempt(self.quiz, self.student, self.answers())
+
+    def test_lost_race_retries_with_next_attempt_number(self):
+        # Another request already stored attempt 1, but this one read the count before it did
+        QuizAttempt.objects.create(quiz=self.quiz, user=self.student, attempt_number=1)
+        real_create = quizzes._create_attempt
+        calls = []
+
+        def racing_create(quiz, user, **fields):
+            calls.append(1)
+            if len(calls) == 1:
+                return QuizAttempt.objects.create(quiz=quiz, user=user, attempt_number=1, **fields)
+            return real_create(quiz, user, **fields)
+
+        with mock.patch.object(quizzes, "_create_attempt", racing_create):
+            attempt = quizzes.submit_attempt(self.quiz, self.student, self.answers())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(attempt.attempt_number, 2)
+
+
+class QuizDeliveryTests(QuizTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_authenticate(self.student)
+        self.url = f"/api/v1/quiz/{self.quiz.quiz_id}/take/"
+
+    def test_payload_hides_answers_and_is_cached(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['questions']), 3)
+        for question in response.data['questions']:
+            for option in question['options']:
+                self.assertNotIn('is_correct', option)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertFalse([q for q in queries if 'api_quizquestion' in q['sql']])
+
+    def test_editing_an_option_invalidates_the_payload(self):
+        self.client.get(self.url)
+        option = self.questions[0][1]
+        option.option_text = "edited"
+        option.save()
+
+        response = self.client.get(self.url)
+        texts = [o['option_text'] for q in response.data['questions'] for o in q['options']]
+        self.assertIn("edited", texts)
+
+    def test_shuffle_is_stable_per_attempt(self):
+        for i in range(3, 12):
+            QuizQuestion.objects.create(quiz=self.quiz, question_text=f"Q{i}", order=i)
+        authored = [q['quiz_question_id'] for q in self.client.get(self.url).data['questions']]
+
+        started = self.client.post(f"/api/v1/quiz/{self.quiz.quiz_id}/attempt/start/")
+        first = [q['quiz_question_id'] for q in started.data['quiz']['questions']]
+        again = [q['quiz_question_id'] for q in self.client.get(self.url).data['questions']]
+        self.assertEqual(first, again)
+        self.assertEqual(sorted(first), sorted(authored))
+
+        QuizAttempt.objects.filter(status="In Progress").update(status="Expired")
+        self.assertEqual([q['quiz_question_id'] for q in self.client.get(self.url).data['questions']], authored)
+        started = self.client.post(f"/api/v1/quiz/{self.quiz.quiz_id}/attempt/start/")
+        next_attempt = [q['quiz_question_id'] for q in started.data['quiz']['questions']]
+        self.assertNotEqual(first, next_attempt)
+
+
+class QuizAnalyticsTests(QuizTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.others = [
+            User.objects.create_user(email=f's{i}@example.com', username=f's{i}', password='pass1234', wallet_address=f'wallet-s{i}')
+            for i in range(3)
+        ]
+        # student: 1 then 6 points; s0: 6; s1: 3; s2: 0
+        quizzes.submit_attempt(self.quiz, self.student, self.answers(correct=(0,)))
+        quizzes.submit_attempt(self.quiz, self.student, self.answers())
+        quizzes.submit_attempt(self.quiz, self.others[0], self.answers())
+        quizzes.submit_attempt(self.quiz, self.others[1], self.answers(correct=(2,)))
+        quizzes.submit_attempt(self.quiz, self.others[2], self.answers(correct=()))
+
+    def test_summary_uses_best_attempt_per_student(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = quizzes.quiz_analytics(self.quiz)
+        self.assertLessEqual(len(queries), 6)
+
+        self.assertEqual(data['total_students'], 4)
+        self.assertEqual(data['highest_score'], 6)
+        self.assertEqual(data['lowest_score'], 0)
+        self.assertEqual(data['avg_score'], 16 / 5)
+        self.assertEqual(data['pass_rate'], 75)
+        best = {row['user_id']: row for row in data['students_best_attempts']}
+        self.assertEqual(best[self.student.id]['attempt_number'], 2)
+        self.assertEqual(sorted(data['attempts_distribution']), [1, 1, 1, 2])
+
+    def test_question_stats(self):
+        data = quizzes.quiz_analytics(self.quiz)
+        first, _, third = data['questions']
+        self.assertEqual(first['answered'], 4)
+        self.assertEqual(first['difficulty'], 0.5)
+        # Both top students got it right, the bottom student did not
+        self.assertEqual(first['discrimination'], 1)
+        self.assertEqual([o['picked'] for o in third['options']], [3, 1])
+
+    def test_cached_until_next_attempt(self):
+        quizzes.quiz_analytics(self.quiz)
+        with CaptureQueriesContext(connection) as queries:
+            quizzes.quiz_analytics(self.quiz)
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            quizzes.submit_attempt(self.quiz, self.others[2], self.answers())
+        self.assertEqual(quizzes.quiz_analytics(self.quiz)['highest_score'], 6)
+        self.assertEqual(quizzes.quiz_analytics(self.quiz)['lowest_score'], 0)
+        self.assertEqual(quizzes.quiz_analytics(self.quiz)['pass_rate'], 100)
+
+
+class QuizItemAnalysisTests(QuizTestMixin, APITestCase):
+    def test_item_statistics_over_best_attempts(self):
+        others = [
+            User.objects.create_user(email=f's{i}@example.com', username=f's{i}', password='pass1234', wallet_address=f'wallet-s{i}')
+            for i in range(2)
+        ]
+        quizzes.submit_attempt(self.quiz, self.student, self.answers(correct=(0,)))
+        quizzes.submit_attempt(self.quiz, self.student, self.answers())
+        quizzes.submit_attempt(self.quiz, others[0], self.answers(correct=(2,)))
+        quizzes.submit_attempt(self.quiz, others[1], [{"question_id": self.questions[0][0].quiz_question_id}])
+
+        self.client.force_authenticate(self.student)
+        response = self.client.get(f"/api/v1/quiz/{self.quiz.quiz_id}/item-analysis/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # One source of item statistics for both endpoints
+        self.assertEqual(response.data['questions'], quizzes.quiz_analytics(self.quiz)['questions'])
+        first = response.data['questions'][0]
+
+        self.assertEqual(response.data['total_students'], 3)
+        self.assertEqual(first['answered'], 3)
+        self.assertEqual(first['difficulty'], 0.3333)
+        self.assertEqual(first['discrimination'], 1)
+        self.assertEqual(first['omitted'], 1)
+        self.assertEqual([o['picked'] for o in first['options']], [1, 1])
+        self.assertEqual(first['options'][1]['pick_rate'], 0.3333)
+        # Point-biserial is the Pearson correlation of item correctness with best score
+        expected = np.corrcoef([1, 0, 0], [6, 3, 0])[0, 1]
+        self.assertAlmostEqual(first['point_biserial'], expected, places=4)
+
+
+class QuizResultSummaryTests(QuizTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.student)
+
+    def test_status_before_any_attempt(self):
+        response = self.client.get(f"/api/v1/quiz/{self.quiz.quiz_id}/student-status/")
+        self.assertFalse(response.data['has_attempted'])
+        self.assertEqual(response.data['attempts_remaining'], 2)
+
+    def test_summary_tracks_best_attempt(self):
+        first = quizzes.submit_attempt(self.quiz, self.student, self.answers(correct=(1,)))
+        quizzes.submit_attempt(self.quiz, self.student, self.answers(correct=(0,)))
+        summary = QuizResultSummary.objects.get(quiz=self.quiz, user=self.student)
+        self.assertEqual((summary.attempts_used, summary.best_score, summary.best_attempt_id, summary.passed), (2, 2, first.pk, True))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/v1/quiz/{self.quiz.quiz_id}/student-status/")
+        self.assertEqual(len([q for q in queries if 'api_' in q['sql']]), 1)
+        self.assertEqual(response.data['total_attempts'], 2)
+        self.assertEqual(response.data['best_score'], 2)
+        self.assertTrue(response.data['passed'])
+        self.assertEqual(response.data['attempts_remaining'], 0)
+
+        response = self.client.get(f"/api/v1/quiz/{self.quiz.quiz_id}/best-attempt/")
+        self.assertEqual(response.data['attempt_id'], first.attempt_id)
+
+
+class QuizAttemptResultTests(QuizTestMixin, APITestCase):
+    def test_breakdown_is_stored_at_grading_and_served_in_one_read(self):
+        answers = self.answers(correct=(0, 2))
+        answers[1]["selected_option_id"] = None
+        attempt = quizzes.submit_attempt(self.quiz, self.student, answers)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.result_breakdown['summary'], {
+            "total_questions": 3, "correct_answers": 2, "incorrect_answers": 1, "unanswered": 1,
+        })
+
+        self.client.force_authenticate(self.student)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/v1/quiz/attempt/{attempt.attempt_id}/result/")
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['total_possible'], 6)
+        self.assertEqual(response.data['percentage'], 66.67)
+        self.assertEqual(response.data['answers_breakdown'][0]['selected_option_text'], "right")
+
+    def test_legacy_attempt_breakdown_is_filled_on_first_read(self):
+        attempt = quizzes.submit_attempt(self.quiz, self.student, self.answers())
+        QuizAttempt.objects.filter(pk=attempt.pk).update(result_breakdown=None)
+
+        self.client.force_authenticate(self.student)
+        response = self.client.get(f"/api/v1/quiz/attempt/{attempt.attempt_id}/result/")
+        self.assertEqual(response.data['summary']['correct_answers'], 3)
+        attempt.refresh_from_db()
+        self.assertIsNotNone(attempt.result_breakdown)
+
+
+class QuizAttemptCreateViewTests(QuizTestMixin, APITestCase):
+    url = "/api/v1/quiz/attempt/create/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.student)
+
+    def untimed(self):
+        self.quiz.time_limit = 0
+        self.quiz.save()
+
+    def test_submit_attempt(self):
+        self.untimed()
+        response = self.client.post(self.url, {"quiz_id": self.quiz.quiz_id, "answers": self.answers()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['score'], 6)
+        self.assertEqual(len(response.data['answers']), 3)
+
+    def test_invalid_answers_return_details(self):
+        self.untimed()
+        response = self.client.post(self.url, {"quiz_id": self.quiz.quiz_id, "answers": [{"question_id": "nope"}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['details'][0]['index'], 0)
+
+    def test_timed_quiz_needs_a_started_session(self):
+        response = self.client.post(self.url, {"quiz_id": self.quiz.quiz_id, "answers": self.answers()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(QuizAttempt.objects.exists())
@@ -0,0 +1,129 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+import tablib
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api import resources
+from api.models import Category, Course, Teacher, Variant, VariantItem
+
+User = get_user_model()
+
+
+def dataset(headers, rows):
+    return tablib.Dataset(*rows, headers=headers)
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        self.teacher = Teacher.objects.create(user=user, full_name="Jane Doe")
+        self.category = Category.objects.create(title="Blockchain", slug="blockchain")
+
+    def courses(self, count):
+        return dataset(
+            ["course_id", "title", "category", "teacher", "price"],
+            [[f"90{i:04d}", f"Course {i}", "blockchain", self.teacher.id, "10.00"] for i in range(count)],
+        )
+
+    def import_data(self, resource, data, **kwargs):
+        result = resources.RESOURCES[resource]().import_data(data, use_transactions=True, **kwargs)
+        self.assertFalse(result.has_errors(), [error.error for _, errors in result.row_errors() for error in errors])
+        self.assertFalse(result.has_validation_errors(), [row.error_dict for row in result.invalid_rows])
+        return result
+
+    def test_imports_courses_with_relations_and_slugs(self):
+        result = self.import_data("course", self.courses(3))
+
+        self.assertEqual(result.totals["new"], 3)
+        course = Course.objects.get(course_id="900001")
+        self.assertEqual(course.category, self.category)
+        self.assertEqual(course.teacher, self.teacher)
+        self.assertEqual(course.slug, "course-1_900001")
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            self.import_data("course", self.courses(2))
+        Course.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self.import_data("course", self.courses(40))
+
+        self.assertEqual(Course.objects.count(), 40)
+        self.assertEqual(len(large), len(small))
+
+    def test_reimport_updates_changed_rows_and_skips_the_rest(self):
+        self.import_data("course", self.courses(3))
+        data = self.courses(3)
+        data[0] = ("900000", "Renamed", "blockchain", self.teacher.id, "10.00")
+
+        result = self.import_data("course", data)
+
+        self.assertEqual((result.totals["new"], result.totals["update"], result.totals["skip"]), (0, 1, 2))
+        self.assertEqual(Course.objects.get(course_id="900000").title, "Renamed")
+        self.assertEqual(Course.objects.count(), 3)
+
+    def test_dry_run_writes_nothing(self):
+        result = self.import_data("course", self.courses(3), dry_run=True)
+
+        self.assertEqual(result.totals["new"], 3)
+        self.assertFalse(Course.objects.exists())
+
+    def test_blank_public_id_generates_one(self):
+        course = Course.objects.create(category=self.category, teacher=self.teacher, title="Solidity")
+        self.import_data("variant", dataset(["variant_id", "course", "title"], [["", course.course_id, "Intro"]]))
+
+        variant = Variant.objects.get()
+        self.assertEqual(variant.course, course)
+        self.assertTrue(variant.variant_id)
+
+    def test_curriculum_import_bumps_course_version(self):
+        course = Course.objects.create(category=self.category, teacher=self.teacher, title="Solidity")
+        variant = Variant.objects.create(course=course, title="Intro")
+        stale = timezone.now() - timedelta(days=1)
+        Course.objects.filter(pk=course.pk).update(updated_at=stale)
+
+        self.import_data(
+            "variant_item",
+            dataset(["variant_item_id", "variant", "title", "preview"], [["", variant.variant_id, "Welcome", "1"]]),
+        )
+
+        self.assertEqual(VariantItem.objects.get().variant, variant)
+        course.refresh_from_db()
+        self.assertGreater(course.updated_at, stale)
+
+    def test_unknown_foreign_key_is_reported(self):
+        result = resources.CourseResource().import_data(
+            dataset(["course_id", "title", "category", "teacher"], [["900000", "Orphan", "missing", self.teacher.id]]),
+            use_transactions=True,
+        )
+
+        self.assertTrue(result.has_errors() or result.has_validation_errors())
+        self.assertFalse(Course.objects.exists())
+
+    def test_import_catalog_command(self):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as csv_file:
+            csv_file.write(self.courses(2).export("csv"))
+        self.addCleanup(os.remove, path)
+
+        out = StringIO()
+        call_command("import_catalog", "course", path, "--dry-run", stdout=out)
+        self.assertIn("Would import 2 course rows: 2 new", out.getvalue())
+        self.assertFalse(Course.objects.exists())
+
+        out = StringIO()
+        call_command("import_catalog", "course", path, stdout=out)
+        self.assertIn("Imported 2 course rows: 2 new", out.getvalue())
+        self.assertEqual(Course.objects.count(), 2)
+
+    def test_import_catalog_command_rejects_unknown_format(self):
+        with self.assertRaises(CommandError):
+            call_command("import_catalog", "course", "courses.txt", stdout=StringIO())
@@ -0,0 +1,75 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from api.models import Teacher, Category, Course, Note, Question_Answer, Question_Answer_Message
+from api import search
+
+User = get_user_model()
+
+
+class InvertedIndexTests(APITestCase):
+    def test_every_term_must_match_and_title_weighs_more(self):
+        index = search.InvertedIndex()
+        index.add(1, ("Plutus basics", 2.0), ("validators and datums", 1.0))
+        index.add(2, ("Week two", 2.0), ("plutus validators compile to UPLC", 1.0))
+        index.add(3, ("Marlowe", 2.0), ("contracts", 1.0))
+        self.assertEqual([doc for doc, _ in index.search("Plutus validators")], [1, 2])
+        self.assertEqual(index.search("plutus marlowe"), [])
+        self.assertEqual(index.headline("plutus validators compile", "validators"), "plutus <b>validators</b> compile")
+
+
+class SearchEndpointTests(APITestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user(email='teacher@example.com', username='teacher', password='pass1234', wallet_address='wallet-teacher')
+        teacher = Teacher.objects.create(user=teacher_user, full_name="Jane Doe")
+        self.course = Course.objects.create(category=Category.objects.create(title="Blockchain"), teacher=teacher, title="Cardano 101")
+        self.student = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+        self.other = User.objects.create_user(email='other@example.com', username='other', password='pass1234', wallet_address='wallet-other')
+
+    def test_notes_are_searched_per_user(self):
+        mine = Note.objects.create(user=self.student, course=self.course, title="Staking", note="Delegation keeps custody of the stake")
+        Note.objects.create(user=self.student, course=self.course, title="Minting", note="Policies lock minting")
+        Note.objects.create(user=self.other, course=self.course, title="Staking too", note="stake pools")
+
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get("/api/v1/student/note-search/", {"q": "stake"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([note["id"] for note in response.data], [mine.id])
+        self.assertIn("<b>stake</b>", response.data[0]["headline"])
+        self.assertEqual(self.client.get("/api/v1/student/note-search/", {"q": " "}).data, [])
+
+    def test_note_search_rejects_a_malformed_course_id(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get("/api/v1/student/note-search/", {"q": "stake", "course_id": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("course_id", response.data)
+        response = self.client.get("/api/v1/student/note-search/", {"q": "stake", "course_id": self.course.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_question_answer_search_covers_titles_and_messages(self):
+        thread = Question_Answer.objects.create(course=self.course, user=self.student, title="Wallet not syncing")
+        Question_Answer_Message.objects.create(course=self.course, question=thread, user=self.student, message="Stuck at 80%")
+        other = Question_Answer.objects.create(course=self.course, user=self.other, title="Fees")
+        reply = Question_Answer_Message.objects.create(course=self.course, question=other, user=self.other, message="Restart the wallet first")
+
+        response = self.client.get(f"/api/v1/student/question-answer-search/{self.course.id}/", {"q": "wallet"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(hit["type"], hit["qa_id"], hit["qam_id"]) for hit in response.data],
+            [("thread", thread.qa_id, None), ("message", other.qa_id, reply.qam_id)],
+        )
+
+    def test_headlines_escape_user_markup(self):
+        thread = Question_Answer.objects.create(course=self.course, user=self.other, title="Wallet help")
+        Question_Answer_Message.objects.create(course=self.course, question=thread, user=self.other, message="<script>alert('x')</script> wallet & keys")
+        Note.objects.create(user=self.student, course=self.course, title="Staking", note="<img src=x onerror=alert(1)> stake")
+
+        response = self.client.get(f"/api/v1/student/question-answer-search/{self.course.id}/", {"q": "keys"})
+        headline = response.data[0]["headline"]
+        self.assertNotIn("<", headline.replace("<b>", "").replace("</b>", ""))
+        self.assertIn("&lt;/script&gt;", headline)
+        self.assertIn("&amp; <b>keys</b>", headline)
+
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get("/api/v1/student/note-search/", {"q": "stake"})
+        self.assertEqual(response.data[0]["headline"], "img src=x onerror=alert(1)&gt; <b>stake</b>")
@@ -1,12 +1,11 @@
 from api import views as api_views
 from django.urls import path
 
-from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
     # Authentication Endpoints
     path("user/token/", api_views.MyTokenObtainPairView.as_view()),
-    path("user/token/refresh/", TokenRefreshView.as_view()),
+    path("user/token/refresh/", api_views.MyTokenRefreshView.as_view()),
     path("user/register/", api_views.RegisterView.as_view()),
     path("user/password-reset/<email>/", api_views.PasswordResetEmailVerifyAPIView.as_view()),
     path("user/password-change/", api_views.PasswordChangeAPIView.as_view()),
@@ -18,6 +17,7 @@ urlpatterns = [
     path("course/course-list/", api_views.CourseListAPIView.as_view()),
     path("course/search/", api_views.SearchCourseAPIView.as_view()),
     path("course/course-detail/<slug>/", api_views.CourseDetailAPIView.as_view()),
+    path("course/leaderboard/<course_id>/", api_views.CourseLeaderboardAPIView.as_view()),
     path("course/cart/", api_views.CartAPIView.as_view()),
     path("course/cart-list/<cart_id>/", api_views.CartListAPIView.as_view()),
     path("cart/stats/<cart_id>/", api_views.CartStatsAPIView.as_view()),
@@ -33,14 +33,21 @@ urlpatterns = [
     path("student/summary/<user_id>/", api_views.StudentSummaryAPIView.as_view()),
     path("student/course-list/<user_id>/", api_views.StudentCourseListAPIView.as_view()),
     path("student/course-detail/<user_id>/<enrollment_id>/", api_views.StudentCourseDetailAPIView.as_view()),
+    path("student/course-player/<enrollment_id>/", api_views.StudentCoursePlayerAPIView.as_view()),
+    path("student/course-player/<enrollment_id>/notes/", api_views.StudentCoursePlayerNoteListAPIView.as_view()),
     path("student/course-completed/", api_views.StudentCourseCompletedCreateAPIView.as_view()),
     path("student/course-note/<user_id>/<enrollment_id>/", api_views.StudentNoteCreateAPIView.as_view()),
     path("student/course-note-detail/<user_id>/<enrollment_id>/<note_id>/", api_views.StudentNoteDetailAPIView.as_view()),
+    path("student/note-search/", api_views.StudentNoteSearchAPIView.as_view()),
     path("student/rate-course/", api_views.StudentRateCourseCreateAPIView.as_view()),
     path("student/review-detail/<user_id>/<review_id>/", api_views.StudentRateCourseUpdateAPIView.as_view()),
     path("student/wishlist/<user_id>/", api_views.StudentWishListListCreateAPIView.as_view()),
     path("student/question-answer-list-create/<course_id>/", api_views.QuestionAnswerListCreateAPIView.as_view()),
     path("student/question-answer-message-create/", api_views.QuestionAnswerMessageSendAPIView.as_view()),
+    path("student/question-answer-threads/<course_id>/", api_views.QuestionAnswerThreadListAPIView.as_view()),
+    path("student/question-answer-messages/<qa_id>/", api_views.QuestionAnswerThreadMessageListAPIView.as_view()),
+    path("student/question-answer-search/<course_id>/", api_views.QuestionAnswerSearchAPIView.as_view()),
+    path("student/noti-unread-count/<user_id>/", api_views.StudentNotificationUnreadCountAPIView.as_view()),
 
     # EXPERIMENTAL
 
@@ -60,11 +67,15 @@ urlpatterns = [
     path("teacher/all-months-earning/<teacher_id>/", api_views.TeacherAllMonthEarningAPIView),
     path("teacher/best-course-earning/<teacher_id>/", api_views.TeacherBestSellingCourseAPIView.as_view({'get': 'list'})),
     path("teacher/course-order-list/<teacher_id>/", api_views.TeacherCourseOrdersListAPIView.as_view()),
+    path("teacher/export/<dataset>/<export_format>/", api_views.TeacherExportAPIView.as_view()),
     path("teacher/question-answer-list/<teacher_id>/", api_views.TeacherQuestionAnswerListAPIView.as_view()),
+    path("teacher/question-answer-threads/<teacher_id>/", api_views.TeacherQuestionAnswerThreadListAPIView.as_view()),
     path("teacher/coupon-list/<teacher_id>/", api_views.TeacherCouponListCreateAPIView.as_view()),
     path("teacher/coupon-detail/<teacher_id>/<coupon_id>/", api_views.TeacherCouponDetailAPIView.as_view()),
     path("teacher/noti-list/<teacher_id>/", api_views.TeacherNotificationListAPIView.as_view()),
     path("teacher/noti-detail/<teacher_id>/<noti_id>", api_views.TeacherNotificationDetailAPIView.as_view()),
+    path("teacher/noti-unread-count/<teacher_id>/", api_views.TeacherNotificationUnreadCountAPIView.as_view()),
+    path("teacher/noti-mark-seen/<teacher_id>/", api_views.TeacherNotificationMarkSeenAPIView.as_view()),
     path("teacher/course-create/", api_views.CourseCreateAPIView.as_view()),
     path("teacher/course-update/<teacher_id>/<course_id>/", api_views.CourseUpdateAPIView.as_view()),
     path("teacher/course-detail/<course_id>/", api_views.TeacherCourseDetailAPIView.as_view()),
@@ -73,6 +84,9 @@ urlpatterns = [
 
     path("file-upload/", api_views.FileUploadAPIView.as_view()),
 
+    # Realtime (ASGI) Endpoints
+    path("realtime/stream/", api_views.RealtimeEventStreamView),
+
     # NFT Endpoints
     # path("nft/", api_views.NFTListCreateAPIView.as_view()),
     # path("nft/<str:policy_id>/", api_views.NFTDetailAPIView.as_view()),
@@ -89,7 +103,11 @@ urlpatterns = [
     path("quiz/create/", api_views.QuizCreateAPIView.as_view()),
     path("quiz/<str:quiz_id>/", api_views.QuizDetailAPIView.as_view()),
     path("quiz/question/create/", api_views.QuizQuestionCreateAPIView.as_view()),
+    path("quiz/<str:quiz_id>/questions/import/", api_views.QuizQuestionImportAPIView.as_view()),
     path("quiz/attempt/create/", api_views.QuizAttemptCreateAPIView.as_view()),
+    path("quiz/<str:quiz_id>/attempt/start/", api_views.QuizAttemptStartAPIView.as_view()),
+    path("quiz/attempt/<str:attempt_id>/autosave/", api_views.QuizAttemptAutosaveAPIView.as_view()),
+    path("quiz/attempt/<str:attempt_id>/submit/", api_views.QuizAttemptSubmitAPIView.as_view()),
     path("quiz/attempts/<str:quiz_id>/", api_views.QuizAttemptListAPIView.as_view()),
     path("quiz/<str:quiz_id>/update/", api_views.QuizUpdateAPIView.as_view()),
     path("quiz/<str:quiz_id>/delete/", api_views.QuizDeleteAPIView.as_view()),
@@ -100,6 +118,8 @@ urlpatterns = [
     path("quiz/<str:quiz_id>/take/", api_views.TakeQuizAPIView.as_view()),
     path("quiz/<str:quiz_id>/best-attempt/", api_views.QuizBestAttemptAPIView.as_view()),
     path("quiz/<str:quiz_id>/analytics/", api_views.QuizAnalyticsAPIView.as_view()),
+    path("quiz/<str:quiz_id>/item-analysis/", api_views.QuizItemAnalysisAPIView.as_view()),
+    path("quiz/<str:quiz_id>/leaderboard/", api_views.QuizLeaderboardAPIView.as_view()),
     path("quiz/attempt/<str:attempt_id>/result/", api_views.QuizAttemptResultAPIView.as_view()),
     path("quiz/<str:quiz_id>/student-status/", api_views.QuizStudentStatusAPIView.as_view()),
 ]
@@ -1,30 +1,51 @@
-from django.shortcuts import render, redirect
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.shortcuts import render, redirect, get_object_or_404
 from django.conf import settings
 from django.contrib.auth.hashers import check_password
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.db.models.functions import ExtractMonth
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.utils import timezone
 
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from asgiref.sync import sync_to_async
 
 from api import serializer as api_serializer
 from api import models as api_models
+from api import notifications
+from api import realtime
+from api import payments
+from api import quizzes
+from api import quiz_sessions
+from api import quiz_import
+from api import leaderboards
+from api import player
+from api import qa
+from api import search
+from api import exports
+from api import principals
+from api import authentication
+from api import outbox
+from userauths import password_reset
 from userauths.models import User, Profile
 from api.models import LEVEL, LANGUAGE
 
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework import generics, status, viewsets
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, APIView
 
 
-import random
+import json
+import time
 from decimal import Decimal
 # import stripe
 import requests
@@ -42,89 +63,73 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-import razorpay
-
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-
 # stripe.api_key = settings.STRIPE_SECRET_KEY
 PAYPAL_CLIENT_ID = settings.PAYPAL_CLIENT_ID
 PAYPAL_SECRET_ID = settings.PAYPAL_SECRET_ID
 
 
+def keyset_param(request, name):
+    """Integer from the query string (?before=, ?course_id=), None when absent; 400 on junk"""
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "Must be an integer"})
+
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = api_serializer.MyTokenObtainPairSerializer
 
+class MyTokenRefreshView(TokenRefreshView):
+    serializer_class = api_serializer.MyTokenRefreshSerializer
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
     serializer_class = api_serializer.RegisterSerializer
 
-def generate_random_otp(length=7):
-    otp = ''.join([str(random.randint(0, 9)) for _ in range(length)])
-    return otp
-
-class PasswordResetEmailVerifyAPIView(generics.RetrieveAPIView):
+class PasswordResetEmailVerifyAPIView(APIView):
     permission_classes = [AllowAny]
-    serializer_class = api_serializer.UserSerializer
-
-    def get_object(self):
-        email = self.kwargs['email'] 
+    # Per client, then per address, so neither the table nor one inbox can be flooded
+    throttle_classes = [ScopedRateThrottle, password_reset.PasswordResetEmailThrottle]
+    throttle_scope = "password_reset"
+    throttle_email_scope = "password_reset_email"
 
+    def get(self, request, email):
         user = User.objects.filter(email=email).first()
 
         if user:
-            uuidb64 = user.pk
-            refresh = RefreshToken.for_user(user)
-            refresh_token = str(refresh.access_token)
-
-            user.refresh_token = refresh_token
-            user.otp = generate_random_otp()
-            user.save()
-
-            link = f"https://web3lmsfrontendcardano.vercel.app/create-new-password/?otp={user.otp}&uuidb64={uuidb64}&refresh_token={refresh_token}"
+            otp = password_reset.issue(user)
+            link = f"https://web3lmsfrontendcardano.vercel.app/create-new-password/?otp={otp}&uuidb64={user.pk}"
 
             context = {
                 "link": link,
                 "username": user.username
             }
+            outbox.queue(user.email, "Password Rest Email", "email/password_reset", context)
 
-            subject = "Password Rest Email"
-            text_body = render_to_string("email/password_reset.txt", context)
-            html_body = render_to_string("email/password_reset.html", context)
-
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                from_email=settings.FROM_EMAIL,
-                to=[user.email],
-                body=text_body
-            )
-
-            msg.attach_alternative(html_body, "text/html")
-            msg.send()
+        # Same answer either way, so the endpoint does not reveal who has an account
+        return Response({"message": "If the email is registered, a password reset link has been sent"})
 
-            print("link ======", link)
-        return user
-    
 class PasswordChangeAPIView(generics.CreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = api_serializer.UserSerializer
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "password_change"
 
     def create(self, request, *args, **kwargs):
         otp = request.data['otp']
         uuidb64 = request.data['uuidb64']
         password = request.data['password']
 
-        user = User.objects.get(id=uuidb64, otp=otp)
-        if user:
-            user.set_password(password)
-            # user.otp = ""
-            user.save()
+        try:
+            password_reset.reset_password(uuidb64, otp, password)
+        except (password_reset.InvalidResetCode, ValueError):
+            return Response({"message": "Reset code is invalid or has expired"}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({"message": "Password Changed Successfully"}, status=status.HTTP_201_CREATED)
-        else:
-            return Response({"message": "User Does Not Exists"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": "Password Changed Successfully"}, status=status.HTTP_201_CREATED)
 
 class ChangePasswordAPIView(generics.CreateAPIView):
     serializer_class = api_serializer.UserSerializer
@@ -153,8 +158,7 @@ class ProfileAPIView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         try:
             user_id = self.kwargs['user_id']
-            user = User.objects.get(id=user_id)
-            return Profile.objects.get(user=user)
+            return Profile.objects.get(user_id=user_id)
         except:
             return None
 
@@ -180,13 +184,16 @@ class TeacherCourseDetailAPIView(generics.RetrieveAPIView):
     
 def get_tax_rate(country_name):
     """Helper function to get tax rate for a country"""
-    try:
-        country_object = api_models.Country.objects.filter(name=country_name).first()
-        if country_object:
-            return Decimal(country_object.tax_rate) / Decimal(100)
-        return Decimal('0')
-    except:
-        return Decimal('0')
+    return get_tax_rates([country_name]).get(country_name, Decimal('0'))
+
+def get_tax_rates(country_names):
+    """Tax rates for several countries with one query, keyed by country name"""
+    rates = {}
+    countries = api_models.Country.objects.filter(name__in=set(country_names)).order_by('id').values_list('name', 'tax_rate')
+    for name, tax_rate in countries:
+        # Names are not unique; the oldest row wins, as with .first()
+        rates.setdefault(name, Decimal(tax_rate) / Decimal(100))
+    return rates
 
 class CartAPIView(generics.CreateAPIView):
     queryset = api_models.Cart.objects.all()
@@ -309,63 +316,80 @@ class CreateOrderAPIView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
-        print(request.headers.get('Authorization'))
         full_name = request.data['full_name']
         email = request.data['email']
         country = request.data['country']
         cart_id = request.data['cart_id']
-        user_id = request.user.id
+        user = request.user if request.user.is_authenticated else None
+        idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key') or None
 
-        if user_id != 0:
-            user = User.objects.get(id=user_id)
-        else:
-            user = None
+        if idempotency_key and user:
+            existing = api_models.CartOrder.objects.filter(student=user, idempotency_key=idempotency_key).first()
+            if existing:
+                return self.replayed(existing)
 
-        cart_items = api_models.Cart.objects.filter(cart_id=cart_id)
+        try:
+            order = self.create_order(cart_id, full_name, email, country, user, idempotency_key)
+        except IntegrityError:
+            # A concurrent retry with the same key won the race
+            if not (idempotency_key and user):
+                raise
+            existing = api_models.CartOrder.objects.get(student=user, idempotency_key=idempotency_key)
+            return self.replayed(existing)
+
+        return Response({"message": "Order Created Successfully", "order_oid": order.oid}, status=status.HTTP_201_CREATED)
+
+    def replayed(self, order):
+        return Response({"message": "Order Created Successfully", "order_oid": order.oid}, status=status.HTTP_200_OK)
+
+    def create_order(self, cart_id, full_name, email, country, user, idempotency_key):
+        """Create the order and its items as one unit with a constant number of queries"""
+        cart_items = list(api_models.Cart.objects.filter(cart_id=cart_id).select_related('course__teacher'))
+        tax_rates = get_tax_rates(c.country for c in cart_items)
 
         total_price = Decimal('0.00')
         total_tax = Decimal('0.00')
-        total_initial_total = Decimal('0.00')
         total_total = Decimal('0.00')
-
-        order = api_models.CartOrder.objects.create(
-            full_name=full_name,
-            email=email,
-            country=country,
-            student=user
-        )
+        order_items = []
 
         for c in cart_items:
             # Recalculate tax to ensure consistency
-            tax_rate = get_tax_rate(c.country)
+            tax_rate = tax_rates.get(c.country, Decimal('0'))
             price_decimal = Decimal(str(c.price))
             tax_fee = price_decimal * tax_rate
             total = price_decimal + tax_fee
 
-            api_models.CartOrderItem.objects.create(
-                order=order,
+            order_items.append(api_models.CartOrderItem(
                 course=c.course,
                 price=price_decimal,
                 tax_fee=tax_fee,
                 total=total,
                 initial_total=total,
                 teacher=c.course.teacher
-            )
+            ))
 
             total_price += price_decimal
             total_tax += tax_fee
-            total_initial_total += total
             total_total += total
 
-            order.teachers.add(c.course.teacher)
-
-        order.sub_total = total_price
-        order.tax_fee = total_tax
-        order.initial_total = total_initial_total
-        order.total = total_total
-        order.save()
+        with transaction.atomic():
+            order = api_models.CartOrder.objects.create(
+                full_name=full_name,
+                email=email,
+                country=country,
+                student=user,
+                idempotency_key=idempotency_key,
+                sub_total=total_price,
+                tax_fee=total_tax,
+                initial_total=total_total,
+                total=total_total,
+            )
+            for item in order_items:
+                item.order = order
+            api_models.CartOrderItem.objects.bulk_create(order_items)
+            order.teachers.add(*{item.teacher_id for item in order_items})
 
-        return Response({"message": "Order Created Successfully", "order_oid": order.oid}, status=status.HTTP_201_CREATED)
+        return order
 
 class CheckoutAPIView(generics.RetrieveAPIView):
     serializer_class = api_serializer.CartOrderSerializer
@@ -429,159 +453,133 @@ class CouponApplyAPIView(generics.CreateAPIView):
             return Response({"message": "Coupon Not Found", "icon": "error"}, status=status.HTTP_404_NOT_FOUND)
 
 
+def parse_request_data(request):
+    """Body of a plain Django request as a dict, whether sent as JSON or as a form"""
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+    return request.POST.dict()
+
+async def authenticate_jwt(request):
+    """
+    Resolve the bearer token of a plain (non-DRF) async view to a user, or
+    None. Like the DRF views it trusts the claims and loads no User row.
+    """
+    try:
+        result = await sync_to_async(authentication.ClaimsJWTAuthentication().authenticate)(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+def payment_error_response(message, status_code):
+    return JsonResponse({'status': 'failure', 'message': message}, status=status_code)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
-class RazorpayCheckoutAPIView(generics.CreateAPIView):
-    serializer_class = api_serializer.CartOrderSerializer
-    permission_classes = [AllowAny]
+class RazorpayCheckoutAPIView(View):
+    """
+    Async so that waiting on the provider only costs a coroutine; the HTTP
+    call goes through the pooled, time-limited gateway in api.payments.
+    """
 
-    def create(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         order_oid = self.kwargs['order_oid']
         try:
-            order = api_models.CartOrder.objects.get(oid=order_oid)
+            order = await api_models.CartOrder.objects.aget(oid=order_oid)
         except api_models.CartOrder.DoesNotExist:
-            return Response({"message": "Order Not Found"}, status=status.HTTP_404_NOT_FOUND)
-        
+            return JsonResponse({"message": "Order Not Found"}, status=status.HTTP_404_NOT_FOUND)
+
         try:
             # Create Razorpay Order
-            razorpay_order = razorpay_client.order.create({
-                'amount': float(order.total) * 100, 
-                'currency': 'INR',
-                'receipt': order.oid,
-                'payment_capture': '1'
-            })
+            razorpay_order = await payments.get_gateway().create_order(
+                amount=order.total,
+                currency='INR',
+                receipt=order.oid,
+            )
+        except payments.CircuitOpenError as e:
+            return JsonResponse({"message": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except payments.PaymentProviderError as e:
+            return JsonResponse({
+                "message": f"Error creating Razorpay order: {str(e)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            order.razorpay_order_id = razorpay_order['id']
-            order.save()
-
-            # Prepare checkout data for frontend
-            checkout_data = {
-                'key': settings.RAZORPAY_KEY_ID,
-                'amount': float(order.total),
-                'currency': 'INR',
-                'name': 'Knowledge Ledger',   #TODO: CHanged this from Web3Lms to Knowledge Ledger
-                'description': f'Payment for order {order.oid} of {order.total} by {order.full_name} ({order.email})',
-                'order_id': razorpay_order['id'],
-                'callback_url': f'{settings.FRONTEND_SITE_URL}/payment/success',
-                'prefill': {
-                    'name': order.full_name,
-                    'email': order.email,
-                },
-                'notes': {
-                    'order_id': order.oid,
-                    'date' : order.date,
-                    'full_name' : order.full_name,
-                    'email': order.email,
-                    'sub_total' : order.sub_total,
-                    'tax_fee' : order.tax_fee,
-                    'total' : order.total,
-                    'country' : order.country
-                },
-                'theme': {
-                    'color': '#4F46E5'
-                }
+        order.razorpay_order_id = razorpay_order['id']
+        await order.asave(update_fields=['razorpay_order_id'])
+
+        # Prepare checkout data for frontend
+        checkout_data = {
+            'key': settings.RAZORPAY_KEY_ID,
+            'amount': float(order.total),
+            'currency': 'INR',
+            'name': 'Knowledge Ledger',   #TODO: CHanged this from Web3Lms to Knowledge Ledger
+            'description': f'Payment for order {order.oid} of {order.total} by {order.full_name} ({order.email})',
+            'order_id': razorpay_order['id'],
+            'callback_url': f'{settings.FRONTEND_SITE_URL}/payment/success',
+            'prefill': {
+                'name': order.full_name,
+                'email': order.email,
+            },
+            'notes': {
+                'order_id': order.oid,
+                'date' : order.date,
+                'full_name' : order.full_name,
+                'email': order.email,
+                'sub_total' : order.sub_total,
+                'tax_fee' : order.tax_fee,
+                'total' : order.total,
+                'country' : order.country
+            },
+            'theme': {
+                'color': '#4F46E5'
             }
+        }
 
-            return Response(checkout_data)
-        except Exception as e:
-            return Response({
-                "message": f"Error creating Razorpay order: {str(e)}"
-            }, status=status.HTTP_400_BAD_REQUEST)
+        return JsonResponse(checkout_data)
 
 @method_decorator(csrf_exempt, name='dispatch')
-class PaymentSuccessAPIView(generics.CreateAPIView):
-    serializer_class = api_serializer.CartOrderSerializer
-    permission_classes = [IsAuthenticated]
+class PaymentSuccessAPIView(View):
 
-    def create(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
+        if await authenticate_jwt(request) is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # Get payment details from request
+        data = parse_request_data(request)
+        payment_id = data.get('razorpay_payment_id')
+        order_id = data.get('razorpay_order_id')
+        signature = data.get('razorpay_signature')
+        order_oid = data.get('order_oid')
+
+        # Get the order
         try:
-            # Get payment details from request
-            payment_id = request.data.get('razorpay_payment_id')
-            order_id = request.data.get('razorpay_order_id')
-            signature = request.data.get('razorpay_signature')
-            order_oid = request.data.get('order_oid')
-
-            # Get the order
-            order = api_models.CartOrder.objects.get(oid=order_oid)
-            order_items = api_models.CartOrderItem.objects.filter(order=order)
-
-            # Verify signature
-            params_dict = {
-                'razorpay_payment_id': payment_id,
-                'razorpay_order_id': order_id,
-                'razorpay_signature': signature
-            }
+            order = await api_models.CartOrder.objects.select_related('student').aget(oid=order_oid)
+        except api_models.CartOrder.DoesNotExist:
+            return payment_error_response('Order not found', status.HTTP_404_NOT_FOUND)
 
-            try:
-                razorpay_client.utility.verify_payment_signature(params_dict)
-            except Exception:
-                return Response({
-                    'status': 'failure',
-                    'message': 'Payment verification failed'
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-            # Update order
-            if order.payment_status == "Processing":
-                order.payment_status = "Paid"
-                order.razorpay_payment_id = payment_id
-                order.razorpay_signature = signature
-                order.save()
-
-                # Delete cart items after successful payment
-                cart_id = None
-                # Try to get cart_id from one of the order items
-                if order_items.exists():
-                    first_cart_item = order_items.first()
-                    # Try to find the cart with this course and user to get the cart_id
-                    cart = api_models.Cart.objects.filter(course=first_cart_item.course, user=order.student).first()
-                    if cart:
-                        cart_id = cart.cart_id
-                if cart_id:
-                    api_models.Cart.objects.filter(cart_id=cart_id).delete()
-
-                # Create notifications and enrolled courses
-                api_models.Notification.objects.create(
-                    user=order.student,
-                    order=order,
-                    type="Course Enrollment Completed"
-                )
+        # Verify signature (a local HMAC check, no provider round trip)
+        if order_id != order.razorpay_order_id or not payments.get_gateway().verify_payment_signature(order_id, payment_id, signature):
+            return payment_error_response('Payment verification failed', status.HTTP_400_BAD_REQUEST)
 
-                for item in order_items:
-                    api_models.Notification.objects.create(
-                        teacher=item.teacher,
-                        order=order,
-                        order_item=item,
-                        type="New Order"
-                    )
-                    api_models.EnrolledCourse.objects.create(
-                        course=item.course,
-                        user=order.student,
-                        teacher=item.teacher,
-                        order_item=item
-                    )
+        try:
+            confirmed = await sync_to_async(payments.confirm_order_payment)(order.pk, payment_id, signature, order_id)
+        except Exception as e:
+            return payment_error_response(str(e), status.HTTP_400_BAD_REQUEST)
 
-                return Response({
-                    'status': 'success',
-                    'message': 'Payment successful',
-                    'order_id': order.oid,
-                    'payment_id': payment_id,
-                    'signature': signature
-                })
-            
-            return Response({
+        if confirmed:
+            return JsonResponse({
                 'status': 'success',
-                'message': 'Payment already processed'
+                'message': 'Payment successful',
+                'order_id': order.oid,
+                'payment_id': payment_id,
+                'signature': signature
             })
 
-        except api_models.CartOrder.DoesNotExist:
-            return Response({
-                'status': 'failure',
-                'message': 'Order not found'
-            }, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({
-                'status': 'failure',
-                'message': str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
+        return JsonResponse({
+            'status': 'success',
+            'message': 'Payment already processed'
+        })
 
 
 class SearchCourseAPIView(generics.ListAPIView):
@@ -599,11 +597,10 @@ class StudentSummaryAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        user = User.objects.get(id=user_id)
 
-        total_courses = api_models.EnrolledCourse.objects.filter(user=user).count()
-        completed_lessons = api_models.CompletedLesson.objects.filter(user=user).count()
-        achieved_certificates = api_models.Certificate.objects.filter(user=user).count()
+        total_courses = api_models.EnrolledCourse.objects.filter(user_id=user_id).count()
+        completed_lessons = api_models.CompletedLesson.objects.filter(user_id=user_id).count()
+        achieved_certificates = api_models.Certificate.objects.filter(user_id=user_id).count()
 
         return [{
             "total_courses": total_courses,
@@ -622,8 +619,7 @@ class StudentCourseListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        user =  User.objects.get(id=user_id)
-        return api_models.EnrolledCourse.objects.filter(user=user)
+        return api_models.EnrolledCourse.objects.filter(user_id=user_id)
 
 class StudentCourseDetailAPIView(generics.RetrieveAPIView):
     serializer_class = api_serializer.EnrolledCourseSerializer
@@ -634,8 +630,7 @@ class StudentCourseDetailAPIView(generics.RetrieveAPIView):
         user_id = self.kwargs['user_id']
         enrollment_id = self.kwargs['enrollment_id']
 
-        user = User.objects.get(id=user_id)
-        return api_models.EnrolledCourse.objects.get(user=user, enrollment_id=enrollment_id)
+        return api_models.EnrolledCourse.objects.get(user_id=user_id, enrollment_id=enrollment_id)
         
 class StudentCourseCompletedCreateAPIView(generics.CreateAPIView):
     serializer_class = api_serializer.CompletedLessonSerializer
@@ -654,10 +649,12 @@ class StudentCourseCompletedCreateAPIView(generics.CreateAPIView):
 
         if completed_lessons:
             completed_lessons.delete()
+            leaderboards.lesson_progress_changed(course.id, user.id, -1)
             return Response({"message": "Course marked as not completed"})
 
         else:
             api_models.CompletedLesson.objects.create(user=user, course=course, variant_item=variant_item)
+            leaderboards.lesson_progress_changed(course.id, user.id, 1)
             return Response({"message": "Course marked as completed"})
 
 class StudentNoteCreateAPIView(generics.ListCreateAPIView):
@@ -668,10 +665,8 @@ class StudentNoteCreateAPIView(generics.ListCreateAPIView):
         user_id = self.kwargs['user_id']
         enrollment_id = self.kwargs['enrollment_id']
 
-        user = User.objects.get(id=user_id)
-        enrolled = api_models.EnrolledCourse.objects.get(enrollment_id=enrollment_id)
-        
-        return api_models.Note.objects.filter(user=user, course=enrolled.course)
+        course_id = api_models.EnrolledCourse.objects.filter(enrollment_id=enrollment_id).values('course_id')[:1]
+        return api_models.Note.objects.filter(user_id=user_id, course_id=course_id)
 
     def create(self, request, *args, **kwargs):
         user_id = request.data['user_id']
@@ -695,11 +690,63 @@ class StudentNoteDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         enrollment_id = self.kwargs['enrollment_id']
         note_id = self.kwargs['note_id']
 
-        user = User.objects.get(id=user_id)
-        enrolled = api_models.EnrolledCourse.objects.get(enrollment_id=enrollment_id)
-        note = api_models.Note.objects.get(user=user, course=enrolled.course, id=note_id)
+        enrolled = api_models.EnrolledCourse.objects.only('course_id').get(enrollment_id=enrollment_id)
+        note = api_models.Note.objects.get(user_id=user_id, course_id=enrolled.course_id, id=note_id)
         return note
 
+class StudentCoursePlayerAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, enrollment_id):
+        # Shared curriculum snapshot plus the student's own progress; notes and Q&A load separately
+        enrolled = player.enrollment(enrollment_id, request.user)
+        if not enrolled:
+            return Response({'error': 'Enrollment not found'}, status=status.HTTP_404_NOT_FOUND)
+        course = player.curriculum(enrolled.course)
+        return Response({
+            "enrollment_id": enrolled.enrollment_id,
+            "course": course,
+            "progress": player.progress(enrolled, course),
+        })
+
+    def post(self, request, enrollment_id):
+        enrolled = player.enrollment(enrollment_id, request.user)
+        if not enrolled:
+            return Response({'error': 'Enrollment not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            position = int(request.data.get('position', 0))
+        except (TypeError, ValueError):
+            return Response({'error': 'position must be a whole number of seconds'}, status=status.HTTP_400_BAD_REQUEST)
+        if not player.record_position(enrolled, request.data.get('variant_item_id'), position):
+            return Response({'error': 'Lesson not found in this course'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "Position saved"})
+
+class StudentCoursePlayerNoteListAPIView(generics.ListAPIView):
+    serializer_class = api_serializer.NoteSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        enrolled = get_object_or_404(api_models.EnrolledCourse, enrollment_id=self.kwargs['enrollment_id'], user=self.request.user)
+        # Newest first; clients page back with ?before=<smallest id seen>
+        return player.notes_page(
+            enrolled,
+            before=keyset_param(self.request, 'before'),
+            limit=self.request.GET.get('limit', player.NOTES_PAGE_SIZE),
+        )
+
+class StudentNoteSearchAPIView(generics.ListAPIView):
+    serializer_class = api_serializer.NoteSearchResultSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # Best match first; ?course_id= narrows the search to one course
+        return search.search_notes(
+            self.request.user.id,
+            self.request.GET.get('q', ''),
+            course_id=keyset_param(self.request, 'course_id'),
+            limit=self.request.GET.get('limit', search.SEARCH_PAGE_SIZE),
+        )
+
 class StudentRateCourseCreateAPIView(generics.CreateAPIView):
     serializer_class = api_serializer.ReviewSerializer
     permission_classes = [AllowAny]
@@ -731,8 +778,7 @@ class StudentRateCourseUpdateAPIView(generics.RetrieveUpdateAPIView):
         user_id = self.kwargs['user_id']
         review_id = self.kwargs['review_id']
 
-        user = User.objects.get(id=user_id)
-        return api_models.Review.objects.get(id=review_id, user=user)
+        return api_models.Review.objects.get(id=review_id, user_id=user_id)
 
 class StudentWishListListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = api_serializer.WishlistSerializer
@@ -740,8 +786,7 @@ class StudentWishListListCreateAPIView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        user = User.objects.get(id=user_id)
-        return api_models.Wishlist.objects.filter(user=user)
+        return api_models.Wishlist.objects.filter(user_id=user_id)
     
     def create(self, request, *args, **kwargs):
         user_id = request.data['user_id']
@@ -760,14 +805,31 @@ class StudentWishListListCreateAPIView(generics.ListCreateAPIView):
             )
             return Response({"message": "Wishlist Created"}, status=status.HTTP_201_CREATED)
 
+def publish_question_answer_message(qa_message):
+    """Push a new Q&A message to the course teacher and the thread author"""
+    question = qa_message.question
+    event = {
+        "type": "question_answer_message",
+        "qa_id": question.qa_id,
+        "qam_id": qa_message.qam_id,
+        "course": qa_message.course_id,
+        "user": qa_message.user_id,
+        "title": question.title,
+        "message": qa_message.message,
+        "date": qa_message.date,
+    }
+    if qa_message.course.teacher_id:
+        realtime.publish(realtime.teacher_channel(qa_message.course.teacher_id), event)
+    if question.user_id and question.user_id != qa_message.user_id:
+        realtime.publish(realtime.user_channel(question.user_id), event)
+
 class QuestionAnswerListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = api_serializer.Question_AnswerSerializer
     permission_classes = [AllowAny]
 
     def get_queryset(self):
         course_id = self.kwargs['course_id']
-        course = api_models.Course.objects.get(id=course_id)
-        return api_models.Question_Answer.objects.filter(course=course)
+        return qa.with_messages(api_models.Question_Answer.objects.filter(course_id=course_id))
     
     def create(self, request, *args, **kwargs):
         course_id = request.data['course_id']
@@ -784,12 +846,13 @@ class QuestionAnswerListCreateAPIView(generics.ListCreateAPIView):
             title=title
         )
 
-        api_models.Question_Answer_Message.objects.create(
+        qa_message = api_models.Question_Answer_Message.objects.create(
             course=course,
             user=user,
             message=message,
             question=question
         )
+        publish_question_answer_message(qa_message)
         
         return Response({"message": "Group conversation Started"}, status=status.HTTP_201_CREATED)
 
@@ -806,52 +869,79 @@ class QuestionAnswerMessageSendAPIView(generics.CreateAPIView):
         user = User.objects.get(id=user_id)
         course = api_models.Course.objects.get(id=course_id)
         question = api_models.Question_Answer.objects.get(qa_id=qa_id)
-        api_models.Question_Answer_Message.objects.create(
+        qa_message = api_models.Question_Answer_Message.objects.create(
             course=course,
             user=user,
             message=message,
             question=question
         )
+        publish_question_answer_message(qa_message)
 
+        question = qa.with_messages(api_models.Question_Answer.objects.filter(pk=question.pk)).get()
         question_serializer = api_serializer.Question_AnswerSerializer(question)
         return Response({"messgae": "Message Sent", "question": question_serializer.data})
 
+class QuestionAnswerThreadListAPIView(generics.ListAPIView):
+    serializer_class = api_serializer.QuestionAnswerThreadSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        course = get_object_or_404(api_models.Course, id=self.kwargs['course_id'])
+        # Newest first; clients page back with ?before=<smallest id seen>
+        return qa.threads(
+            course_id=course.id,
+            before=keyset_param(self.request, 'before'),
+            limit=self.request.GET.get('limit', qa.THREADS_PAGE_SIZE),
+        )
+
+class QuestionAnswerSearchAPIView(generics.GenericAPIView):
+    serializer_class = api_serializer.QuestionAnswerThreadSerializer
+    permission_classes = [AllowAny]
+
+    def get(self, request, course_id):
+        course = get_object_or_404(api_models.Course.objects.only('id'), id=course_id)
+        return Response(search.search_questions(
+            course.id,
+            request.GET.get('q', ''),
+            limit=request.GET.get('limit', search.SEARCH_PAGE_SIZE),
+        ))
+
+class QuestionAnswerThreadMessageListAPIView(generics.ListAPIView):
+    serializer_class = api_serializer.QuestionAnswerThreadMessageSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        thread = get_object_or_404(api_models.Question_Answer.objects.only('id'), qa_id=self.kwargs['qa_id'])
+        # Oldest first; clients load more with ?after=<largest id seen>
+        return qa.messages(
+            thread.id,
+            after=keyset_param(self.request, 'after'),
+            limit=self.request.GET.get('limit', qa.MESSAGES_PAGE_SIZE),
+        )
+
 class TeacherSummaryAPIView(generics.ListAPIView):
     serializer_class = api_serializer.TeacherSummarySerializer
     permission_classes = [AllowAny]
 
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
 
         one_month_ago = datetime.today() - timedelta(days=28)
 
-        total_courses = api_models.Course.objects.filter(teacher=teacher).count()
-        total_revenue = api_models.CartOrderItem.objects.filter(teacher=teacher, order__payment_status="Paid").aggregate(total_revenue=models.Sum("price"))['total_revenue'] or 0
-        monthly_revenue = api_models.CartOrderItem.objects.filter(teacher=teacher, order__payment_status="Paid", date__gte=one_month_ago).aggregate(total_revenue=models.Sum("price"))['total_revenue'] or 0
-
-        enrolled_courses = api_models.EnrolledCourse.objects.filter(teacher=teacher)
-        unique_student_ids = set()
-        students = []
-
-        for course in enrolled_courses:
-            if course.user_id not in unique_student_ids:
-                user = User.objects.get(id=course.user_id)
-                student = {
-                    "full_name": user.profile.full_name,
-                    "image": user.profile.image.url,
-                    "country": user.profile.country,
-                    "date": course.date
-                }
-
-                students.append(student)
-                unique_student_ids.add(course.user_id)
+        total_courses = api_models.Course.objects.filter(teacher_id=teacher_id).count()
+        total_revenue = api_models.CartOrderItem.objects.filter(teacher_id=teacher_id, order__payment_status="Paid").aggregate(total_revenue=models.Sum("price"))['total_revenue'] or 0
+        monthly_revenue = api_models.CartOrderItem.objects.filter(teacher_id=teacher_id, order__payment_status="Paid", date__gte=one_month_ago).aggregate(total_revenue=models.Sum("price"))['total_revenue'] or 0
+        total_students = (
+            api_models.EnrolledCourse.objects
+            .filter(teacher_id=teacher_id, user__isnull=False)
+            .aggregate(total_students=models.Count("user", distinct=True))['total_students']
+        )
 
         return [{
             "total_courses": total_courses,
             "total_revenue": total_revenue,
             "monthly_revenue": monthly_revenue,
-            "total_students": len(students),
+            "total_students": total_students,
         }]
     
     def list(self, request, *args, **kwargs):
@@ -865,8 +955,7 @@ class TeacherCourseListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Course.objects.filter(teacher=teacher)
+        return api_models.Course.objects.filter(teacher_id=teacher_id)
 
 class TeacherReviewListAPIView(generics.ListAPIView):
     serializer_class = api_serializer.ReviewSerializer
@@ -874,8 +963,7 @@ class TeacherReviewListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Review.objects.filter(course__teacher=teacher)
+        return api_models.Review.objects.filter(course__teacher_id=teacher_id)
     
 class TeacherReviewDetailAPIView(generics.RetrieveUpdateAPIView):
     serializer_class = api_serializer.ReviewSerializer
@@ -884,21 +972,18 @@ class TeacherReviewDetailAPIView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         teacher_id = self.kwargs['teacher_id']
         review_id = self.kwargs['review_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Review.objects.get(course__teacher=teacher, id=review_id)
+        return api_models.Review.objects.get(course__teacher_id=teacher_id, id=review_id)
 
 class TeacherStudentsListAPIVIew(viewsets.ViewSet):
     
     def list(self, request, teacher_id=None):
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-
-        enrolled_courses = api_models.EnrolledCourse.objects.filter(teacher=teacher)
+        enrolled_courses = api_models.EnrolledCourse.objects.filter(teacher_id=teacher_id).select_related('user__profile')
         unique_student_ids = set()
         students = []
 
         for course in enrolled_courses:
             if course.user_id not in unique_student_ids:
-                user = User.objects.get(id=course.user_id)
+                user = course.user
                 student = {
                     "full_name": user.profile.full_name,
                     "image": user.profile.image.url,
@@ -913,10 +998,9 @@ class TeacherStudentsListAPIVIew(viewsets.ViewSet):
 
 @api_view(("GET", ))
 def TeacherAllMonthEarningAPIView(request, teacher_id):
-    teacher = api_models.Teacher.objects.get(id=teacher_id)
     monthly_earning_tracker = (
         api_models.CartOrderItem.objects
-        .filter(teacher=teacher, order__payment_status="Paid")
+        .filter(teacher_id=teacher_id, order__payment_status="Paid")
         .annotate(
             month=ExtractMonth("date")
         )
@@ -932,9 +1016,8 @@ def TeacherAllMonthEarningAPIView(request, teacher_id):
 class TeacherBestSellingCourseAPIView(viewsets.ViewSet):
 
     def list(self, request, teacher_id=None):
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
         courses_with_total_price = []
-        courses = api_models.Course.objects.filter(teacher=teacher)
+        courses = api_models.Course.objects.filter(teacher_id=teacher_id)
 
         for course in courses:
             revenue = course.enrolledcourse_set.aggregate(total_price=models.Sum('order_item__price'))['total_price'] or 0
@@ -955,9 +1038,19 @@ class TeacherCourseOrdersListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
+        return api_models.CartOrderItem.objects.filter(teacher_id=teacher_id)
+
+class TeacherExportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        return api_models.CartOrderItem.objects.filter(teacher=teacher)
+    def get(self, request, dataset, export_format):
+        # Streamed straight from the database, so exports of any size start at once and use flat memory
+        if dataset not in exports.DATASETS or export_format not in exports.FORMATS:
+            return Response({'error': 'Unknown export'}, status=status.HTTP_404_NOT_FOUND)
+        teacher_id = principals.for_request(request).teacher_id
+        if not teacher_id:
+            return Response({'error': 'Only teachers can export'}, status=status.HTTP_403_FORBIDDEN)
+        return exports.response(request._request, dataset, teacher_id, export_format)
 
 class TeacherQuestionAnswerListAPIView(generics.ListAPIView):
     serializer_class = api_serializer.Question_AnswerSerializer
@@ -965,8 +1058,19 @@ class TeacherQuestionAnswerListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Question_Answer.objects.filter(course__teacher=teacher)
+        return qa.with_messages(api_models.Question_Answer.objects.filter(course__teacher_id=teacher_id))
+
+class TeacherQuestionAnswerThreadListAPIView(generics.ListAPIView):
+    serializer_class = api_serializer.QuestionAnswerThreadSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        teacher = get_object_or_404(api_models.Teacher.objects.only('id'), id=self.kwargs['teacher_id'])
+        return qa.threads(
+            teacher_id=teacher.id,
+            before=keyset_param(self.request, 'before'),
+            limit=self.request.GET.get('limit', qa.THREADS_PAGE_SIZE),
+        )
     
 class TeacherCouponListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = api_serializer.CouponSerializer
@@ -974,8 +1078,7 @@ class TeacherCouponListCreateAPIView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Coupon.objects.filter(teacher=teacher)
+        return api_models.Coupon.objects.filter(teacher_id=teacher_id)
     
 class TeacherCouponDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = api_serializer.CouponSerializer
@@ -984,8 +1087,7 @@ class TeacherCouponDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     def get_object(self):
         teacher_id = self.kwargs['teacher_id']
         coupon_id = self.kwargs['coupon_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Coupon.objects.get(teacher=teacher, id=coupon_id)
+        return api_models.Coupon.objects.get(teacher_id=teacher_id, id=coupon_id)
     
 class TeacherNotificationListAPIView(generics.ListAPIView):
     serializer_class = api_serializer.NotificationSerializer
@@ -993,8 +1095,12 @@ class TeacherNotificationListAPIView(generics.ListAPIView):
 
     def get_queryset(self):
         teacher_id = self.kwargs['teacher_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Notification.objects.filter(teacher=teacher, seen=False)
+        # Capped, newest first; clients page back with ?before=<smallest id seen>
+        return notifications.inbox(
+            teacher_id=teacher_id,
+            before=keyset_param(self.request, 'before'),
+            limit=self.request.GET.get('limit', notifications.INBOX_PAGE_SIZE),
+        )
     
 class TeacherNotificationDetailAPIView(generics.RetrieveUpdateAPIView):
     serializer_class = api_serializer.NotificationSerializer
@@ -1003,8 +1109,122 @@ class TeacherNotificationDetailAPIView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         teacher_id = self.kwargs['teacher_id']
         noti_id = self.kwargs['noti_id']
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        return api_models.Notification.objects.get(teacher=teacher, id=noti_id)
+        return api_models.Notification.objects.get(teacher_id=teacher_id, id=noti_id)
+
+    def perform_update(self, serializer):
+        was_seen = serializer.instance.seen
+        notification = serializer.save()
+        if notification.seen != was_seen:
+            notifications.notification_seen_changed(notification)
+
+def own_teacher_id(request, teacher_id):
+    """The caller's teacher id, or None unless it is the one in the URL"""
+    own = principals.for_request(request).teacher_id
+    return own if own and str(own) == str(teacher_id) else None
+
+class TeacherNotificationUnreadCountAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, teacher_id):
+        teacher_id = own_teacher_id(request, teacher_id)
+        if not teacher_id:
+            return Response({"message": "Not your notifications"}, status=status.HTTP_403_FORBIDDEN)
+        return Response({"unread_count": notifications.unread_count(teacher_id=teacher_id)})
+
+class TeacherNotificationMarkSeenAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, teacher_id):
+        teacher_id = own_teacher_id(request, teacher_id)
+        if not teacher_id:
+            return Response({"message": "Not your notifications"}, status=status.HTTP_403_FORBIDDEN)
+        up_to_id = request.data.get('up_to_id')
+        if not str(up_to_id or '').isdigit():
+            return Response({"message": "up_to_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = notifications.mark_seen_up_to(int(up_to_id), teacher_id=teacher_id)
+        return Response({
+            "message": "Notifications marked as seen",
+            "updated": updated,
+            "unread_count": notifications.unread_count(teacher_id=teacher_id),
+        })
+
+class StudentNotificationUnreadCountAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, user_id):
+        user_id = principals.for_request(request).user_id
+        if str(user_id) != str(self.kwargs['user_id']):
+            return Response({"message": "Not your notifications"}, status=status.HTTP_403_FORBIDDEN)
+        return Response({"unread_count": notifications.unread_count(user_id=user_id)})
+
+# Seconds between keep-alive comments on an idle event stream
+REALTIME_KEEPALIVE_SECONDS = 15
+
+async def RealtimeEventStreamView(request):
+    """
+    Server-Sent Events stream of notifications, Q&A messages and payment
+    confirmations for the authenticated user (and their teacher profile).
+    EventSource cannot send headers, so the access token may be passed as
+    ?token=. Only served by the ASGI application: each open stream is a
+    coroutine there, whereas under WSGI it would hold a worker until the
+    token expires.
+    """
+    if request.method != 'GET':
+        return JsonResponse({"message": "Method not allowed"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"message": "Event streams are only served by the ASGI application"}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+    raw_token = request.GET.get('token')
+    auth_header = request.headers.get('Authorization', '')
+    if not raw_token and auth_header.startswith('Bearer '):
+        raw_token = auth_header.split(' ', 1)[1]
+
+    if not raw_token:
+        return JsonResponse({"message": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return JsonResponse({"message": "Invalid or expired token"}, status=status.HTTP_401_UNAUTHORIZED)
+
+    user_id = token.get('user_id')
+    if await sync_to_async(authentication.is_blocked)(user_id):
+        return JsonResponse({"message": "User is inactive"}, status=status.HTTP_401_UNAUTHORIZED)
+    teacher_id = token.get('teacher_id') or None
+    channels = [realtime.user_channel(user_id)]
+    if teacher_id:
+        channels.append(realtime.teacher_channel(teacher_id))
+
+    unread = await sync_to_async(notifications.unread_count)(user_id=user_id)
+    teacher_unread = await sync_to_async(notifications.unread_count)(teacher_id=teacher_id) if teacher_id else None
+    expires_at = token['exp']
+
+    async def event_stream():
+        # Subscribed here, not in the view: a generator that never starts
+        # never runs its finally, and would leak the subscription
+        subscription = realtime.get_broker().subscribe(channels)
+        try:
+            yield "retry: 5000\n\n"
+            yield realtime.format_sse({"unread_count": unread, "teacher_unread_count": teacher_unread}, "ready")
+            while True:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    # The client reconnects with a fresh access token
+                    yield realtime.format_sse({"reason": "token_expired"}, "expired")
+                    return
+                event = await subscription.get(timeout=min(REALTIME_KEEPALIVE_SECONDS, remaining))
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield realtime.format_sse(event, event.get("type", "message"))
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
     
 
 class CourseCreateAPIView(APIView):
@@ -1041,10 +1261,8 @@ class CourseCreateAPIView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Get or create teacher profile
-            try:
-                teacher = api_models.Teacher.objects.get(user=request.user)
-            except api_models.Teacher.DoesNotExist:
+            teacher_id = principals.for_request(request).teacher_id
+            if not teacher_id:
                 return Response(
                     {"error": "Teacher profile not found. Please complete your teacher profile first."},
                     status=status.HTTP_400_BAD_REQUEST
@@ -1052,7 +1270,7 @@ class CourseCreateAPIView(APIView):
 
             # Create course
             course = api_models.Course(
-                teacher=teacher,
+                teacher_id=teacher_id,
                 category=category,
                 title=title,
                 description=description,
@@ -1067,10 +1285,9 @@ class CourseCreateAPIView(APIView):
             course.save()  # Save the course first to get a primary key
 
             # Create notification after course is saved
-            api_models.Notification.objects.create(
-                teacher=teacher,
-                type="Draft"
-            )
+            notifications.notify([
+                api_models.Notification(teacher_id=teacher_id, type="Draft")
+            ])
 
             return Response({
                 "message": "Course created successfully",
@@ -1092,10 +1309,8 @@ class CourseUpdateAPIView(generics.RetrieveUpdateAPIView):
     permisscion_classes = [AllowAny]
 
     def get_object(self):
-        teacher_id = self.kwargs['teacher_id']
         course_id = self.kwargs['course_id']
 
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
         course = api_models.Course.objects.get(course_id=course_id)
 
         return course
@@ -1241,8 +1456,7 @@ class CourseVariantDeleteAPIView(generics.DestroyAPIView):
 
         print("variant_id ========", variant_id)
 
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        course = api_models.Course.objects.get(teacher=teacher, course_id=course_id)
+        course = api_models.Course.objects.get(teacher_id=teacher_id, course_id=course_id)
         return api_models.Variant.objects.get(id=variant_id)
     
 class CourseVariantItemDeleteAPIVIew(generics.DestroyAPIView):
@@ -1257,10 +1471,12 @@ class CourseVariantItemDeleteAPIVIew(generics.DestroyAPIView):
         course_id = self.kwargs['course_id']
 
 
-        teacher = api_models.Teacher.objects.get(id=teacher_id)
-        course = api_models.Course.objects.get(teacher=teacher, course_id=course_id)
-        variant = api_models.Variant.objects.get(variant_id=variant_id, course=course)
-        return api_models.VariantItem.objects.get(variant=variant, variant_item_id=variant_item_id)
+        return api_models.VariantItem.objects.get(
+            variant__course__teacher_id=teacher_id,
+            variant__course__course_id=course_id,
+            variant__variant_id=variant_id,
+            variant_item_id=variant_item_id,
+        )
     
 
 class FileUploadAPIView(APIView):
@@ -1396,20 +1612,20 @@ class StudentCertificateCreateAPIView(generics.CreateAPIView):
             if certificate and hasattr(certificate, 'generate_verification_url'):
                 certificate.generate_verification_url()
             
-            # Create notification for student
-            api_models.Notification.objects.create(
-                user=user,
-                teacher=course.teacher,
-                type="Course Enrollment Completed",
-                seen=False
-            )
-            
-            # Create notification for teacher
-            api_models.Notification.objects.create(
-                teacher=course.teacher,
-                type="Course Enrollment Completed",
-                seen=False
-            )
+            # Create notifications for student and teacher
+            notifications.notify([
+                api_models.Notification(
+                    user=user,
+                    teacher=course.teacher,
+                    type="Course Enrollment Completed",
+                    seen=False
+                ),
+                api_models.Notification(
+                    teacher=course.teacher,
+                    type="Course Enrollment Completed",
+                    seen=False
+                ),
+            ])
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
@@ -1432,8 +1648,7 @@ class StudentCertificateListAPIView(generics.ListAPIView):
     
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        user = User.objects.get(id=user_id)
-        return api_models.Certificate.objects.filter(user=user)
+        return api_models.Certificate.objects.filter(user_id=user_id)
 
 class StudentCertificateDetailAPIView(generics.RetrieveAPIView):
     serializer_class = api_serializer.CertificateSerializer
@@ -1444,10 +1659,9 @@ class StudentCertificateDetailAPIView(generics.RetrieveAPIView):
         user_id = self.kwargs['user_id']
         
         try:
-            user = User.objects.get(id=user_id)
             return api_models.Certificate.objects.get(
                 certificate_id=certificate_id,
-                user=user
+                user_id=user_id
             )
         except api_models.Certificate.DoesNotExist:
             return None
@@ -1569,12 +1783,14 @@ class NFTMintAPIView(generics.CreateAPIView):
         nft = self.perform_create(serializer)
 
         # Create notification for user
-        api_models.Notification.objects.create(
-            user=enrollment.user,
-            teacher=enrollment.teacher,
-            type="Course NFT Minted",
-            seen=False
-        )
+        notifications.notify([
+            api_models.Notification(
+                user=enrollment.user,
+                teacher=enrollment.teacher,
+                type="Course NFT Minted",
+                seen=False
+            )
+        ])
 
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -1665,12 +1881,14 @@ class MINTCertificateNFTAPIView(generics.CreateAPIView):
         nft = self.perform_create(serializer)
 
         # Create notification for user
-        api_models.Notification.objects.create(
-            user=certificate.user,
-            teacher=certificate.course.teacher,
-            type="Certificate NFT Minted",
-            seen=False
-        )
+        notifications.notify([
+            api_models.Notification(
+                user=certificate.user,
+                teacher=certificate.course.teacher,
+                type="Certificate NFT Minted",
+                seen=False
+            )
+        ])
 
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -1732,14 +1950,13 @@ class QuizCreateAPIView(generics.CreateAPIView):
             return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
         if hasattr(course, 'quiz'):
             return Response({'error': 'Quiz already exists for this course'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            teacher = api_models.Teacher.objects.get(user=request.user)
-        except api_models.Teacher.DoesNotExist:
+        teacher_id = principals.for_request(request).teacher_id
+        if not teacher_id:
             return Response({'error': 'Teacher profile not found.'}, status=status.HTTP_400_BAD_REQUEST)
 
         quiz = api_models.Quiz.objects.create(
             course=course,
-            teacher=teacher,
+            teacher_id=teacher_id,
             title=title,
             description=description,
             time_limit=time_limit,
@@ -1789,6 +2006,38 @@ class QuizQuestionCreateAPIView(generics.CreateAPIView):
         serializer = self.get_serializer(question)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+class QuizQuestionImportAPIView(generics.GenericAPIView):
+    serializer_class = api_serializer.QuizQuestionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, quiz_id):
+        quiz = api_models.Quiz.objects.filter(quiz_id=quiz_id).first()
+        if not quiz:
+            return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+        dry_run = str(request.query_params.get('dry_run', request.data.get('dry_run', ''))).lower() in ('1', 'true', 'yes')
+
+        try:
+            upload = request.FILES.get('file')
+            if upload:
+                rows = quiz_import.parse_csv(upload.read().decode('utf-8-sig'))
+            elif request.data.get('csv'):
+                rows = quiz_import.parse_csv(request.data['csv'])
+            else:
+                rows = quiz_import.parse_json(request.data.get('questions'))
+            questions = quiz_import.validate(rows)
+        except UnicodeDecodeError:
+            return Response({'error': 'CSV file must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+        except quiz_import.QuizImportError as e:
+            return Response({'error': str(e), 'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = quiz_import.import_questions(quiz, questions, dry_run=dry_run)
+        return Response({
+            'dry_run': dry_run,
+            'questions': len(created),
+            'options': sum(len(q['options']) for q in questions),
+            'quiz_question_ids': [] if dry_run else [q.quiz_question_id for q in created],
+        }, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
 class QuizAttemptCreateAPIView(generics.CreateAPIView):
     serializer_class = api_serializer.QuizAttemptSerializer
     permission_classes = [IsAuthenticated]
@@ -1799,27 +2048,78 @@ class QuizAttemptCreateAPIView(generics.CreateAPIView):
         quiz = api_models.Quiz.objects.filter(quiz_id=quiz_id).first()
         if not quiz:
             return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
-        user = request.user
-        attempt_count = api_models.QuizAttempt.objects.filter(quiz=quiz, user=user).count()
-        if attempt_count >= quiz.max_attempts:
-            return Response({'error': 'Maximum attempts reached'}, status=status.HTTP_400_BAD_REQUEST)
-        attempt_number = attempt_count + 1
-        attempt = api_models.QuizAttempt.objects.create(quiz=quiz, user=user, attempt_number=attempt_number)
-        score = 0
-        for ans in answers:
-            question = api_models.QuizQuestion.objects.filter(quiz_question_id=ans.get('question_id')).first()
-            selected_option = api_models.QuizQuestionOption.objects.filter(quiz_question_option_id=ans.get('selected_option_id')).first()
-            is_correct = selected_option.is_correct if selected_option and selected_option.is_correct else False
-            if is_correct:
-                score += question.points
-            api_models.QuizAnswer.objects.create(
-                attempt=attempt,
-                question=question,
-                selected_option=selected_option,
-                is_correct=is_correct
-            )
-        attempt.score = score
-        attempt.save()
+        try:
+            session = quiz_sessions.open_attempt(quiz, request.user)
+            if session:
+                # A timed session is open: this submits it
+                attempt = quiz_sessions.finish_attempt(session.pk, answers, user=request.user)
+            elif quiz.time_limit:
+                # Timed quizzes are only submitted through a started session
+                return Response({'error': 'This quiz is timed; start the attempt first'}, status=status.HTTP_409_CONFLICT)
+            else:
+                attempt = quizzes.submit_attempt(quiz, request.user, answers)
+        except quiz_sessions.SessionClosed as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except quizzes.AttemptLimitReached as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except quizzes.QuizSubmissionError as e:
+            return Response({'error': str(e), 'details': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(attempt)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class QuizAttemptStartAPIView(generics.CreateAPIView):
+    serializer_class = api_serializer.QuizAttemptSerializer
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        quiz = api_models.Quiz.objects.select_related('course').filter(quiz_id=self.kwargs['quiz_id']).first()
+        if not quiz:
+            return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            attempt, created = quiz_sessions.start_attempt(quiz, request.user)
+        except quizzes.QuizSubmissionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        questions = quizzes.delivery_payload(quiz)
+        if quiz.shuffle_questions:
+            questions = quizzes.shuffle_payload(questions, attempt.attempt_id)
+        data = self.get_serializer(attempt).data
+        data.update({
+            'draft_answers': quiz_sessions.draft(attempt),
+            'quiz': questions,
+        })
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+class QuizAttemptAutosaveAPIView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = api_serializer.QuizAttemptSerializer
+
+    def post(self, request, attempt_id):
+        attempt = api_models.QuizAttempt.objects.select_related('quiz__course').filter(attempt_id=attempt_id, user=request.user).first()
+        if not attempt:
+            return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            answers = quiz_sessions.autosave(attempt, request.data.get('answers', []))
+        except quiz_sessions.SessionClosed as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except quizzes.QuizSubmissionError as e:
+            return Response({'error': str(e), 'details': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'saved': len(answers), 'deadline': attempt.deadline})
+
+class QuizAttemptSubmitAPIView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = api_serializer.QuizAttemptSerializer
+
+    def post(self, request, attempt_id):
+        attempt = api_models.QuizAttempt.objects.filter(attempt_id=attempt_id, user=request.user).values_list('pk', flat=True).first()
+        if not attempt:
+            return Response({'error': 'Attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            attempt = quiz_sessions.finish_attempt(attempt, request.data.get('answers'), user=request.user)
+        except quiz_sessions.SessionClosed as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except quizzes.QuizSubmissionError as e:
+            return Response({'error': str(e), 'details': e.errors}, status=status.HTTP_400_BAD_REQUEST)
         serializer = self.get_serializer(attempt)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -1900,16 +2200,17 @@ class TakeQuizAPIView(generics.RetrieveAPIView):
 
     def get_object(self):
         quiz_id = self.kwargs['quiz_id']
-        return api_models.Quiz.objects.get(quiz_id=quiz_id)
+        return api_models.Quiz.objects.select_related('course').get(quiz_id=quiz_id)
 
     def retrieve(self, request, *args, **kwargs):
         quiz = self.get_object()
-        # Hide correct answers in options
-        data = self.get_serializer(quiz).data
-        for q in data['questions']:
-            for opt in q['options']:
-                if 'is_correct' in opt:
-                    opt.pop('is_correct')
+        # Cached payload, already stripped of correct answers
+        data = quizzes.delivery_payload(quiz)
+        if quiz.shuffle_questions:
+            # Authored order until an attempt is started and can seed the shuffle
+            seed = quizzes.attempt_seed(quiz, request.user)
+            if seed:
+                data = quizzes.shuffle_payload(data, seed)
         return Response(data)
 
 class QuizBestAttemptAPIView(generics.RetrieveAPIView):
@@ -1918,13 +2219,10 @@ class QuizBestAttemptAPIView(generics.RetrieveAPIView):
     lookup_field = 'quiz_id'
 
     def get_object(self):
-        quiz_id = self.kwargs['quiz_id']
-        quiz = api_models.Quiz.objects.get(quiz_id=quiz_id)
-        user = self.request.user
-        best = api_models.QuizAttempt.objects.filter(quiz=quiz, user=user).order_by('-score').first()
-        if not best:
+        summary = quizzes.result_summary(self.kwargs['quiz_id'], self.request.user)
+        if not summary or not summary.best_attempt:
             raise api_models.QuizAttempt.DoesNotExist()
-        return best
+        return summary.best_attempt
 
 class QuizAnalyticsAPIView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
@@ -1932,57 +2230,44 @@ class QuizAnalyticsAPIView(generics.RetrieveAPIView):
     
     def get(self, request, quiz_id):
         quiz = api_models.Quiz.objects.get(quiz_id=quiz_id)
-        attempts = api_models.QuizAttempt.objects.filter(quiz=quiz)
-        total_students = attempts.values('user').distinct().count()
-        avg_score = attempts.aggregate(models.Avg('score'))['score__avg'] or 0
-        pass_count = attempts.filter(score__gte=quiz.min_pass_points).values('user').distinct().count()
-        pass_rate = (pass_count / total_students * 100) if total_students else 0
-        highest = attempts.aggregate(models.Max('score'))['score__max'] or 0
-        lowest = attempts.aggregate(models.Min('score'))['score__min'] or 0
-        attempt_dist = attempts.values('user').annotate(num=models.Count('id')).values_list('num', flat=True)
-
-        # Best attempt per student
-        from django.db.models import Max
-        best_attempts = attempts.values('user').annotate(
-            best_score=Max('score')
-        )
-        # Get the actual best attempt object for each student
-        best_attempt_objs = []
-        for ba in best_attempts:
-            best = attempts.filter(user=ba['user'], score=ba['best_score']).order_by('-score', 'completed_at').first()
-            if best:
-                best_attempt_objs.append(best)
-        # Sort by score descending
-        best_attempt_objs = sorted(best_attempt_objs, key=lambda x: x.score, reverse=True)
-        # Top performers: top 5 best attempts
-        top_performers = best_attempt_objs[:5]
-        # All students' best attempts
-        students_best = [
-            {
-                'user_id': a.user.id,
-                'score': a.score,
-                'attempt_number': a.attempt_number,
-                'completed_at': a.completed_at
-            } for a in best_attempt_objs
-        ]
+        return Response(quizzes.quiz_analytics(quiz))
+
+class QuizItemAnalysisAPIView(generics.RetrieveAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = api_serializer.QuizAttemptSerializer
+
+    def get(self, request, quiz_id):
+        quiz = api_models.Quiz.objects.filter(quiz_id=quiz_id).first()
+        if not quiz:
+            return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+        # The same cached per-question figures as the analytics endpoint
+        analytics = quizzes.quiz_analytics(quiz)
         return Response({
-            'total_students': total_students,
-            'avg_score': avg_score,
-            'pass_rate': pass_rate,
-            'highest_score': highest,
-            'lowest_score': lowest,
-            'attempts_distribution': list(attempt_dist),
-            'top_performers': [
-                {
-                    'user_id': a.user.id,
-                    'score': a.score,
-                    'attempt_number': a.attempt_number,
-                    'completed_at': a.completed_at
-                } for a in top_performers
-            ],
-            'students_best_attempts': students_best
+            'quiz_id': quiz.quiz_id,
+            'total_students': analytics['total_students'],
+            'questions': analytics['questions'],
         })
 
+class QuizLeaderboardAPIView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = api_serializer.QuizAttemptSerializer
+
+    def get(self, request, quiz_id):
+        quiz = api_models.Quiz.objects.filter(quiz_id=quiz_id).values_list('id', flat=True).first()
+        if not quiz:
+            return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(leaderboards.quiz_leaderboard.standings(quiz, request.user.id, request.query_params.get('limit', leaderboards.LEADERBOARD_PAGE_SIZE)))
+
+class CourseLeaderboardAPIView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = api_serializer.CourseSerializer
+
+    def get(self, request, course_id):
+        course = api_models.Course.objects.filter(course_id=course_id).values_list('id', flat=True).first()
+        if not course:
+            return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(leaderboards.course_leaderboard.standings(course, request.user.id, request.query_params.get('limit', leaderboards.LEADERBOARD_PAGE_SIZE)))
+
 class QuizAttemptResultAPIView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = api_serializer.QuizAttemptSerializer
@@ -1990,31 +2275,14 @@ class QuizAttemptResultAPIView(generics.RetrieveAPIView):
 
     def get_object(self):
         attempt_id = self.kwargs['attempt_id']
-        return api_models.QuizAttempt.objects.get(attempt_id=attempt_id, user=self.request.user)
+        return api_models.QuizAttempt.objects.select_related('quiz').get(attempt_id=attempt_id, user=self.request.user)
 
     def retrieve(self, request, *args, **kwargs):
         attempt = self.get_object()
         quiz = attempt.quiz
-        
-        # Calculate pass/fail status
-        passed = attempt.score >= quiz.min_pass_points
-        
-        # Get detailed answer breakdown
-        answers_detail = []
-        for answer in attempt.answers.all():
-            answers_detail.append({
-                'question_id': answer.question.quiz_question_id,
-                'question_text': answer.question.question_text,
-                'selected_option_id': answer.selected_option.quiz_question_option_id if answer.selected_option else None,
-                'selected_option_text': answer.selected_option.option_text if answer.selected_option else None,
-                'is_correct': answer.is_correct,
-                'points_earned': answer.question.points if answer.is_correct else 0,
-                'points_possible': answer.question.points
-            })
-        
-        # Calculate total possible points
-        total_possible = sum(answer['points_possible'] for answer in answers_detail)
-        
+        breakdown = quizzes.stored_breakdown(attempt)
+        total_possible = breakdown['total_possible']
+
         result_data = {
             'attempt_id': attempt.attempt_id,
             'quiz_id': quiz.quiz_id,
@@ -2022,19 +2290,14 @@ class QuizAttemptResultAPIView(generics.RetrieveAPIView):
             'score': attempt.score,
             'total_possible': total_possible,
             'percentage': round((attempt.score / total_possible * 100), 2) if total_possible > 0 else 0,
-            'passed': passed,
+            'passed': attempt.score >= quiz.min_pass_points,
             'min_pass_points': quiz.min_pass_points,
             'attempt_number': attempt.attempt_number,
             'completed_at': attempt.completed_at,
-            'answers_breakdown': answers_detail,
-            'summary': {
-                'total_questions': len(answers_detail),
-                'correct_answers': sum(1 for answer in answers_detail if answer['is_correct']),
-                'incorrect_answers': sum(1 for answer in answers_detail if not answer['is_correct']),
-                'unanswered': sum(1 for answer in answers_detail if answer['selected_option_id'] is None)
-            }
+            'answers_breakdown': breakdown['answers_breakdown'],
+            'summary': breakdown['summary']
         }
-        
+
         return Response(result_data)
 
 class QuizStudentStatusAPIView(generics.RetrieveAPIView):
@@ -2043,13 +2306,10 @@ class QuizStudentStatusAPIView(generics.RetrieveAPIView):
     
     def get(self, request, quiz_id):
         try:
-            quiz = api_models.Quiz.objects.get(quiz_id=quiz_id)
-            user = request.user
-            
-            # Get all attempts for this student and quiz
-            attempts = api_models.QuizAttempt.objects.filter(quiz=quiz, user=user)
-            
-            if not attempts.exists():
+            summary = quizzes.result_summary(quiz_id, request.user)
+
+            if not summary:
+                quiz = api_models.Quiz.objects.get(quiz_id=quiz_id)
                 return Response({
                     'quiz_id': quiz_id,
                     'quiz_title': quiz.title,
@@ -2060,30 +2320,21 @@ class QuizStudentStatusAPIView(generics.RetrieveAPIView):
                     'attempts_remaining': quiz.max_attempts,
                     'min_pass_points': quiz.min_pass_points
                 })
-            
-            # Calculate best score
-            best_attempt = attempts.order_by('-score').first()
-            best_score = best_attempt.score
-            
-            # Check if passed (any attempt with score >= min_pass_points)
-            passed = attempts.filter(score__gte=quiz.min_pass_points).exists()
-            
-            # Calculate attempts remaining
-            total_attempts = attempts.count()
-            attempts_remaining = max(0, quiz.max_attempts - total_attempts)
-            
+
+            quiz = summary.quiz
             return Response({
                 'quiz_id': quiz_id,
                 'quiz_title': quiz.title,
                 'has_attempted': True,
-                'total_attempts': total_attempts,
-                'best_score': best_score,
-                'passed': passed,
-                'attempts_remaining': attempts_remaining,
+                'total_attempts': summary.attempts_used,
+                'best_score': summary.best_score,
+                # Judged against the current pass mark in case the teacher changed it
+                'passed': summary.best_attempt_id is not None and summary.best_score >= quiz.min_pass_points,
+                'attempts_remaining': max(0, quiz.max_attempts - summary.attempts_used),
                 'min_pass_points': quiz.min_pass_points,
                 'max_attempts': quiz.max_attempts
             })
-            
+
         except api_models.Quiz.DoesNotExist:
             return Response({'error': 'Quiz not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -64,6 +64,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'anymail',
     'cloudinary_storage',
+    'import_export',
         
     'drf_yasg'
 ]
@@ -122,6 +123,20 @@ DATABASES = {
     )
 }
 
+# Cache
+# Local memory is per process; point CACHE_BACKEND at a shared cache such as
+# django.core.cache.backends.redis.RedisCache when running several workers.
+# Quiz autosaves are only buffered in the cache when it is not LocMem, and
+# leaderboards only see other workers' updates within BOARD_MAX_AGE seconds.
+# The blocklist of deactivated users (api.authentication) lives only here.
+
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('CACHE_LOCATION', default='lms-default'),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -238,6 +253,10 @@ ANYMAIL = {
 FROM_EMAIL = env("FROM_EMAIL")
 EMAIL_BACKEND = 'anymail.backends.mailgun.EmailBackend'
 
+# Send queued mail (api.outbox) from a thread in the web process right after
+# the request commits. Turn off when a `send_queued_email --loop` worker runs.
+EMAIL_OUTBOX_WORKER = env.bool('EMAIL_OUTBOX_WORKER', default=True)
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -291,12 +310,19 @@ JAZZMIN_UI_TWEAKS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication',  # Optional
-        'rest_framework_simplejwt.authentication.JWTAuthentication',        
+        # Trusts the signed claims; the user row is only loaded when a view reads it
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Counters live in CACHES, so they are only shared across processes with a
+    # shared CACHE_BACKEND (LocMem limits each worker separately)
+    'DEFAULT_THROTTLE_RATES': {
+        'password_reset': '5/hour',
+        'password_reset_email': '3/hour',
+        'password_change': '10/hour',
+    },
 }
 
 SIMPLE_JWT = {
@@ -343,6 +369,10 @@ SIMPLE_JWT = {
 #     "http://127.0.0.1:3000",
 # ]
 
+# Realtime push (api.realtime). LocalBroker only reaches subscribers in the same
+# process; use api.realtime.PostgresBroker when running several ASGI workers.
+REALTIME_BROKER = env('REALTIME_BROKER', default='api.realtime.LocalBroker')
+
 # Add Razorpay settings
 RAZORPAY_KEY_ID = env('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = env('RAZORPAY_KEY_SECRET')
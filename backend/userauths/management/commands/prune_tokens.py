@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from userauths import tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired revoked and outstanding refresh tokens in batches (run daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows deleted per statement")
+
+    def handle(self, *args, **options):
+        revoked, outstanding = tokens.prune_expired(batch_size=options["batch_size"])
+        self.stdout.write(f"Deleted {revoked} revoked and {outstanding} outstanding expired tokens")
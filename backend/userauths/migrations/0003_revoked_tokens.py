@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:52
+
+import hashlib
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def hash_reset_tokens(apps, schema_editor):
+    User = apps.get_model('userauths', 'User')
+    users = User.objects.exclude(refresh_token__isnull=True).exclude(refresh_token='').only('id', 'refresh_token')
+    for user in users.iterator(chunk_size=2000):
+        if len(user.refresh_token) != 64:
+            user.refresh_token = hashlib.sha256(user.refresh_token.encode()).hexdigest()
+            user.save(update_fields=['refresh_token'])
+
+
+def backfill_revoked_tokens(apps, schema_editor):
+    BlacklistedToken = apps.get_model('token_blacklist', 'BlacklistedToken')
+    RevokedToken = apps.get_model('userauths', 'RevokedToken')
+    blacklisted = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        .values_list('token__jti', 'token__expires_at')
+    )
+    RevokedToken.objects.bulk_create(
+        [
+            RevokedToken(digest=hashlib.blake2b(jti.encode(), digest_size=16).digest(), expires_at=expires_at)
+            for jti, expires_at in blacklisted.iterator(chunk_size=2000)
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userauths', '0002_alter_profile_image'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.BinaryField(max_length=16, unique=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('revoked_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_revoked_tokens, migrations.RunPython.noop),
+        migrations.RunPython(hash_reset_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='refresh_token',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def clear_plaintext_otps(apps, schema_editor):
+    # Codes now live hashed in PasswordResetOTP; the old ones never expired
+    apps.get_model('userauths', 'User').objects.exclude(otp__isnull=True).update(otp=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userauths', '0003_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PasswordResetOTP',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='password_reset_otp', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('digest', models.CharField(max_length=64)),
+                ('expires_at', models.DateTimeField()),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(clear_plaintext_otps, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+import hashlib
+
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.db.models.signals import post_save
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 
 def user_avatar_upload_path(instance, filename):
     """
@@ -25,8 +29,10 @@ class User(AbstractUser):
     email = models.EmailField(_('email address'), unique=True)
     full_name = models.CharField(max_length=100, null=True, blank=True)
     username = models.CharField(max_length=100, unique=True)
+    # No longer written: reset codes are kept hashed in PasswordResetOTP
     otp = models.CharField(max_length=100, null=True, blank=True)
-    refresh_token = models.TextField(null=True, blank=True)
+    # No longer written: SHA-256 of the token the old password reset flow minted
+    refresh_token = models.CharField(max_length=64, null=True, blank=True)
     wallet_address = models.CharField(max_length=1000, unique=True, default="None")
 
     USERNAME_FIELD = 'email'
@@ -34,6 +40,18 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # Remembered so a save only syncs the profile when these change
+        if 'full_name' in field_names and 'username' in field_names:
+            user._profile_source = user.profile_name()
+        return user
+
+    def profile_name(self):
+        """The name a profile falls back to"""
+        return self.full_name or self.username
     
     def save(self, *args, **kwargs):
         if not self.username and self.email:
@@ -57,14 +75,10 @@ class Profile(models.Model):
         
     
     def save(self, *args, **kwargs):
-        # Sync user details to profile
-        if not self.full_name or self.full_name == "":
-            self.full_name = self.user.full_name or self.user.username
-        
-        # If user has a wallet address, ensure it's synced
-        if self.user.wallet_address and self.user.wallet_address != "None":
-            self.user.wallet_address = self.user.wallet_address
-            
+        # Only a blank name needs the user, so the user row is not loaded otherwise
+        if not self.full_name:
+            self.full_name = self.user.profile_name()
+
         super(Profile, self).save(*args, **kwargs)
     
     @property
@@ -106,16 +120,87 @@ class Profile(models.Model):
             return f'/media/{image_path}'
 
 
+class RevokedToken(models.Model):
+    """
+    Refresh tokens that can no longer be used, stored compactly: a 16-byte
+    digest of the jti instead of the whole token, kept only until the token
+    would have expired anyway (see the prune_tokens command).
+    """
+
+    # Bumped after every revocation so other processes resync their filters
+    GENERATION_KEY = "auth:revoked:generation"
+
+    digest = models.BinaryField(max_length=16, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    @staticmethod
+    def digest_of(jti):
+        return hashlib.blake2b(str(jti).encode(), digest_size=16).digest()
+
+    @classmethod
+    def revoke(cls, jti, expires_at):
+        """Revoke a jti; False if it already was, so a token is only ever rotated once"""
+        try:
+            with transaction.atomic():
+                cls.objects.create(digest=cls.digest_of(jti), expires_at=expires_at)
+        except IntegrityError:
+            return False
+        transaction.on_commit(cls.bump_generation)
+        return True
+
+    @classmethod
+    def bump_generation(cls):
+        try:
+            cache.incr(cls.GENERATION_KEY)
+        except ValueError:
+            cache.set(cls.GENERATION_KEY, 1, None)
+
+
+class PasswordResetOTP(models.Model):
+    """
+    The one live password reset code of a user, as an HMAC digest (see
+    userauths.password_reset). Issuing a new code replaces the row, and a
+    successful reset deletes it.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='password_reset_otp')
+    digest = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(
             user=instance,
-            full_name=instance.full_name or instance.username,
+            full_name=instance.profile_name(),
             image=settings.DEFAULT_AVATAR
         )
+        instance._profile_source = instance.profile_name()
 
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+def sync_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Carry a changed user name over to a profile still showing the old one.
+    Saves that leave the name alone (logins, password and OTP changes)
+    write nothing.
+    """
+    if created or (update_fields is not None and not {'full_name', 'username'} & set(update_fields)):
+        return
+    previous = getattr(instance, '_profile_source', None)
+    current = instance.profile_name()
+    if previous is None or previous == current:
+        return
+    Profile.objects.filter(user_id=instance.pk, full_name__in=['', previous]).update(full_name=current)
+    instance._profile_source = current
 
 post_save.connect(create_user_profile, sender=User)
-post_save.connect(save_user_profile, sender=User)
\ No newline at end of file
+post_save.connect(sync_user_profile, sender=User)
+
+
+def token_blacklisted(sender, instance, created, **kwargs):
+    # Tokens blacklisted through simplejwt (e.g. from the admin) are checked via RevokedToken
+    if created:
+        RevokedToken.revoke(instance.token.jti, instance.token.expires_at)
+
+post_save.connect(token_blacklisted, sender=BlacklistedToken)
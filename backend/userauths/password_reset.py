@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, get_random_string, salted_hmac
+from rest_framework.throttling import ScopedRateThrottle
+
+from userauths.models import PasswordResetOTP
+
+OTP_LENGTH = 7
+OTP_TTL = timedelta(minutes=15)
+
+# Wrong guesses allowed before the code is burnt and a new one must be requested
+MAX_ATTEMPTS = 5
+
+
+class InvalidResetCode(Exception):
+    pass
+
+
+def otp_digest(user_id, otp):
+    # Keyed with SECRET_KEY, so a leaked table cannot be brute forced offline
+    return salted_hmac("userauths.password_reset", f"{user_id}:{otp}", algorithm="sha256").hexdigest()
+
+
+def issue(user):
+    """Replace the user's reset code with a fresh one and return it in plain text"""
+    otp = get_random_string(OTP_LENGTH, allowed_chars="0123456789")
+    PasswordResetOTP.objects.bulk_create(
+        [PasswordResetOTP(user=user, digest=otp_digest(user.pk, otp), expires_at=timezone.now() + OTP_TTL)],
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["digest", "expires_at", "attempts"],
+    )
+    return otp
+
+
+def reset_password(user_id, otp, password):
+    """
+    Set the password if otp is the user's live code, which is then used up.
+    Raises InvalidResetCode otherwise, counting the miss against the code.
+    """
+    with transaction.atomic():
+        code = PasswordResetOTP.objects.select_for_update().select_related("user").filter(user_id=user_id).first()
+        if code is None or code.expires_at <= timezone.now() or code.attempts >= MAX_ATTEMPTS:
+            raise InvalidResetCode("Reset code is invalid or has expired")
+        if constant_time_compare(code.digest, otp_digest(code.user_id, otp)):
+            user = code.user
+            user.set_password(password)
+            user.save(update_fields=["password"])
+            code.delete()
+            return user
+        PasswordResetOTP.objects.filter(pk=code.pk).update(attempts=code.attempts + 1)
+    # Raised outside the transaction so the counted miss is committed
+    raise InvalidResetCode("Reset code is invalid or has expired")
+
+
+class PasswordResetEmailThrottle(ScopedRateThrottle):
+    """
+    ScopedRateThrottle keyed by the address in the URL instead of the client,
+    so spreading requests over many IPs cannot flood one inbox. The view
+    names the rate with throttle_email_scope.
+    """
+
+    scope_attr = "throttle_email_scope"
+
+    def get_cache_key(self, request, view):
+        email = view.kwargs.get("email", "").strip().lower()
+        if not email:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": email}
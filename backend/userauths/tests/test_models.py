@@ -64,3 +64,60 @@ class SanityTests(TestCase):
         user = User.objects.create(email='auto_username@example.com', password='pass1234')
         user.save()
         self.assertEqual(user.username, 'auto_username')
+
+
+class ProfileSyncTests(TestCase):
+    def test_saves_that_leave_the_name_alone_do_not_touch_the_profile(self):
+        user = User.objects.create_user(email='sync@example.com', username='syncuser', password='pass1234', wallet_address='wallet-sync')
+        user = User.objects.get(pk=user.pk)
+
+        user.set_password('newpass1234')
+        user.otp = '1234567'
+        with self.assertNumQueries(1):
+            user.save()
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_name_change_is_carried_to_a_profile_showing_the_old_name(self):
+        user = User.objects.create_user(email='sync@example.com', username='syncuser', password='pass1234', wallet_address='wallet-sync')
+        user = User.objects.get(pk=user.pk)
+
+        user.full_name = 'Sync User'
+        with self.assertNumQueries(2):
+            user.save()
+        self.assertEqual(Profile.objects.get(user=user).full_name, 'Sync User')
+
+    def test_name_change_keeps_a_profile_name_of_its_own(self):
+        user = User.objects.create_user(email='sync@example.com', username='syncuser', password='pass1234', wallet_address='wallet-sync')
+        Profile.objects.filter(user=user).update(full_name='Chosen Name')
+        user = User.objects.get(pk=user.pk)
+
+        user.full_name = 'Sync User'
+        user.save()
+        self.assertEqual(Profile.objects.get(user=user).full_name, 'Chosen Name')
+
+    def test_profile_save_does_not_load_the_user(self):
+        user = User.objects.create_user(email='sync@example.com', username='syncuser', password='pass1234', wallet_address='wallet-sync')
+        profile = Profile.objects.get(user=user)
+
+        profile.country = 'Kenya'
+        with self.assertNumQueries(1):
+            profile.save()
+
+    def test_registration_is_two_inserts_in_one_transaction(self):
+        data = {
+            'full_name': 'New Student',
+            'email': 'new@example.com',
+            'password': 'Str0ng-pass-123',
+            'password2': 'Str0ng-pass-123',
+            'wallet_address': 'wallet-new',
+        }
+        # email uniqueness check, savepoint, user insert, profile insert, release
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/v1/user/register/', data, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(email='new@example.com')
+        self.assertEqual(user.username, 'new')
+        self.assertTrue(user.check_password('Str0ng-pass-123'))
+        self.assertEqual(user.profile.full_name, 'New Student')
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase as TestCase
+
+from api.models import OutboundEmail
+from userauths import password_reset
+from userauths.models import PasswordResetOTP, User
+
+
+@override_settings(EMAIL_OUTBOX_WORKER=False)
+class PasswordResetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+
+    def test_code_is_stored_hashed(self):
+        otp = password_reset.issue(self.user)
+
+        code = PasswordResetOTP.objects.get(user=self.user)
+        self.assertEqual(len(otp), password_reset.OTP_LENGTH)
+        self.assertNotIn(otp, code.digest)
+        self.assertEqual(code.digest, password_reset.otp_digest(self.user.pk, otp))
+
+    def test_reissuing_replaces_the_code(self):
+        password_reset.issue(self.user)
+        PasswordResetOTP.objects.update(attempts=2)
+        otp = password_reset.issue(self.user)
+
+        code = PasswordResetOTP.objects.get()
+        self.assertEqual((code.digest, code.attempts), (password_reset.otp_digest(self.user.pk, otp), 0))
+
+    def test_code_is_single_use(self):
+        otp = password_reset.issue(self.user)
+
+        password_reset.reset_password(self.user.pk, otp, 'new-pass')
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-pass'))
+        with self.assertRaises(password_reset.InvalidResetCode):
+            password_reset.reset_password(self.user.pk, otp, 'other-pass')
+
+    def test_expired_code_is_refused(self):
+        otp = password_reset.issue(self.user)
+        PasswordResetOTP.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        with self.assertRaises(password_reset.InvalidResetCode):
+            password_reset.reset_password(self.user.pk, otp, 'new-pass')
+
+    def test_code_is_burnt_after_too_many_misses(self):
+        otp = password_reset.issue(self.user)
+        wrong = "x" * password_reset.OTP_LENGTH
+        for _ in range(password_reset.MAX_ATTEMPTS):
+            with self.assertRaises(password_reset.InvalidResetCode):
+                password_reset.reset_password(self.user.pk, wrong, 'new-pass')
+
+        self.assertEqual(PasswordResetOTP.objects.get().attempts, password_reset.MAX_ATTEMPTS)
+        with self.assertRaises(password_reset.InvalidResetCode):
+            password_reset.reset_password(self.user.pk, otp, 'new-pass')
+
+    def test_reset_flow_queues_the_mail(self):
+        response = self.client.get("/api/v1/user/password-reset/student@example.com/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"message"})
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.to, 'student@example.com')
+        otp = queued.text_body.split("otp=")[1].split("&")[0]
+
+        response = self.client.post("/api/v1/user/password-change/", {"otp": otp, "uuidb64": self.user.pk, "password": "new-pass"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post("/api/v1/user/password-change/", {"otp": otp, "uuidb64": self.user.pk, "password": "again"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_email_gets_the_same_answer(self):
+        response = self.client.get("/api/v1/user/password-reset/nobody@example.com/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_reset_requests_are_throttled_per_email(self):
+        for i in range(3):
+            response = self.client.get("/api/v1/user/password-reset/student@example.com/", REMOTE_ADDR=f"10.0.0.{i}")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get("/api/v1/user/password-reset/student@example.com/", REMOTE_ADDR="10.0.0.9")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(OutboundEmail.objects.count(), 3)
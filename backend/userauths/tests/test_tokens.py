@@ -0,0 +1,100 @@
+import os
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase as TestCase
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from userauths import tokens
+from userauths.models import RevokedToken, User
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = tokens.BloomFilter(1000)
+        added = [os.urandom(16) for _ in range(1000)]
+        for digest in added:
+            bloom.add(digest)
+
+        self.assertTrue(all(digest in bloom for digest in added))
+        false_positives = sum(os.urandom(16) in bloom for _ in range(10000))
+        self.assertLess(false_positives, 50)
+
+
+class RefreshTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tokens.revoked_tokens.reset()
+        self.user = User.objects.create_user(email='student@example.com', username='student', password='pass1234', wallet_address='wallet-student')
+
+    def login(self):
+        response = self.client.post("/api/v1/user/token/", {"email": "student@example.com", "password": "pass1234"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['refresh']
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/v1/user/token/refresh/", {"refresh": token}, format='json')
+
+    def test_rotation_revokes_the_old_token_compactly(self):
+        first = self.login()
+        self.assertFalse(OutstandingToken.objects.exists())
+
+        response = self.refresh(first)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], first)
+        self.assertEqual(len(bytes(RevokedToken.objects.get().digest)), 16)
+
+        self.assertEqual(self.refresh(first).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, status.HTTP_200_OK)
+
+    def test_unrevoked_token_is_checked_without_a_query(self):
+        tokens.revoked_tokens.sync()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(tokens.revoked_tokens.is_revoked("never-revoked"))
+
+    def test_revocation_from_another_process_is_seen(self):
+        tokens.revoked_tokens.sync()
+        with self.captureOnCommitCallbacks(execute=True):
+            RevokedToken.revoke("elsewhere", timezone.now() + timedelta(days=1))
+
+        self.assertTrue(tokens.revoked_tokens.is_revoked("elsewhere"))
+
+    def test_a_token_is_only_revoked_once(self):
+        token = tokens.CompactRefreshToken.for_user(self.user)
+        token.blacklist()
+
+        with self.assertRaises(TokenError):
+            token.blacklist()
+        with self.assertRaises(TokenError):
+            tokens.CompactRefreshToken(str(token))
+
+    def test_simplejwt_blacklist_is_honoured(self):
+        token = tokens.CompactRefreshToken.for_user(self.user)
+        outstanding = OutstandingToken.objects.create(user=self.user, jti=token['jti'], token=str(token), expires_at=timezone.now() + timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=outstanding)
+
+        with self.assertRaises(TokenError):
+            tokens.CompactRefreshToken(str(token))
+
+    def test_prune_tokens_deletes_expired_rows_in_batches(self):
+        past, future = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        for i in range(5):
+            RevokedToken.revoke(f"old-{i}", past)
+            OutstandingToken.objects.create(user=self.user, jti=f"old-{i}", token="x", expires_at=past)
+        RevokedToken.revoke("live", future)
+        OutstandingToken.objects.create(user=self.user, jti="live", token="x", expires_at=future)
+
+        out = StringIO()
+        call_command("prune_tokens", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Deleted 5 revoked and 5 outstanding", out.getvalue())
+        self.assertEqual(RevokedToken.objects.count(), 1)
+        self.assertEqual(OutstandingToken.objects.get().jti, "live")
@@ -0,0 +1,159 @@
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from userauths.models import RevokedToken
+
+# Resync with the table at least this often, even if no revocation was announced
+FILTER_SYNC_INTERVAL = 30
+
+# Revocations committed this long after their revoked_at are still picked up
+FILTER_SYNC_SLACK = timedelta(seconds=60)
+
+FILTER_MIN_CAPACITY = 10000
+FILTER_ERROR_RATE = 0.001
+
+
+class BloomFilter:
+    """
+    Fixed-size set of 16-byte digests that answers "definitely not in the
+    set" or "maybe in the set". The digests are already uniformly random,
+    so the probe positions are derived from them directly (double hashing
+    on their two 64-bit halves) instead of hashing again.
+    """
+
+    def __init__(self, capacity, error_rate=FILTER_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.probes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:16], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.probes))
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class RevokedTokenFilter:
+    """
+    Per-process Bloom filter of RevokedToken digests, so checking a refresh
+    token that was never revoked (nearly all of them) needs no query. It is
+    filled from the table once, then topped up with recent revocations when
+    another process bumps RevokedToken.GENERATION_KEY in the cache or every
+    FILTER_SYNC_INTERVAL seconds, and rebuilt at twice the size once full.
+    A "maybe" is always confirmed against the table.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.generation = None
+        self.synced_at = 0.0
+        self.synced_since = None
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+
+    def _rebuild(self, now):
+        live = RevokedToken.objects.filter(expires_at__gt=now)
+        bloom = BloomFilter(max(FILTER_MIN_CAPACITY, live.count() * 2))
+        for digest in live.values_list("digest", flat=True).iterator(chunk_size=5000):
+            bloom.add(bytes(digest))
+        self.bloom = bloom
+
+    def sync(self):
+        generation = cache.get(RevokedToken.GENERATION_KEY, 0)
+        with self.lock:
+            if self.bloom is not None and generation == self.generation and time.monotonic() - self.synced_at < FILTER_SYNC_INTERVAL:
+                return
+            now = timezone.now()
+            if self.bloom is None or self.bloom.count >= self.bloom.capacity:
+                self._rebuild(now)
+            else:
+                recent = RevokedToken.objects.filter(revoked_at__gte=self.synced_since - FILTER_SYNC_SLACK)
+                for digest in recent.values_list("digest", flat=True):
+                    self.bloom.add(bytes(digest))
+            self.generation = generation
+            self.synced_at = time.monotonic()
+            self.synced_since = now
+
+    def add(self, digest):
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(digest)
+
+    def is_revoked(self, jti):
+        digest = RevokedToken.digest_of(jti)
+        self.sync()
+        if digest not in self.bloom:
+            return False
+        return RevokedToken.objects.filter(digest=digest).exists()
+
+
+revoked_tokens = RevokedTokenFilter()
+
+
+class CompactRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist is RevokedToken behind revoked_tokens,
+    instead of simplejwt's OutstandingToken / BlacklistedToken tables: a
+    login no longer stores the whole token, and a rotation stores 16 bytes.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which records every login in OutstandingToken
+        return super(BlacklistMixin, cls).for_user(user)
+
+    def check_blacklist(self):
+        if revoked_tokens.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not RevokedToken.revoke(jti, datetime_from_epoch(self.payload["exp"])):
+            # Two refreshes raced with the same token; only the first one wins
+            raise TokenError("Token is blacklisted")
+        revoked_tokens.add(RevokedToken.digest_of(jti))
+
+
+def prune_expired(batch_size=5000):
+    """
+    Delete revoked and outstanding tokens that have expired, batch_size rows
+    per statement so the tables are never locked for long. Returns
+    (revoked, outstanding) row counts.
+    """
+    now = timezone.now()
+    revoked = _delete_in_batches(RevokedToken.objects.filter(expires_at__lte=now), batch_size)
+    # Cascades to their BlacklistedToken rows
+    outstanding = _delete_in_batches(OutstandingToken.objects.filter(expires_at__lte=now), batch_size)
+    return revoked, outstanding
+
+
+def _delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        queryset.model.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
@@ -61,16 +61,18 @@ const QuizTakePage = () => {
             // Try different endpoint patterns
             const response = await apiInstance.get<Quiz>(`quiz/${quizId}/take`);
             console.log('Quiz API Response:', response.data);
-            const quizData = response.data;
-            
-            // Shuffle questions if shuffle_questions is true
-            if (quizData.shuffle_questions && quizData.questions) {
-                const shuffledQuestions = [...quizData.questions].sort(() => Math.random() - 0.5);
-                quizData.questions = shuffledQuestions;
-            }
             
+            // Open (or resume) the timed session; submissions are only accepted through it.
+            // Its payload carries the question order seeded by the attempt.
+            const session = await apiInstance.post(`quiz/${quizId}/attempt/start/`);
+            const quizData: Quiz = session.data.quiz || response.data;
+            const drafted = session.data.draft_answers || {};
+            setAnswers(Object.fromEntries(Object.entries(drafted).filter(([, optionId]) => optionId)) as Record<string, string>);
+
             setQuiz(quizData);
-            setTimeLeft(quizData.time_limit * 60);
+            setTimeLeft(session.data.deadline
+                ? Math.max(0, Math.floor((new Date(session.data.deadline).getTime() - Date.now()) / 1000))
+                : quizData.time_limit * 60);
         } catch (err) {
             console.error('Error fetching quiz:', err);
             setError('Failed to load the quiz. Please try again later.');